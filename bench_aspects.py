@@ -0,0 +1,56 @@
+# bench_aspects.py
+
+import glob
+import json
+import re
+import time
+
+import pandas as pd
+
+from src.nlp.aspects import LEXICON_PATH, extract_aspects_batch, fold
+from src.utils.cleaning import clean_texts
+
+N = 100_000
+
+
+def naive_aspects(texts: list[str]) -> list[set[str]]:
+    # référence : une regex par mot-clé, texte par texte
+    with open(LEXICON_PATH, encoding="utf-8") as f:
+        lexicon = json.load(f)["aspects"]
+    patterns = [
+        (aspect, re.compile(r"\b" + re.escape(fold(w).rstrip("*")) + (r"\w*" if w.endswith("*") else "") + r"\b"))
+        for aspect, words in lexicon.items()
+        for w in words
+    ]
+    return [{aspect for aspect, rx in patterns if rx.search(fold(t))} for t in texts]
+
+
+def main():
+    texts = []
+    for path in glob.glob("data/*.csv") + glob.glob("*.csv"):
+        df = pd.read_csv(path)
+        if "Avis" in df:
+            texts += df["Avis"].dropna().astype(str).tolist()
+    cleaned = clean_texts(texts, workers=1)
+
+    # 1) Mêmes aspects qu'une recherche mot-clé par mot-clé
+    fast = extract_aspects_batch(cleaned)
+    same = [set(a) for a in fast] == naive_aspects(cleaned)
+    tagged = sum(bool(a) for a in fast)
+    print(f"Aspects identiques ({len(cleaned)} avis, {tagged} avec au moins un aspect) : {same}")
+
+    # 2) Débit comparé au nettoyage, sur un gros lot
+    big = (texts * (N // len(texts) + 1))[:N]
+    big_clean = clean_texts(big, workers=1)
+    for name, fn, data in (
+        ("clean_texts", lambda d: clean_texts(d, workers=1), big),
+        ("extract_aspects_batch", extract_aspects_batch, big_clean),
+    ):
+        t0 = time.perf_counter()
+        fn(data)
+        dt = time.perf_counter() - t0
+        print(f"{name:<22}: {dt:6.2f}s pour {N} avis ({N / dt:10.0f} avis/s)")
+
+
+if __name__ == "__main__":
+    main()
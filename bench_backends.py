@@ -0,0 +1,48 @@
+# bench_backends.py
+
+import time
+
+import pandas as pd
+
+from src.nlp.backends import BACKENDS
+from src.nlp.model_registry import registry
+from src.nlp.sentiment import analyze_sentiment_batch
+
+BATCH_SIZE = 32
+
+
+def main():
+    df = pd.read_csv("data/reviews_all_with_sentiment.csv")
+    texts = df["Avis_clean"].fillna("").astype(str).tolist()
+    n = len(texts)
+
+    print(f"Nombre d'avis : {n}")
+    reference = analyze_sentiment_batch(texts, batch_size=BATCH_SIZE, backend="torch")
+
+    print(f"{'backend':<11} {'accord':>8} {'unitaire ms':>12} {'lot avis/s':>11}")
+    for backend in BACKENDS:
+        try:
+            registry.get_backend(backend)
+        except ImportError as exc:
+            print(f"{backend:<11} indisponible : {exc}")
+            continue
+
+        # 1) Accord avec le modèle fp32 (même mapping negative/neutral/positive)
+        labels = analyze_sentiment_batch(texts, batch_size=BATCH_SIZE, backend=backend)
+        agreement = sum(a == b for a, b in zip(labels, reference)) / n
+
+        # 2) Latence unitaire et débit par lot
+        t0 = time.perf_counter()
+        for t in texts[:50]:
+            analyze_sentiment_batch([t], backend=backend)
+        latency_ms = (time.perf_counter() - t0) / 50 * 1000
+
+        t0 = time.perf_counter()
+        analyze_sentiment_batch(texts, batch_size=BATCH_SIZE, backend=backend)
+        throughput = n / (time.perf_counter() - t0)
+
+        print(f"{backend:<11} {agreement:>7.1%} {latency_ms:>12.1f} {throughput:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# bench_cleaning.py
+
+import glob
+import time
+
+import pandas as pd
+
+from src.utils.cleaning import clean_text, clean_texts, detect_language, detect_languages
+
+SIZES = (1_000, 100_000)
+
+
+def _timed(label: str, n: int, fn) -> list:
+    t0 = time.perf_counter()
+    out = fn()
+    dt = time.perf_counter() - t0
+    print(f"  {label:<32}: {dt:7.2f}s ({n / dt:10.0f} avis/s)")
+    return out
+
+
+def main():
+    texts = []
+    for path in glob.glob("data/*.csv") + glob.glob("*.csv"):
+        df = pd.read_csv(path)
+        if "Avis" in df:
+            texts += df["Avis"].fillna("").astype(str).tolist()
+
+    for n in SIZES:
+        sample = (texts * (n // len(texts) + 1))[:n]
+        print(f"{n} avis")
+
+        _timed("clean_text (boucle)", n, lambda: [clean_text(t) for t in sample])
+        cleaned = _timed("clean_texts (pool)", n, lambda: clean_texts(sample))
+
+        # langdetect est lent : on se limite à 10k avis pour la boucle simple
+        m = min(n, 10_000)
+        _timed(f"detect_language (boucle, {m})", m, lambda: [detect_language(t) for t in cleaned[:m]])
+        _timed("detect_languages (pool)", n, lambda: detect_languages(cleaned))
+        _timed("detect_languages (pool + courts)", n, lambda: detect_languages(cleaned, fast_short=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_dates.py
+
+import glob
+import time
+
+import pandas as pd
+
+from src.scraper.trustpilot_scraper import DATE_IN_TEXT_RE, parse_date
+from src.utils.dates import extract_date_strings, parse_dates
+
+N = 200_000
+
+
+def _old_extract(s: str) -> str:
+    if not s:
+        return ""
+    m = DATE_IN_TEXT_RE.search(s)
+    return m.group(1) if m else s
+
+
+def old_path(s: pd.Series) -> pd.Series:
+    # chemin historique : apply ligne par ligne
+    return pd.to_datetime(s.astype(str).apply(_old_extract).apply(parse_date))
+
+
+def new_path(s: pd.Series) -> pd.Series:
+    return parse_dates(extract_date_strings(s))
+
+
+def main():
+    values = []
+    for path in glob.glob("data/*.csv") + glob.glob("*.csv"):
+        df = pd.read_csv(path)
+        if "Date_str" in df:
+            values += df["Date_str"].fillna("").astype(str).tolist()
+    values += ["Actualisé le 3 mars 2025", "12 Mars 2024", "31 févr. 2024", "12 March 2024"]
+    s = pd.Series(values)
+
+    # 1) Mêmes résultats que le chemin historique
+    old, new = old_path(s), new_path(s)
+    same = ((old == new) | (old.isna() & new.isna())).all()
+    print(f"Dates identiques ({len(s)} valeurs) : {same}")
+
+    # 2) Temps sur une grosse colonne
+    big = pd.Series(values * (N // len(values) + 1))[:N]
+    for name, fn in (("apply (historique)", old_path), ("vectorisé", new_path)):
+        t0 = time.perf_counter()
+        fn(big)
+        dt = time.perf_counter() - t0
+        print(f"{name:<20}: {dt:6.2f}s pour {N} dates ({N / dt:10.0f} dates/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench_dedup.py
+
+import glob
+import random
+import time
+
+import pandas as pd
+
+from src.utils.dedup import NearDuplicateIndex
+
+N = 20_000
+
+
+def _variants(text: str, rng: random.Random) -> str:
+    """Copie "presque identique" d'un avis, comme on en voit entre plateformes."""
+    choice = rng.randrange(4)
+    if choice == 0:
+        return text.upper()
+    if choice == 1:
+        return text.replace(",", "").replace(".", " !") + " 😀"
+    if choice == 2:
+        return "  " + text.replace(" ", "\n", 3) + "  "
+    return text[: int(len(text) * 0.9)] + "... Voir plus"
+
+
+def main():
+    texts = []
+    for path in glob.glob("data/*.csv") + ["trustpilot_boursobank_com_fr.csv"]:
+        texts += pd.read_csv(path)["Avis"].dropna().astype(str).tolist()
+    originals = list(dict.fromkeys(" ".join(t.split()) for t in texts))
+    rng = random.Random(0)
+
+    # 1) Rappel : chaque variante doit retomber dans le groupe de son original
+    with NearDuplicateIndex() as index:
+        groups = index.assign_many(originals)
+        variants = [_variants(t, rng) for t in originals]
+        found = index.assign_many(variants)
+    recall = (found == groups).mean()
+    exact = sum(" ".join(v.split()) in set(originals) for v in variants) / len(variants)
+    print(f"Avis distincts : {len(originals)}, groupes : {len(set(groups))}")
+    print(f"Variantes retrouvées : {recall:.1%} (dédoublonnage exact : {exact:.1%})")
+
+    # 2) Débit sur un gros volume d'avis synthétiques (index SQLite temporaire)
+    words = " ".join(originals).split()
+    synthetic = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(10, 80))) for _ in range(N)
+    ]
+    with NearDuplicateIndex() as index:
+        t0 = time.perf_counter()
+        index.assign_many(synthetic)
+        dt = time.perf_counter() - t0
+    print(f"Indexation : {N} avis en {dt:.2f}s ({N / dt:8.0f} avis/s)")
+
+
+if __name__ == "__main__":
+    main()
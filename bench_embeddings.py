@@ -0,0 +1,94 @@
+# bench_embeddings.py
+"""
+Index de recherche d'avis similaires sur des vecteurs synthétiques
+(regroupés autour de centres, comme des avis sur les mêmes sujets).
+
+    python bench_embeddings.py                  # 1 000 000 vecteurs de dimension 768
+    python bench_embeddings.py --rows 200000
+
+Mesure l'ajout incrémental, la recherche exhaustive, l'entraînement IVF,
+puis la latence et le rappel@10 de l'IVF par rapport à l'exhaustif.
+"""
+
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from src.utils.embedding_index import EmbeddingIndex
+
+K = 10
+
+
+def synthetic(rows: int, dim: int, centers: int, seed: int = 0):
+    """Morceaux de (clés, vecteurs) : centres aléatoires + bruit."""
+    rng = np.random.default_rng(seed)
+    means = rng.normal(size=(centers, dim)).astype(np.float32)
+    for start in range(0, rows, 100_000):
+        n = min(100_000, rows - start)
+        vectors = means[rng.integers(0, centers, n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+        keys = [(f"avis-{start + i}", "Trustpilot" if i % 2 else "Yelp", f"marque-{i % 20}") for i in range(n)]
+        yield keys, vectors
+
+
+def latencies(fn, queries: np.ndarray) -> tuple[float, list]:
+    times, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000, results
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    path = tempfile.mkdtemp(prefix="bench_embeddings_")
+    try:
+        index = EmbeddingIndex(path)
+
+        # 1) Ajouts incrémentaux
+        t0 = time.perf_counter()
+        for keys, vectors in synthetic(args.rows, args.dim, centers=max(10, args.rows // 500)):
+            index.add(keys, vectors)
+        dt = time.perf_counter() - t0
+        print(f"ajout              : {dt:7.2f}s pour {len(index)} vecteurs ({len(index) / dt:10.0f} vecteurs/s)")
+
+        rng = np.random.default_rng(1)
+        queries = [index.find(f"avis-{i}")[1] for i in rng.integers(0, args.rows, args.queries)]
+        queries = np.stack(queries) + 0.1 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+        # 2) Exhaustif (référence exacte)
+        ms, exact = latencies(lambda q: index.search(q, K), queries[:10])
+        print(f"exhaustif          : {ms:8.1f} ms / requête (médiane)")
+
+        # 3) IVF
+        t0 = time.perf_counter()
+        lists = index.train()
+        print(f"entraînement IVF   : {time.perf_counter() - t0:7.2f}s ({lists} listes)")
+        index.search(queries[0], K)  # tri des listes hors mesure
+
+        for nprobe in (8, 16, 32):
+            ms, approx = latencies(lambda q: index.search(q, K, nprobe=nprobe), queries)
+            recall = np.mean([
+                len({h["avis_hash"] for h in a} & {h["avis_hash"] for h in e}) / K
+                for a, e in zip(approx, exact)
+            ])
+            print(f"IVF nprobe={nprobe:<3}    : {ms:8.1f} ms / requête (médiane), rappel@{K} {recall:.3f}")
+
+        ms, _ = latencies(lambda q: index.search(q, K, brand="marque-3"), queries)
+        print(f"IVF + filtre marque: {ms:8.1f} ms / requête (médiane)")
+        index.close()
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    main()
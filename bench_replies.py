@@ -0,0 +1,244 @@
+# bench_replies.py
+
+import itertools
+import random
+import time
+
+from src.nlp.response_generator import generate_replies, generate_reply
+
+N = 100_000
+
+SENTIMENTS = ("positive", "negative", "neutral", "Positive", "mixed")
+LANGUES = ("fr", "en", "fr-FR", "en-US", "english", "ro", "unknown", "", None)
+PLATFORMS = ("Trustpilot", "Yelp", "", None)
+BRANDS = ("Carhartt WIP", "Le Petit Cler", "", None)
+TONES = ("formel", "amical", "empathique", "FORMEL")
+
+
+# =========================
+#   IMPLÉMENTATION HISTORIQUE (référence fr / en)
+# =========================
+# Copie figée de generate_reply de la 1re version du dépôt (arbre if/elif
+# fr / en) : ne pas modifier, c'est la référence des sorties attendues.
+
+
+def _legacy_normalize_lang(lang: str) -> str:
+    """Simplifie le code langue (fr-FR -> fr, en-US -> en, etc.)."""
+    if not lang:
+        return "fr"
+    lang = lang.lower()
+    if lang.startswith("fr"):
+        return "fr"
+    if lang.startswith("en"):
+        return "en"
+    return "fr"
+
+
+def legacy_generate_reply(
+    avis: str,
+    sentiment: str,
+    langue: str,
+    platform: str | None,
+    brand: str | None,
+    tone: str = "formel",
+) -> str:
+    """
+    Génère une réponse en fonction :
+    - avis : texte de l'avis
+    - sentiment : positive / negative / neutral
+    - langue : fr / en
+    - platform : Yelp, Trustpilot, ...
+    - brand : Carhartt WIP, Le Petit Cler, ...
+    - tone : formel / amical / empathique
+    """
+
+    langue = _legacy_normalize_lang(langue)
+    sentiment = sentiment.lower()
+    tone = tone.lower()
+
+    platform = platform or ""
+    brand = brand or "notre enseigne"
+
+    # ======================= FRANÇAIS =======================
+    if langue == "fr":
+        # Ouverture / fermeture selon le ton
+        if tone == "amical":
+            opening = "Bonjour 😊"
+            closing = "\n\nÀ bientôt,\nL'équipe Service Client"
+        elif tone == "empathique":
+            opening = "Bonjour 🙏"
+            closing = "\n\nCordialement,\nL'équipe Service Client"
+        else:  # formel
+            opening = "Bonjour,"
+            closing = "\n\nCordialement,\nL'équipe Service Client"
+
+        if sentiment == "positive":
+            if tone == "formel":
+                core = (
+                    f"Merci pour votre avis positif sur {brand} et pour votre confiance.\n"
+                    f"Nous sommes ravis de voir que votre expérience sur {platform} s'est bien passée."
+                )
+            elif tone == "amical":
+                core = (
+                    f"Un grand merci pour votre super retour sur {brand} 🥰\n"
+                    f"Ça nous fait vraiment plaisir de savoir que votre expérience s'est bien passée via {platform}."
+                )
+            else:  # empathique
+                core = (
+                    f"Merci du fond du cœur pour votre message sur {brand} ❤️\n"
+                    f"Nous sommes très heureux d'avoir pu vous offrir une belle expérience, "
+                    f"et votre retour sur {platform} compte beaucoup pour nous."
+                )
+
+        elif sentiment == "negative":
+            if tone == "formel":
+                core = (
+                    f"Nous sommes désolés d'apprendre que votre expérience avec {brand} via {platform} "
+                    "n’a pas été à la hauteur de vos attentes.\n"
+                    "Merci d'avoir pris le temps de nous faire part de ces éléments ; "
+                    "nous allons analyser la situation afin de nous améliorer."
+                )
+            elif tone == "amical":
+                core = (
+                    f"Merci d'avoir pris le temps de nous laisser un avis sur {brand}, même si l'expérience "
+                    "n'était pas au rendez-vous 😔\n"
+                    "On aimerait vraiment comprendre ce qui s'est passé pour pouvoir améliorer les choses."
+                )
+            else:  # empathique
+                core = (
+                    f"Nous sommes vraiment navrés de lire que votre expérience avec {brand} via {platform} "
+                    "ne s'est pas bien déroulée 😔\n"
+                    "Votre ressenti est important pour nous et nous vous remercions sincèrement de l'avoir partagé.\n"
+                    "Si vous le souhaitez, vous pouvez nous contacter directement afin que nous trouvions une solution "
+                    "ensemble."
+                )
+
+        else:  # neutral
+            if tone == "formel":
+                core = (
+                    f"Merci pour votre retour au sujet de {brand}.\n"
+                    "Vos remarques nous aident à mieux comprendre vos attentes et à faire évoluer notre service."
+                )
+            elif tone == "amical":
+                core = (
+                    f"Merci pour votre avis sur {brand} 😊\n"
+                    "On note vos retours et on va faire en sorte de continuer à s'améliorer."
+                )
+            else:  # empathique
+                core = (
+                    f"Merci d'avoir partagé votre expérience avec {brand}.\n"
+                    "Nous prenons vos remarques avec beaucoup d'attention afin d'améliorer nos services."
+                )
+
+        return f"{opening}\n\n{core}{closing}"
+
+    # ======================= ANGLAIS =======================
+    else:
+        if tone == "amical":
+            opening = "Hi there 😊"
+            closing = "\n\nBest regards,\nThe Customer Service Team"
+        elif tone == "empathique":
+            opening = "Hello 🙏"
+            closing = "\n\nBest regards,\nThe Customer Service Team"
+        else:
+            opening = "Hello,"
+            closing = "\n\nBest regards,\nThe Customer Service Team"
+
+        if sentiment == "positive":
+            if tone == "formel":
+                core = (
+                    f"Thank you for your positive feedback about {brand}.\n"
+                    f"We're glad to hear your experience on {platform} went well."
+                )
+            elif tone == "amical":
+                core = (
+                    f"Thank you so much for the great review about {brand} 🥰\n"
+                    f"We're really happy that you enjoyed your experience via {platform}."
+                )
+            else:
+                core = (
+                    f"Thank you from the bottom of our hearts for your kind words about {brand} ❤️\n"
+                    f"Knowing that your experience via {platform} went well truly means a lot to us."
+                )
+
+        elif sentiment == "negative":
+            if tone == "formel":
+                core = (
+                    f"We're sorry to hear that your experience with {brand} through {platform} "
+                    "did not meet your expectations.\n"
+                    "Thank you for taking the time to share this with us; we will review the situation carefully."
+                )
+            elif tone == "amical":
+                core = (
+                    f"Thanks for sharing your feedback about {brand}, even though things didn't go as expected 😔\n"
+                    "We’d really like to understand what happened so we can improve."
+                )
+            else:
+                core = (
+                    f"We're truly sorry to read that your experience with {brand} via {platform} "
+                    "was disappointing 😔\n"
+                    "Your feelings matter to us, and we really appreciate you taking the time to explain the situation.\n"
+                    "If you’d like, feel free to contact us directly so we can try to sort this out together."
+                )
+
+        else:  # neutral
+            if tone == "formel":
+                core = (
+                    f"Thank you for your feedback about {brand}.\n"
+                    "Your comments help us better understand your expectations and improve our service."
+                )
+            elif tone == "amical":
+                core = (
+                    f"Thanks for your review about {brand} 😊\n"
+                    "We appreciate your feedback and will use it to keep improving."
+                )
+            else:
+                core = (
+                    f"Thank you for taking the time to share your experience with {brand}.\n"
+                    "We carefully consider this type of feedback to improve our services."
+                )
+
+        return f"{opening}\n\n{core}{closing}"
+
+
+def main():
+    # 1) Sorties identiques à l'arbre if/elif historique (fr / en / repli fr)
+    combos = list(itertools.product(SENTIMENTS, LANGUES, PLATFORMS, BRANDS, TONES))
+    diff = [
+        c for c in combos
+        if generate_reply("", c[0], c[1], c[2], c[3], c[4])
+        != legacy_generate_reply("", c[0], c[1], c[2], c[3], c[4])
+    ]
+    print(f"Réponses identiques ({len(combos)} combinaisons) : {not diff}")
+    for c in diff[:5]:
+        print("  différence :", c)
+
+    # 2) Débit : appels unitaires (historique / table) et version groupée
+    rng = random.Random(0)
+    items = [
+        {
+            "sentiment": rng.choice(("positive", "negative", "neutral")),
+            "langue": rng.choice(("fr", "en")),
+            "platform": rng.choice(("Trustpilot", "Yelp")),
+            "brand": rng.choice(("Carhartt WIP", "Le Petit Cler")),
+            "tone": rng.choice(("formel", "amical", "empathique")),
+        }
+        for _ in range(N)
+    ]
+    calls = [(i["sentiment"], i["langue"], i["platform"], i["brand"], i["tone"]) for i in items]
+
+    for name, fn in (("if/elif (historique)", legacy_generate_reply), ("table de modèles", generate_reply)):
+        t0 = time.perf_counter()
+        for a in calls:
+            fn("", *a)
+        dt = time.perf_counter() - t0
+        print(f"{name:<22}: {N / dt:10.0f} réponses/s")
+
+    t0 = time.perf_counter()
+    generate_replies(items)
+    dt = time.perf_counter() - t0
+    print(f"{'generate_replies':<22}: {N / dt:10.0f} réponses/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# bench_sentiment_batch.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.nlp.sentiment import analyze_sentiment, analyze_sentiment_batch
+from src.nlp.batcher import MicroBatcher
+
+
+def main():
+    df = pd.read_csv("data/reviews_all_with_sentiment.csv")
+    texts = df["Avis_clean"].fillna("").astype(str).tolist()
+    n = len(texts)
+
+    print(f"Nombre d'avis : {n}")
+
+    # 1) Un appel par avis (comportement historique)
+    t0 = time.perf_counter()
+    for t in texts:
+        analyze_sentiment(t)
+    dt = time.perf_counter() - t0
+    print(f"unitaire        : {n / dt:8.1f} avis/s")
+
+    # 2) Appel groupé avec différentes tailles de lot
+    for batch_size in (1, 4, 8, 16, 32, 64):
+        t0 = time.perf_counter()
+        analyze_sentiment_batch(texts, batch_size=batch_size)
+        dt = time.perf_counter() - t0
+        print(f"batch_size={batch_size:<4} : {n / dt:8.1f} avis/s")
+
+    # 3) Regroupement par longueur (padding minimal) vs ordre d'origine
+    for sort_by_length in (False, True):
+        t0 = time.perf_counter()
+        labels = analyze_sentiment_batch(texts, sort_by_length=sort_by_length)
+        dt = time.perf_counter() - t0
+        print(f"tri par longueur={sort_by_length!s:<5}: {n / dt:8.1f} avis/s")
+    reference = analyze_sentiment_batch(texts, sort_by_length=False)
+    agreement = sum(a == b for a, b in zip(labels, reference)) / n
+    print(f"accord tri / sans tri : {agreement:.1%}")
+
+    # 4) Micro-batching : appels unitaires concurrents regroupés côté serveur
+    for max_batch_size in (1, 8, 16, 32):
+        batcher = MicroBatcher(analyze_sentiment_batch, max_batch_size=max_batch_size)
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            t0 = time.perf_counter()
+            list(pool.map(batcher, texts))
+            dt = time.perf_counter() - t0
+        print(f"micro-batch max={max_batch_size:<3}: {n / dt:8.1f} avis/s (32 clients)")
+
+
+if __name__ == "__main__":
+    main()
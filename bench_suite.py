@@ -0,0 +1,316 @@
+# bench_suite.py
+"""
+Banc de performance hors ligne, sur les données du dépôt.
+
+    python bench_suite.py                         # tout, résultats JSON dans bench_results/
+    python bench_suite.py --only cleaning,html    # une partie seulement
+    python bench_suite.py --skip-model            # sans le modèle de sentiment
+    python bench_suite.py --compare bench_results/<ancien>.json
+
+Entrées : data/*.csv, trustpilot_boursobank_com_fr.csv et les pages HTML
+de data/fixtures/ (aucun accès réseau, hormis le téléchargement initial
+du modèle). Chaque mesure est répétée `--repeats` fois ; on garde la
+médiane et le meilleur temps. Le JSON contient aussi le commit, la
+machine et la configuration du modèle pour comparer des runs entre eux.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+DATASETS = sorted(glob.glob("data/*.csv")) + ["trustpilot_boursobank_com_fr.csv"]
+FIXTURES = sorted(glob.glob("data/fixtures/*.html"))
+SUITES = ("cleaning", "langdetect", "aspects", "sentiment", "replies", "html", "api")
+MODEL_SUITES = ("sentiment", "api")
+OUTPUT_DIR = "bench_results"
+
+
+# =========================
+#   OUTILS
+# =========================
+
+def load_reviews() -> list[str]:
+    """Tous les avis bruts des CSV du dépôt, dans un ordre stable."""
+    texts = []
+    for path in DATASETS:
+        if os.path.exists(path):
+            df = pd.read_csv(path)
+            if "Avis" in df:
+                texts += df["Avis"].dropna().astype(str).tolist()
+    return texts
+
+
+def measure(fn, items: int, repeats: int) -> dict:
+    """Lance `fn` `repeats` fois et résume les temps (items = éléments par appel)."""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    median = statistics.median(times)
+    return {
+        "items": items,
+        "repeats": repeats,
+        "median_s": round(median, 6),
+        "best_s": round(min(times), 6),
+        "items_per_s": round(items / median, 1) if median else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta(args) -> dict:
+    from src.nlp.backends import SENTIMENT_BACKEND
+    from src.nlp.model_registry import MODEL_NAME, MODEL_REVISION, TORCH_THREADS
+
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "model": MODEL_NAME,
+        "model_revision": MODEL_REVISION,
+        "backend": SENTIMENT_BACKEND,
+        "torch_threads": TORCH_THREADS or None,
+        "scale": args.scale,
+        "repeats": args.repeats,
+    }
+
+
+# =========================
+#   MESURES
+# =========================
+
+def bench_cleaning(texts: list[str], repeats: int) -> dict:
+    from src.utils.cleaning import clean_text, clean_texts
+
+    return {
+        "clean_text (unitaire)": measure(lambda: [clean_text(t) for t in texts], len(texts), repeats),
+        "clean_texts (1 processus)": measure(lambda: clean_texts(texts, workers=1), len(texts), repeats),
+    }
+
+
+def bench_langdetect(cleaned: list[str], repeats: int) -> dict:
+    from src.utils.cleaning import detect_languages
+
+    return {
+        "detect_languages": measure(lambda: detect_languages(cleaned, workers=1), len(cleaned), repeats),
+        "detect_languages (fast_short)": measure(
+            lambda: detect_languages(cleaned, workers=1, fast_short=True), len(cleaned), repeats
+        ),
+    }
+
+
+def bench_aspects(cleaned: list[str], repeats: int) -> dict:
+    from src.nlp.aspects import extract_aspects, extract_aspects_batch
+
+    return {
+        "extract_aspects (unitaire)": measure(lambda: [extract_aspects(t) for t in cleaned], len(cleaned), repeats),
+        "extract_aspects_batch": measure(lambda: extract_aspects_batch(cleaned), len(cleaned), repeats),
+    }
+
+
+def bench_sentiment(cleaned: list[str], repeats: int) -> dict:
+    from src.nlp.model_registry import registry
+    from src.nlp.sentiment import analyze_sentiment, analyze_sentiment_batch
+
+    registry.warmup()  # chargement du modèle hors mesure
+    return {
+        "analyze_sentiment (unitaire)": measure(
+            lambda: [analyze_sentiment(t) for t in cleaned], len(cleaned), repeats
+        ),
+        "analyze_sentiment_batch": measure(
+            lambda: analyze_sentiment_batch(cleaned), len(cleaned), repeats
+        ),
+    }
+
+
+def bench_replies(n: int, repeats: int) -> dict:
+    from src.nlp.response_generator import generate_replies, generate_reply
+
+    combos = [
+        {"sentiment": s, "langue": lang, "platform": p, "brand": b, "tone": tone}
+        for s in ("positive", "negative", "neutral")
+        for lang in ("fr", "en")
+        for p in ("Trustpilot", "Yelp")
+        for b in ("Carhartt WIP", "Le Petit Cler")
+        for tone in ("formel", "amical", "empathique")
+    ]
+    items = [combos[i % len(combos)] for i in range(n)]
+
+    def unit():
+        for it in items:
+            generate_reply("", it["sentiment"], it["langue"], it["platform"], it["brand"], it["tone"])
+
+    return {
+        "generate_reply (unitaire)": measure(unit, n, repeats),
+        "generate_replies": measure(lambda: generate_replies(items), n, repeats),
+    }
+
+
+def bench_html(scale: int, repeats: int) -> dict:
+    from src.scraper.trustpilot_parsing import ENGINES, extract_reviews, resolve_engine
+
+    pages = []
+    for path in FIXTURES:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    pages = pages * scale
+
+    results = {}
+    for engine in ENGINES:
+        try:
+            resolve_engine(engine)
+        except ImportError as exc:
+            results[f"extract_reviews ({engine})"] = {"skipped": str(exc)}
+            continue
+        nb_reviews = sum(len(extract_reviews(p, engine)) for p in pages)
+        res = measure(lambda: [extract_reviews(p, engine) for p in pages], len(pages), repeats)
+        res["reviews_per_s"] = round(nb_reviews / res["median_s"], 1) if res["median_s"] else None
+        results[f"extract_reviews ({engine})"] = res
+    return results
+
+
+def bench_api(texts: list[str], repeats: int) -> dict:
+    try:
+        from fastapi.testclient import TestClient
+    except (ImportError, RuntimeError) as exc:  # TestClient nécessite httpx
+        return {"api": {"skipped": str(exc)}}
+
+    from src.api.main import app
+    from src.nlp.pipeline import result_cache
+
+    payloads = [{"avis": t, "platform": "Trustpilot", "brand": "Carhartt WIP"} for t in texts]
+
+    with TestClient(app) as client:
+        def single(route: str):
+            def run():
+                result_cache.clear()  # on mesure le calcul, pas le cache
+                for p in payloads:
+                    client.post(route, json=p).raise_for_status()
+            return run
+
+        def batch():
+            result_cache.clear()
+            client.post("/analyze/batch", json=payloads).raise_for_status()
+
+        def cached():
+            for p in payloads:
+                client.post("/analyze", json=p).raise_for_status()
+
+        return {
+            "POST /analyze": measure(single("/analyze"), len(payloads), repeats),
+            "POST /reply": measure(single("/reply"), len(payloads), repeats),
+            "POST /analyze/batch": measure(batch, len(payloads), repeats),
+            "POST /analyze (cache chaud)": measure(cached, len(payloads), repeats),
+        }
+
+
+# =========================
+#   COMPARAISON
+# =========================
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Affiche l'évolution des débits et renvoie la liste des régressions."""
+    regressions = []
+    print(f"\nComparaison avec {baseline['meta'].get('commit')} ({baseline['meta'].get('date')})")
+    for suite, cases in current["results"].items():
+        for name, res in cases.items():
+            old = baseline["results"].get(suite, {}).get(name, {})
+            if not res.get("items_per_s") or not old.get("items_per_s"):
+                continue
+            ratio = res["items_per_s"] / old["items_per_s"]
+            flag = ""
+            if ratio < 1 - tolerance:
+                flag = "  <-- régression"
+                regressions.append(f"{suite} / {name}")
+            print(f"  {suite:<10} {name:<32} x{ratio:5.2f}{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Banc de performance hors ligne (JSON)")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"parmi {', '.join(SUITES)}")
+    parser.add_argument("--skip-model", action="store_true", help="sans sentiment ni API")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=10, help="duplication du corpus pour cleaning / langue / réponses / HTML")
+    parser.add_argument("--model-items", type=int, default=128, help="avis utilisés pour le modèle et l'API")
+    parser.add_argument("-o", "--output", default=None, help="fichier JSON (défaut : bench_results/<date>-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON d'un run précédent")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="baisse de débit tolérée avant de signaler une régression")
+    args = parser.parse_args(argv)
+
+    suites = [s for s in args.only.split(",") if s]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"suite(s) inconnue(s) : {', '.join(sorted(unknown))}")
+    if args.skip_model:
+        suites = [s for s in suites if s not in MODEL_SUITES]
+
+    from src.utils.cleaning import clean_texts
+
+    raw = load_reviews()
+    cleaned = [t for t in clean_texts(raw, workers=1) if t]
+    model_texts = cleaned[: args.model_items]
+    print(f"Corpus : {len(raw)} avis ({len(DATASETS)} CSV), {len(FIXTURES)} pages HTML")
+
+    runners = {
+        "cleaning": lambda: bench_cleaning(raw * args.scale, args.repeats),
+        "langdetect": lambda: bench_langdetect(cleaned, args.repeats),
+        "aspects": lambda: bench_aspects(cleaned * args.scale, args.repeats),
+        "sentiment": lambda: bench_sentiment(model_texts, args.repeats),
+        "replies": lambda: bench_replies(len(raw) * args.scale * 10, args.repeats),
+        "html": lambda: bench_html(args.scale, args.repeats),
+        "api": lambda: bench_api(model_texts, args.repeats),
+    }
+
+    report = {"meta": _meta(args), "results": {}}
+    for suite in suites:
+        print(f"[BENCH] {suite}...")
+        report["results"][suite] = runners[suite]()
+        for name, res in report["results"][suite].items():
+            if "skipped" in res:
+                print(f"  {name:<34} ignoré : {res['skipped']}")
+            else:
+                print(f"  {name:<34} {res['items_per_s']:>12} éléments/s (médiane {res['median_s']:.4f}s)")
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(OUTPUT_DIR, f"{stamp}-{report['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Résultats : {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
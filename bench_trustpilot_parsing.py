@@ -0,0 +1,40 @@
+# bench_trustpilot_parsing.py
+
+import glob
+import time
+
+from src.scraper.trustpilot_parsing import ENGINES, extract_reviews, extract_total_pages
+
+FIXTURES = "data/fixtures/trustpilot_*.html"
+ROUNDS = 50
+
+
+def main():
+    pages = []
+    for path in sorted(glob.glob(FIXTURES)):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+
+    print(f"Pages de test : {len(pages)}")
+
+    # 1) Les moteurs doivent donner exactement la même sortie que bs4
+    reference = [extract_reviews(p, "bs4") for p in pages]
+    for engine in ENGINES:
+        same = [extract_reviews(p, engine) for p in pages] == reference
+        same_pages = all(
+            extract_total_pages(p, engine) == extract_total_pages(p, "bs4") for p in pages
+        )
+        print(f"{engine:<9} identique à bs4 : {same and same_pages}")
+
+    # 2) Débit (pages/s)
+    for engine in ENGINES:
+        t0 = time.perf_counter()
+        for _ in range(ROUNDS):
+            for p in pages:
+                extract_reviews(p, engine)
+        dt = time.perf_counter() - t0
+        print(f"{engine:<9} : {ROUNDS * len(pages) / dt:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
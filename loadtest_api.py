@@ -0,0 +1,52 @@
+# loadtest_api.py
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+
+def _percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+    return values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de /analyze")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/analyze")
+    parser.add_argument("--requests", type=int, default=200, help="requêtes par palier")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="paliers de concurrence")
+    args = parser.parse_args()
+
+    texts = pd.read_csv("data/reviews_all_with_sentiment.csv")["Avis"].fillna("").astype(str).tolist()
+    session = requests.Session()
+
+    def call(i: int) -> tuple[float, int]:
+        t0 = time.perf_counter()
+        r = session.post(args.url, json={"avis": texts[i % len(texts)]}, timeout=60)
+        return time.perf_counter() - t0, r.status_code
+
+    print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'503':>5}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            t0 = time.perf_counter()
+            results = list(pool.map(call, range(args.requests)))
+            total = time.perf_counter() - t0
+
+        ok = [lat * 1000 for lat, status in results if status == 200]
+        rejected = sum(1 for _, status in results if status == 503)
+        print(
+            f"{concurrency:>7} {len(results) / total:>8.1f} "
+            f"{statistics.median(ok) if ok else 0:>8.1f} "
+            f"{_percentile(ok, 95):>8.1f} {_percentile(ok, 99):>8.1f} {rejected:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
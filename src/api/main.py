@@ -1,10 +1,86 @@
-from fastapi import FastAPI
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from src.api.routes import router
+from src.nlp.batcher import QueueFullError, sentiment_batcher
+from src.nlp.model_registry import registry
+from src.nlp.pipeline import result_cache
+from src.scraper.jobs import WORKERS, WorkerPool, get_jobs
+from src.utils import metrics
+
+# Délai conseillé au client quand la file d'inférence est pleine
+RETRY_AFTER_S = int(os.getenv("AVIS_RETRY_AFTER_S", "1"))
+
+# Chargement avant fork (gunicorn --preload) : les workers héritent du modèle
+if os.getenv("AVIS_PRELOAD_MODEL", "0") == "1":
+    registry.warmup()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up au démarrage du worker, pour ne pas faire payer la 1re requête
+    if os.getenv("AVIS_WARMUP_ON_STARTUP", "1") == "1":
+        registry.warmup()
+    # workers des jobs de scraping (0 : uniquement des workers séparés)
+    scrape_workers = WorkerPool(get_jobs(), size=WORKERS)
+    scrape_workers.start()
+    yield
+    scrape_workers.stop()
+
 
 app = FastAPI(
     title="Avis API",
     description="API pour analyser les avis clients et générer des réponses.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(router)
+
+# Jauges lues au moment du scrape Prometheus
+metrics.registry.gauge(
+    "avis_inference_queue_pending", "Avis en attente d'inférence", sentiment_batcher.pending
+)
+metrics.registry.gauge(
+    "avis_cache_hit_rate", "Taux de hit du cache de résultats",
+    lambda: result_cache.stats()["hit_rate"],
+)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not metrics.ENABLED:
+        return await call_next(request)
+
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    # route déclarée ("/analyze") plutôt que l'URL brute : cardinalité bornée
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - t0,
+        request.method,
+        getattr(route, "path", "other"),
+        response.status_code,
+    )
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    # format texte Prometheus (AVIS_METRICS=0 : plus rien n'est mesuré)
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    # refus rapide plutôt que d'empiler les requêtes derrière le modèle
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(RETRY_AFTER_S)},
+    )
@@ -1,11 +1,21 @@
+import asyncio
+from datetime import date
 from typing import Literal
 
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import BaseModel, ValidationError
 
-from src.utils.cleaning import clean_text, detect_language
-from src.nlp.sentiment import analyze_sentiment
-from src.nlp.response_generator import generate_reply, Tone  # Tone vient du fichier ci-dessus
+from src.api.streaming import ResultStreamResponse, iter_json_values, stream_results
+from src.nlp.batcher import embedding_batcher, sentiment_batcher
+from src.nlp.pipeline import analyze_text_async, analyze_texts_async, result_cache
+from src.nlp.model_registry import registry
+from src.nlp.sentiment import is_uncertain
+from src.nlp.response_generator import generate_replies, generate_reply, Tone  # Tone vient du fichier ci-dessus
+from src.scraper.jobs import get_jobs
+from src.utils.cache import content_key
+from src.utils.cleaning import clean_text
+from src.utils.embedding_index import get_index
+from src.utils.review_store import GROUP_FIELDS, get_store
 
 router = APIRouter()
 
@@ -15,37 +25,322 @@ class AvisInput(BaseModel):
     platform: str | None = None
     brand: str | None = None
     tone: Tone = "formel"  # "formel" | "amical" | "empathique"
+    # seuil de confiance pour signaler l'avis à un humain (défaut : AVIS_UNCERTAIN_THRESHOLD)
+    uncertain_threshold: float | None = None
 
 
+# Les routes d'analyse sont async : l'inférence part dans l'exécuteur dédié
+# (sentiment_batcher) et une file pleine donne un 503 + Retry-After
+# (cf. le gestionnaire de QueueFullError dans main.py).
+
 @router.post("/analyze")
-def analyze_avis(payload: AvisInput):
-    avis_clean = clean_text(payload.avis)
-    langue = detect_language(avis_clean)
-    sentiment = analyze_sentiment(avis_clean)
+async def analyze_avis(payload: AvisInput):
+    # clean -> detect -> sentiment, servi depuis le cache si l'avis est connu
+    result = await analyze_text_async(payload.avis)
 
     return {
-        "avis_clean": avis_clean,
-        "langue": langue,
-        "sentiment": sentiment,
+        **result,
+        "uncertain": is_uncertain(result, payload.uncertain_threshold),
         "tone": payload.tone,  # on renvoie aussi le ton demandé (optionnel mais sympa)
     }
 
 
+@router.post("/analyze/batch")
+async def analyze_avis_batch(payloads: list[AvisInput]):
+    if len(payloads) > sentiment_batcher.max_queue:
+        raise HTTPException(
+            status_code=413,
+            detail=f"lot trop grand (max {sentiment_batcher.max_queue} avis)",
+        )
+
+    # un seul passage groupé (lots paddés) pour les avis absents du cache
+    results = await analyze_texts_async([p.avis for p in payloads])
+
+    return [
+        {**result, "uncertain": is_uncertain(result, p.uncertain_threshold), "tone": p.tone}
+        for p, result in zip(payloads, results)
+    ]
+
+
 @router.post("/reply")
-def reply(payload: AvisInput):
-    avis_clean = clean_text(payload.avis)
-    langue = detect_language(avis_clean)
-    sentiment = analyze_sentiment(avis_clean)
+async def reply(payload: AvisInput):
+    result = await analyze_text_async(payload.avis)
 
     reply_text = generate_reply(
-        avis_clean,
-        sentiment,
-        langue,
+        result["avis_clean"],
+        result["sentiment"],
+        result["langue"],
         payload.platform,
         payload.brand,
         payload.tone,   # 👈 on passe le ton ici
+        result["aspects"],  # la réponse mentionne l'aspect principal
+    )
+
+    return {
+        "reply": reply_text,
+        "aspects": result["aspects"],
+        # réponse à faire relire si le sentiment est incertain
+        "uncertain": is_uncertain(result, payload.uncertain_threshold),
+    }
+
+
+# Versions en flux pour des milliers d'avis : corps NDJSON (un AvisInput
+# par ligne, ou une simple chaîne) ou tableau JSON, réponse NDJSON (ou SSE
+# avec Accept: text/event-stream), une ligne {"index": i, ...} par avis dès
+# que son lot est calculé. Une ligne invalide donne {"index": i, "error": ...}
+# sans interrompre le flux (cf. src/api/streaming.py).
+
+def _parse_inputs(values: list) -> list[AvisInput | str]:
+    parsed = []
+    for value in values:
+        if isinstance(value, str):
+            value = {"avis": value}
+        try:
+            parsed.append(AvisInput.model_validate(value))
+        except ValidationError as exc:
+            parsed.append(f"entrée invalide : {exc.errors()[0]['msg']}")
+    return parsed
+
+
+async def _analyze_stream_batch(values: list) -> list[dict]:
+    inputs = _parse_inputs(values)
+    valid = [p for p in inputs if isinstance(p, AvisInput)]
+    results = iter(await analyze_texts_async([p.avis for p in valid]) if valid else [])
+
+    out = []
+    for p in inputs:
+        if isinstance(p, str):
+            out.append({"error": p})
+            continue
+        result = next(results)
+        out.append({**result, "uncertain": is_uncertain(result, p.uncertain_threshold), "tone": p.tone})
+    return out
+
+
+async def _reply_stream_batch(values: list) -> list[dict]:
+    inputs = _parse_inputs(values)
+    valid = [p for p in inputs if isinstance(p, AvisInput)]
+    results = await analyze_texts_async([p.avis for p in valid]) if valid else []
+    # une réponse par combinaison distincte (cf. generate_replies)
+    replies = generate_replies(
+        {
+            "sentiment": r["sentiment"], "langue": r["langue"], "platform": p.platform,
+            "brand": p.brand, "tone": p.tone, "aspects": r["aspects"],
+        }
+        for p, r in zip(valid, results)
+    )
+    answers = iter(zip(valid, results, replies))
+
+    out = []
+    for p in inputs:
+        if isinstance(p, str):
+            out.append({"error": p})
+            continue
+        p, result, reply_text = next(answers)
+        out.append({
+            "reply": reply_text,
+            "aspects": result["aspects"],
+            "uncertain": is_uncertain(result, p.uncertain_threshold),
+        })
+    return out
+
+
+@router.post("/analyze/stream")
+async def analyze_avis_stream(request: Request):
+    values = iter_json_values(request.stream())
+    return ResultStreamResponse(
+        stream_results(values, _analyze_stream_batch), request.headers.get("accept", "")
+    )
+
+
+@router.post("/reply/stream")
+async def reply_stream(request: Request):
+    values = iter_json_values(request.stream())
+    return ResultStreamResponse(
+        stream_results(values, _reply_stream_batch), request.headers.get("accept", "")
     )
 
+
+@router.get("/model/status")
+def model_status():
+    # temps de chargement (cold start) et de warm-up du/des modèle(s)
+    return {
+        "models": registry.stats(),
+        "inference_queue": {
+            "pending": sentiment_batcher.pending(),
+            "max": sentiment_batcher.max_queue,
+        },
+    }
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    # hits / misses du cache clean -> detect -> sentiment
+    return result_cache.stats()
+
+
+# Statistiques servies depuis les agrégats de la base d'avis
+# (src/utils/review_store.py). L'ETag dépend de la version des agrégats et
+# des paramètres : un tableau de bord qui repasse avec If-None-Match reçoit
+# un 304 sans que la base soit interrogée.
+
+def _etag(*parts) -> str:
+    return f'W/"{content_key(*map(str, parts))[:20]}"'
+
+
+@router.get("/analytics/sentiment")
+def sentiment_analytics(
+    request: Request,
+    response: Response,
+    platform: str | None = None,
+    brand: str | None = None,
+    lang: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    period: Literal["day", "week", "month", "year", "all"] = "month",
+    group_by: str = "",
+):
+    # volume, répartition des sentiments et note moyenne par période
+    groups = tuple(g for g in group_by.split(",") if g)
+    unknown = set(groups) - set(GROUP_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"group_by parmi {', '.join(GROUP_FIELDS)} (reçu : {', '.join(sorted(unknown))})",
+        )
+
+    store = get_store()
+    etag = _etag(store.rollup_version(), platform, brand, lang, start, end, period, groups)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
     return {
-        "reply": reply_text
+        "period": period,
+        "group_by": list(groups),
+        "series": store.sentiment_stats(platform, brand, lang, start, end, period, groups),
+    }
+
+
+@router.get("/analytics/brands")
+def analytics_brands(request: Request, response: Response):
+    # couples (plateforme, marque) présents dans la base d'avis
+    store = get_store()
+    etag = _etag(store.rollup_version(), len(store))
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return [{"platform": p, "brand": b} for p, b in store.brands()]
+
+
+# Jobs de scraping : exécutés en arrière-plan par les workers de l'API
+# (AVIS_SCRAPE_WORKERS) ou par python -m src.cli.scrape_worker ; les avis
+# arrivent dans la base d'avis page par page.
+
+class ScrapeJobInput(BaseModel):
+    platform: Literal["trustpilot", "yelp"]
+    target: str                    # domaine Trustpilot ou URL de l'établissement Yelp
+    lang: str = "fr"               # Trustpilot uniquement
+    max_pages: int | None = None   # Yelp : 1 par défaut
+    brand: str | None = None       # marque dans la base d'avis (défaut : la cible)
+
+
+@router.post("/scrape/jobs", status_code=202)
+def submit_scrape_job(payload: ScrapeJobInput):
+    # même cible déjà en attente / en cours : on renvoie ce job-là
+    job, coalesced = get_jobs().submit(
+        payload.platform, payload.target, payload.lang, payload.max_pages, payload.brand
+    )
+    return {**job, "coalesced": coalesced}
+
+
+@router.get("/scrape/jobs")
+def list_scrape_jobs(
+    status: Literal["queued", "running", "done", "failed"] | None = None,
+    limit: int = 100,
+):
+    return get_jobs().list(status, limit)
+
+
+@router.get("/scrape/jobs/{job_id}")
+def get_scrape_job(job_id: str):
+    # progression : pages_done / pages_total, reviews_found
+    job = get_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job inconnu")
+    return job
+
+
+# Recherche d'avis similaires (toutes marques et plateformes, ou filtrées)
+# dans l'index de vecteurs (src/utils/embedding_index.py), rempli par
+# python -m src.cli.build_embeddings. Textes des avis : base d'avis.
+
+MAX_SIMILAR = 100
+
+
+class SimilarInput(BaseModel):
+    avis: str
+    k: int = 10
+    platform: str | None = None   # filtre sur les avis renvoyés
+    brand: str | None = None
+
+
+def _with_reviews(hits: list[dict]) -> list[dict]:
+    # complète chaque résultat avec l'avis lui-même (base d'avis)
+    keys = [(h["avis_hash"], h["platform"], h["brand"]) for h in hits]
+    columns = ["avis_hash", "platform", "brand", "Avis", "Date", "Langue", "sentiment", "stars"]
+    reviews = get_store().lookup(keys, columns).astype(object)
+    reviews = reviews.where(reviews.notna(), None)
+    by_key = {
+        (r["avis_hash"], r["platform"], r["brand"]): r
+        for r in reviews.to_dict(orient="records")
     }
+    results = []
+    for hit, key in zip(hits, keys):
+        review = by_key.get(key, {})
+        date_value = review.get("Date")
+        results.append({
+            **hit,
+            "avis": review.get("Avis"),
+            "date": date_value.date().isoformat() if date_value is not None else None,
+            "langue": review.get("Langue"),
+            "sentiment": review.get("sentiment"),
+            "stars": review.get("stars"),
+        })
+    return results
+
+
+@router.post("/search/similar")
+async def search_similar(payload: SimilarInput):
+    # avis les plus proches d'un texte libre
+    if not 1 <= payload.k <= MAX_SIMILAR:
+        raise HTTPException(status_code=422, detail=f"k entre 1 et {MAX_SIMILAR}")
+    texte = clean_text(payload.avis)
+    if not texte:
+        # vecteur nul : tous les scores vaudraient 0, résultats arbitraires
+        raise HTTPException(status_code=422, detail="avis vide")
+    vector = await asyncio.wrap_future(embedding_batcher.submit(texte))
+    hits = await asyncio.to_thread(
+        get_index().search, vector, payload.k, payload.platform, payload.brand
+    )
+    return {"results": await asyncio.to_thread(_with_reviews, hits)}
+
+
+@router.get("/reviews/{avis_hash}/similar")
+def similar_reviews(
+    avis_hash: str,
+    k: int = Query(10, ge=1, le=MAX_SIMILAR),
+    platform: str | None = None,
+    brand: str | None = None,
+):
+    # "avis comme celui-ci" : vecteur déjà indexé, aucun passage par le modèle
+    index = get_index()
+    found = index.find(avis_hash)
+    if found is None:
+        raise HTTPException(status_code=404, detail="avis absent de l'index de recherche")
+    key, vector = found
+    hits = index.search(vector, k, platform, brand, exclude=key)
+    return {"avis_hash": avis_hash, "platform": key[1], "brand": key[2], "results": _with_reviews(hits)}
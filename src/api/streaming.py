@@ -0,0 +1,187 @@
+# src/api/streaming.py
+"""
+Outils des routes en flux (/analyze/stream, /reply/stream).
+
+Entrée : NDJSON (un objet par ligne) ou un grand tableau JSON ; les deux
+sont lus au fil de l'eau, sans charger tout le corps de la requête.
+Sortie : une ligne NDJSON (ou un événement SSE si le client accepte
+text/event-stream) par avis, lot par lot.
+
+Contre-pression : la lecture de l'entrée, le calcul et l'écriture de la
+réponse avancent ensemble. Au plus STREAM_INFLIGHT lots sont en cours ;
+tant qu'un client lent n'a pas consommé les résultats, le serveur
+n'écrit plus (send attend), ne calcule plus et ne lit plus la requête :
+la mémoire reste bornée à quelques lots par connexion.
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable
+
+from starlette.responses import StreamingResponse
+
+from src.nlp.batcher import QueueFullError
+
+STREAM_BATCH = int(os.getenv("AVIS_STREAM_BATCH", "32"))         # avis par lot
+STREAM_INFLIGHT = int(os.getenv("AVIS_STREAM_INFLIGHT", "2"))    # lots en cours par connexion
+STREAM_MAX_ITEM_CHARS = 1_000_000                                # taille max d'une valeur JSON
+QUEUE_FULL_WAIT_S = 0.05                                         # file d'inférence pleine : on patiente
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = " \t\r\n,[]"
+
+
+class StreamFormatError(ValueError):
+    """Corps de requête qui n'est ni du NDJSON ni un tableau JSON."""
+
+
+async def iter_json_values(chunks: AsyncIterator[bytes]) -> AsyncIterator:
+    """
+    Valeurs JSON successives d'un flux d'octets : NDJSON, tableau JSON
+    ("[{...}, {...}]") ou simple suite d'objets. Seule la valeur en
+    cours de lecture est gardée en mémoire.
+    """
+    buffer = ""
+    pending = b""  # caractère UTF-8 coupé entre deux morceaux
+    async for chunk in chunks:
+        data = pending + chunk
+        try:
+            text = data.decode("utf-8")
+            pending = b""
+        except UnicodeDecodeError as exc:
+            text = data[:exc.start].decode("utf-8")
+            pending = data[exc.start:]
+        buffer += text
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if len(buffer) - pos > STREAM_MAX_ITEM_CHARS:
+                    raise StreamFormatError("valeur JSON invalide ou trop grande")
+                break  # valeur incomplète : on attend la suite
+            if end == len(buffer) and not isinstance(value, (dict, list, str)):
+                break  # nombre peut-être coupé en deux morceaux
+            yield value
+            pos = end
+        buffer = buffer[pos:]
+
+    rest = buffer.strip(_SEPARATORS)
+    if rest:
+        try:
+            value, end = _decoder.raw_decode(rest)
+        except json.JSONDecodeError as exc:
+            raise StreamFormatError(f"JSON invalide : {exc}") from exc
+        yield value
+        if rest[end:].strip(_SEPARATORS):
+            raise StreamFormatError("JSON invalide après la dernière valeur")
+
+
+async def iter_batches(values: AsyncIterator, size: int = STREAM_BATCH) -> AsyncIterator[list]:
+    batch = []
+    try:
+        async for value in values:
+            batch.append(value)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    except StreamFormatError:
+        # les valeurs lues avant l'erreur sont quand même traitées
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+
+async def _retry_when_full(fn: Callable[[], Awaitable]):
+    # file d'inférence pleine : le flux ralentit au lieu d'échouer
+    while True:
+        try:
+            return await fn()
+        except QueueFullError:
+            await asyncio.sleep(QUEUE_FULL_WAIT_S)
+
+
+async def stream_results(
+    values: AsyncIterator,
+    process_batch: Callable[[list], Awaitable[list[dict]]],
+    batch_size: int = STREAM_BATCH,
+    inflight: int = STREAM_INFLIGHT,
+) -> AsyncIterator[dict]:
+    """
+    Applique `process_batch` (valeurs -> un résultat par valeur) lot par lot
+    et renvoie les résultats dans l'ordre d'entrée, avec leur "index".
+    En cas d'entrée invalide, un dernier résultat {"error": ...} termine le flux.
+    """
+    tasks: deque[tuple[int, asyncio.Task]] = deque()
+    offset = 0
+    try:
+        try:
+            async for batch in iter_batches(values, batch_size):
+                task = asyncio.ensure_future(_retry_when_full(lambda b=batch: process_batch(b)))
+                tasks.append((offset, task))
+                offset += len(batch)
+                if len(tasks) < inflight:
+                    continue
+                start, task = tasks.popleft()
+                for i, result in enumerate(await task, start):
+                    yield {"index": i, **result}
+        except StreamFormatError as exc:
+            error = str(exc)
+        else:
+            error = None
+
+        while tasks:
+            start, task = tasks.popleft()
+            for i, result in enumerate(await task, start):
+                yield {"index": i, **result}
+        if error is not None:
+            yield {"index": offset, "error": error}
+    finally:
+        # client parti : les lots encore en cours sont abandonnés
+        for _, task in tasks:
+            task.cancel()
+
+
+def _ndjson(item: dict) -> str:
+    return json.dumps(item, ensure_ascii=False) + "\n"
+
+
+def _sse(item: dict) -> str:
+    return f"data: {json.dumps(item, ensure_ascii=False)}\n\n"
+
+
+class ResultStreamResponse(StreamingResponse):
+    """
+    Réponse NDJSON ou SSE (selon `accept`) à partir d'un flux de dicts.
+
+    Contrairement à StreamingResponse, on n'écoute pas la déconnexion en
+    parallèle : cette écoute consommerait le corps de la requête, que l'on
+    lit justement pendant l'envoi de la réponse. Une déconnexion est vue
+    par la lecture du corps (ClientDisconnect) ou par l'envoi.
+    """
+
+    def __init__(self, items: AsyncIterator[dict], accept: str = ""):
+        sse = "text/event-stream" in accept
+        fmt = _sse if sse else _ndjson
+
+        async def body() -> AsyncIterator[str]:
+            async for item in items:
+                yield fmt(item)
+
+        super().__init__(
+            body(),
+            media_type="text/event-stream" if sse else "application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
@@ -0,0 +1,86 @@
+# src/cli/build_embeddings.py
+"""
+Index de recherche d'avis similaires (src/utils/embedding_index.py)
+construit depuis la base d'avis.
+
+Exemple :
+    python -m src.cli.build_embeddings
+    python -m src.cli.build_embeddings --brand "Carhartt WIP" --train
+
+Incrémental : seuls les avis absents de l'index passent par le modèle,
+relancer après chaque import / scraping suffit. L'IVF est (ré)entraîné
+automatiquement quand l'index atteint AUTO_TRAIN_MIN_ROWS avis puis
+chaque fois qu'il a doublé depuis le dernier entraînement (--train pour
+forcer). `python -m src.cli.process_reviews ... --embeddings DIR` remplit
+aussi l'index, pendant la passe du modèle de sentiment.
+"""
+
+import argparse
+import time
+
+from src.nlp.sentiment import DEFAULT_BATCH_SIZE, embed_texts
+from src.utils.cleaning import clean_texts
+from src.utils.embedding_index import EMBEDDING_DIR, EmbeddingIndex, model_meta
+from src.utils.review_store import REVIEW_DB, ReviewStore
+
+# En dessous, la recherche exhaustive est assez rapide : pas d'IVF
+AUTO_TRAIN_MIN_ROWS = 50_000
+RETRAIN_GROWTH = 2.0
+
+
+def build_index(
+    store: ReviewStore,
+    index: EmbeddingIndex,
+    chunksize: int = 1000,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **filters,
+) -> int:
+    """Ajoute à `index` les avis de `store` qui n'y sont pas ; renvoie le nombre d'ajouts."""
+    added = 0
+    columns = ["avis_hash", "platform", "brand", "Avis", "Avis_clean"]
+    for chunk in store.iter_read(columns, chunksize=chunksize, **filters):
+        keys = list(zip(chunk["avis_hash"], chunk["platform"], chunk["brand"]))
+        todo = [i for i, key in enumerate(keys) if index.row_of(key) is None]
+        if not todo:
+            continue
+        chunk = chunk.iloc[todo]
+        # texte nettoyé déjà calculé par process_reviews, sinon nettoyage ici
+        raw = chunk["Avis"].fillna("").astype(str).tolist()
+        cleaned = [
+            c if isinstance(c, str) and c else r
+            for c, r in zip(chunk["Avis_clean"], clean_texts(raw, workers=1))
+        ]
+        added += index.add([keys[i] for i in todo], embed_texts(cleaned, batch_size=batch_size))
+        print(f"  {added} avis indexés")
+    return added
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Index de recherche d'avis similaires depuis la base d'avis.")
+    parser.add_argument("--db", default=REVIEW_DB, help=f"base d'avis (défaut : {REVIEW_DB})")
+    parser.add_argument("--index", default=EMBEDDING_DIR, help=f"dossier de l'index (défaut : {EMBEDDING_DIR})")
+    parser.add_argument("--platform", default=None, help="seulement cette plateforme")
+    parser.add_argument("--brand", default=None, help="seulement cette marque")
+    parser.add_argument("--chunksize", type=int, default=1000, help="avis lus par morceau")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="avis par passe du modèle")
+    parser.add_argument("--train", action="store_true", help="(ré)entraîner l'IVF quelle que soit la taille")
+    parser.add_argument("--lists", type=int, default=None, help="nombre de listes IVF (défaut : ~sqrt(n))")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    with ReviewStore(args.db) as store, EmbeddingIndex(args.index, source=model_meta()) as index:
+        added = build_index(
+            store, index, args.chunksize, args.batch_size, platform=args.platform, brand=args.brand
+        )
+        n = len(index)
+        print(f"{added} avis ajoutés en {time.perf_counter() - t0:.2f}s -> {args.index} ({n} avis)")
+
+        trained = index.trained_rows()
+        if n and (args.train or (n >= AUTO_TRAIN_MIN_ROWS and n >= RETRAIN_GROWTH * trained)):
+            t0 = time.perf_counter()
+            lists = index.train(args.lists)
+            print(f"IVF : {lists} listes entraînées en {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
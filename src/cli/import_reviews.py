@@ -0,0 +1,120 @@
+# src/cli/import_reviews.py
+"""
+Import unique des CSV existants dans la base d'avis (src/utils/review_store.py).
+
+Exemple :
+    python -m src.cli.import_reviews data/*.csv trustpilot_*.csv
+    python -m src.cli.import_reviews yelp_reviews_selenium_page1.csv \\
+        --platform Yelp --brand "Le Petit Cler"
+
+Plateforme / marque / langue : colonnes "platform", "brand", "Langue" du
+CSV si elles existent, sinon déduites du nom de fichier
+(trustpilot_{domain}_{lang}.csv, yelp_*.csv), sinon options --platform,
+--brand, --lang (qui l'emportent sur le nom de fichier). Un CSV sans
+colonne brand ni marque déductible du nom exige --brand.
+Les marques sont ramenées à une clé unique (domaine Trustpilot, URL Yelp
+ou nom -> "Carhartt WIP", cf. src/utils/brand_aliases.json) ; les marques
+déjà en base le sont aussi au lancement.
+L'import est idempotent : relancer sur les mêmes fichiers ne crée pas
+de doublons (upsert sur avis + plateforme + marque).
+"""
+
+import argparse
+import os
+import re
+import time
+
+import pandas as pd
+
+from src.utils.review_store import REVIEW_DB, ReviewStore
+
+# même nommage que les scripts test_scraper_*.py
+TRUSTPILOT_FILE_RE = re.compile(r"^trustpilot_(?P<domain>.+)_(?P<lang>[a-z]{2})\.csv$")
+
+
+def infer_source(path: str) -> dict:
+    """Plateforme / marque / langue déduites du nom de fichier (ou {})."""
+    name = os.path.basename(path).lower()
+    m = TRUSTPILOT_FILE_RE.match(name)
+    if m:
+        return {
+            "platform": "Trustpilot",
+            "brand": m.group("domain").replace("_", "."),
+            "lang": m.group("lang"),
+        }
+    if name.startswith("yelp_"):
+        return {"platform": "Yelp"}
+    return {}
+
+
+def missing_brand(path: str, brand: str | None = None) -> bool:
+    """Vrai si ni le CSV (colonne brand), ni son nom, ni `brand` ne donnent la marque."""
+    if brand or infer_source(path).get("brand"):
+        return False
+    return "brand" not in pd.read_csv(path, nrows=0).columns
+
+
+def import_csv(
+    store: ReviewStore,
+    path: str,
+    platform: str | None = None,
+    brand: str | None = None,
+    lang: str | None = None,
+    text_col: str = "Avis",
+    chunksize: int = 10_000,
+) -> int:
+    """Importe un CSV par morceaux ; renvoie le nombre de lignes écrites."""
+    source = infer_source(path)
+    platform = platform or source.get("platform")
+    brand = brand or source.get("brand")
+    lang = lang or source.get("lang")
+
+    written = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if text_col not in chunk:
+            print(f"[WARN] {path} : pas de colonne {text_col!r}, fichier ignoré")
+            return 0
+        # les colonnes du CSV priment sur le nom de fichier
+        written += store.upsert(
+            chunk,
+            platform=None if "platform" in chunk else platform,
+            brand=None if "brand" in chunk else brand,
+            lang=lang,
+            text_col=text_col,
+        )
+    return written
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Import des CSV d'avis dans la base SQLite.")
+    parser.add_argument("inputs", nargs="+", help="fichiers CSV")
+    parser.add_argument("--db", default=REVIEW_DB, help=f"base cible (défaut : {REVIEW_DB})")
+    parser.add_argument("--platform", default=None, help="plateforme si le CSV n'a pas de colonne platform")
+    parser.add_argument("--brand", default=None, help="marque si le CSV n'a pas de colonne brand")
+    parser.add_argument("--lang", default=None, help="langue si le CSV n'a pas de colonne Langue")
+    parser.add_argument("--text-col", default="Avis", help="colonne contenant l'avis")
+    args = parser.parse_args(argv)
+
+    unknown = [path for path in args.inputs if missing_brand(path, args.brand)]
+    if unknown:
+        parser.error(f"marque inconnue pour {', '.join(unknown)} : préciser --brand")
+
+    t0 = time.perf_counter()
+    with ReviewStore(args.db) as store:
+        renamed = store.normalize_brands()
+        if renamed:
+            print(f"{renamed} avis ramenés à leur marque canonique")
+        before = len(store)
+        for path in args.inputs:
+            n = import_csv(store, path, args.platform, args.brand, args.lang, args.text_col)
+            print(f"  {path} : {n} lignes")
+        after = len(store)
+
+    print(
+        f"Terminé en {time.perf_counter() - t0:.2f}s -> {args.db} "
+        f"({after} avis, dont {after - before} nouveaux)"
+    )
+
+
+if __name__ == "__main__":
+    main()
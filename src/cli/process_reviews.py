@@ -0,0 +1,399 @@
+# src/cli/process_reviews.py
+"""
+Pipeline en flux : CSV d'avis -> nettoyage -> langue -> aspects -> sentiment -> CSV / Parquet / base d'avis.
+
+Colonnes ajoutées : Avis_clean, Langue, len, aspects (séparés par "|",
+cf. src/nlp/aspects.py), sentiment, stars (note attendue), confidence,
+uncertain, avis_hash.
+
+Exemple :
+    python -m src.cli.process_reviews data/reviews_all_clean.csv \\
+        -o data/reviews_all_with_sentiment.parquet --chunksize 2000
+    python -m src.cli.process_reviews --trustpilot carhartt-wip.com \\
+        --max-pages 20 -o data/reviews.sqlite --brand "Carhartt WIP"
+
+L'entrée est un CSV, ou directement un scraper (--trustpilot DOMAINE,
+--yelp URL) : les avis sont alors traités au fil du crawl, par paquets
+de `--chunksize` avis dédoublonnés en flux (cf. src/scraper/records.py).
+
+- l'entrée est lue par morceaux (`--chunksize` lignes) : la mémoire reste
+  bornée quelle que soit la taille du fichier ou du domaine scrapé ;
+- le sentiment est calculé par lots de `--batch-size` avis ;
+- la sortie est écrite au fur et à mesure (CSV en append, dossier de
+  fichiers Parquet part-xxxxx.parquet, ou base d'avis .sqlite / .db,
+  cf. src/utils/review_store.py) ;
+- une relance sur la même entrée saute les avis déjà présents dans la
+  sortie (colonne avis_hash). Les clés ne sont pas chargées en mémoire :
+  chaque morceau interroge la base d'avis (sortie .sqlite) ou un index
+  SQLite temporaire des clés de la sortie CSV / Parquet (KeyIndex) ;
+- un avis présent plusieurs fois dans l'entrée (même texte, donc même
+  avis_hash) n'est traité et écrit qu'une fois : les copies suivantes
+  sont comptées ("doublons") dans le bilan final, pas écrites ;
+- avec `--embeddings DIR`, les vecteurs des avis (même passe du modèle
+  que le sentiment) sont ajoutés à l'index de recherche d'avis similaires
+  (cf. src/utils/embedding_index.py).
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from src.utils import metrics
+from src.utils.cache import content_key
+from src.utils.cleaning import clean_texts, detect_languages, process_pool
+from src.utils.embedding_index import EmbeddingIndex, model_meta
+from src.utils.review_store import ReviewStore, canonical_brand
+from src.nlp.aspects import extract_aspects_batch
+from src.nlp.sentiment import DEFAULT_BATCH_SIZE, analyze_sentiment_details, analyze_with_embeddings, is_uncertain
+from src.scraper.records import dedup_stream, iter_frames
+
+KEY_COLUMN = "avis_hash"
+STAGES = ("lecture", "nettoyage", "langue", "aspects", "sentiment", "écriture")
+
+
+class StageTimer:
+    """Cumule le temps et le nombre de lignes traitées par étape."""
+
+    def __init__(self, stages: Iterable[str] = STAGES):
+        self.seconds = {s: 0.0 for s in stages}
+        self.rows = {s: 0 for s in stages}
+
+    def add(self, stage: str, seconds: float, rows: int) -> None:
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.rows[stage] = self.rows.get(stage, 0) + rows
+
+    def report(self) -> str:
+        lines = []
+        for stage, secs in self.seconds.items():
+            n = self.rows[stage]
+            rate = n / secs if secs else 0.0
+            lines.append(f"  {stage:<10}: {n:>9} lignes en {secs:8.2f}s ({rate:10.1f} lignes/s)")
+        return "\n".join(lines)
+
+
+# =========================
+#   SORTIES
+# =========================
+
+class KeyIndex:
+    """
+    Ensemble de clés avis_hash dans un fichier SQLite temporaire : la
+    mémoire ne grandit pas avec la sortie, contrairement à un set().
+    """
+
+    def __init__(self):
+        fd, self._path = tempfile.mkstemp(prefix="avis_keys_", suffix=".sqlite")
+        os.close(fd)
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE keys (key TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def add(self, keys: Iterable[str]) -> None:
+        self._db.executemany("INSERT OR IGNORE INTO keys VALUES (?)", ((k,) for k in keys))
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def known(self, keys: list[str], batch: int = 500) -> set[str]:
+        """Parmi `keys`, celles déjà présentes."""
+        found = set()
+        for start in range(0, len(keys), batch):
+            part = keys[start:start + batch]
+            found.update(k for (k,) in self._db.execute(
+                f"SELECT key FROM keys WHERE key IN ({', '.join('?' * len(part))})", part
+            ))
+        return found
+
+    def close(self) -> None:
+        self._db.close()
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+
+class CsvOutput:
+    def __init__(self, path: str):
+        self.path = path
+        self._keys = KeyIndex()
+        if os.path.exists(path):
+            for chunk in pd.read_csv(path, usecols=[KEY_COLUMN], chunksize=100_000):
+                self._keys.add(chunk[KEY_COLUMN].astype(str))
+
+    def known(self, chunk: pd.DataFrame) -> pd.Series:
+        keys = chunk[KEY_COLUMN]
+        return keys.isin(self._keys.known(keys.tolist()))
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(
+            self.path,
+            mode="a",
+            header=not os.path.exists(self.path),
+            index=False,
+        )
+        self._keys.add(df[KEY_COLUMN])
+
+    def close(self) -> None:
+        self._keys.close()
+
+
+class ParquetOutput:
+    """Dossier de fichiers Parquet : un fichier part-xxxxx.parquet par morceau."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        parts = self._parts()
+        self._next_part = len(parts)
+        self._keys = KeyIndex()
+        for part in parts:
+            self._keys.add(pd.read_parquet(part, columns=[KEY_COLUMN])[KEY_COLUMN].astype(str))
+
+    def _parts(self) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def known(self, chunk: pd.DataFrame) -> pd.Series:
+        keys = chunk[KEY_COLUMN]
+        return keys.isin(self._keys.known(keys.tolist()))
+
+    def write(self, df: pd.DataFrame) -> None:
+        part = os.path.join(self.path, f"part-{self._next_part:05d}.parquet")
+        # tout en texte : même schéma pour tous les morceaux
+        df.astype("string").to_parquet(part, index=False)
+        self._next_part += 1
+        self._keys.add(df[KEY_COLUMN])
+
+    def close(self) -> None:
+        self._keys.close()
+
+
+class StoreOutput:
+    """Base d'avis SQLite : upsert de chaque morceau (plateforme / marque du CSV)."""
+
+    def __init__(self, path: str, platform: str | None = None, brand: str | None = None):
+        self.store = ReviewStore(path)
+        self.platform = platform
+        self.brand = brand
+
+    def known(self, chunk: pd.DataFrame) -> pd.Series:
+        # avis dont le sentiment est déjà calculé, sur la clé complète
+        # (avis_hash, platform, brand) : un même texte publié pour une autre
+        # marque reste à traiter (requête indexée par morceau)
+        platforms = chunk["platform"].fillna("").astype(str) if "platform" in chunk else [self.platform or ""] * len(chunk)
+        brands = chunk["brand"].fillna("").astype(str) if "brand" in chunk else [self.brand or ""] * len(chunk)
+        keys = [(h, p, canonical_brand(b)) for h, p, b in zip(chunk[KEY_COLUMN], platforms, brands)]
+        found = self.store.analyzed_keys(keys)
+        return pd.Series([k in found for k in keys], index=chunk.index)
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.store.upsert(
+            df,
+            platform=None if "platform" in df else self.platform,
+            brand=None if "brand" in df else self.brand,
+        )
+
+    def close(self) -> None:
+        self.store.close()
+
+
+def open_output(path: str, platform: str | None = None, brand: str | None = None):
+    if path.endswith(".parquet"):
+        return ParquetOutput(path)
+    if path.endswith((".sqlite", ".db")):
+        return StoreOutput(path, platform, brand)
+    return CsvOutput(path)
+
+
+# =========================
+#   TRAITEMENT
+# =========================
+
+def process_chunks(
+    chunks: Iterable[pd.DataFrame],
+    output,
+    text_col: str = "Avis",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    timer: StageTimer | None = None,
+    workers: int | None = None,
+    fast_lang: bool = False,
+    uncertain_threshold: float | None = None,
+    index: EmbeddingIndex | None = None,
+    platform: str | None = None,
+    brand: str | None = None,
+) -> int:
+    """
+    Traite un flux de DataFrames (morceaux de CSV, pages d'un scraper...)
+    et écrit chaque morceau enrichi dans `output`. Renvoie le nombre
+    de lignes écrites. Les avis déjà présents dans `output` et les copies
+    d'un même avis (même avis_hash) sont sautés. La colonne `uncertain`
+    signale les avis dont la confiance est sous `uncertain_threshold`. Avec `index`, les vecteurs
+    des avis y sont ajoutés, sous la clé (avis_hash, platform, brand) ;
+    `platform` / `brand` servent si le morceau n'a pas ces colonnes.
+    """
+    timer = timer or StageTimer()
+    skipped = duplicates = 0
+
+    # un seul pool de processus pour tous les morceaux (None : un processus)
+    pool = process_pool(workers)
+    try:
+        written = 0
+        chunk_iter: Iterator[pd.DataFrame] = iter(chunks)
+
+        while True:
+            t0 = time.perf_counter()
+            try:
+                chunk = next(chunk_iter)
+            except StopIteration:
+                break
+            texts = chunk[text_col].fillna("").astype(str)
+            keys = texts.map(content_key)
+            chunk = chunk.assign(**{KEY_COLUMN: keys})
+
+            # avis déjà dans la sortie (relance, morceau précédent) : une requête
+            # par morceau, rien n'est gardé en mémoire d'un morceau à l'autre
+            fresh = chunk[~output.known(chunk)]
+            skipped += len(chunk) - len(fresh)
+            # copies d'un même avis dans le morceau : seule la première est traitée
+            chunk = fresh.drop_duplicates(subset=[KEY_COLUMN])
+            duplicates += len(fresh) - len(chunk)
+            timer.add("lecture", time.perf_counter() - t0, len(chunk))
+            if chunk.empty:
+                continue
+
+            t0 = time.perf_counter()
+            cleaned = pd.Series(
+                clean_texts(chunk[text_col].fillna("").astype(str).tolist(), workers=workers, pool=pool),
+                index=chunk.index,
+            )
+            timer.add("nettoyage", time.perf_counter() - t0, len(chunk))
+
+            t0 = time.perf_counter()
+            langues = detect_languages(cleaned.tolist(), workers=workers, fast_short=fast_lang, pool=pool)
+            timer.add("langue", time.perf_counter() - t0, len(chunk))
+
+            t0 = time.perf_counter()
+            aspects = extract_aspects_batch(cleaned.tolist())
+            timer.add("aspects", time.perf_counter() - t0, len(chunk))
+
+            t0 = time.perf_counter()
+            if index is None:
+                details = analyze_sentiment_details(cleaned.tolist(), batch_size=batch_size)
+            else:
+                details, vectors = analyze_with_embeddings(cleaned.tolist(), batch_size=batch_size)
+                index.add(
+                    list(zip(
+                        chunk[KEY_COLUMN],
+                        chunk["platform"] if "platform" in chunk else [platform or ""] * len(chunk),
+                        chunk["brand"] if "brand" in chunk else [brand or ""] * len(chunk),
+                    )),
+                    vectors,
+                )
+            timer.add("sentiment", time.perf_counter() - t0, len(chunk))
+
+            t0 = time.perf_counter()
+            out = chunk.assign(
+                Avis_clean=cleaned,
+                Langue=langues,
+                len=cleaned.str.len(),
+                aspects=["|".join(a) for a in aspects],
+                sentiment=[d["sentiment"] for d in details],
+                stars=[d["stars"] for d in details],
+                confidence=[d["confidence"] for d in details],
+                uncertain=[is_uncertain(d, uncertain_threshold) for d in details],
+            )
+            output.write(out)
+            timer.add("écriture", time.perf_counter() - t0, len(out))
+
+            written += len(out)
+            print(f"  {written} lignes écrites")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if skipped or duplicates:
+        print(f"{skipped} avis déjà présents dans la sortie et {duplicates} doublons sautés")
+    return written
+
+
+def open_input(args) -> tuple[Iterable[pd.DataFrame], str]:
+    """Morceaux d'entrée (CSV ou scraper en flux) et libellé de la source."""
+    if args.trustpilot:
+        from src.scraper.trustpilot_scraper import iter_trustpilot_reviews
+
+        reviews = iter_trustpilot_reviews(args.trustpilot, lang=args.lang, max_pages=args.max_pages)
+        label = f"Trustpilot {args.trustpilot}"
+    elif args.yelp:
+        # import tardif : selenium n'est nécessaire que pour Yelp
+        from src.scraper.yelp_selenium_scraper import iter_yelp_reviews
+
+        reviews = iter_yelp_reviews(args.yelp, max_pages=args.max_pages or 1)
+        label = f"Yelp {args.yelp}"
+    else:
+        return pd.read_csv(args.input, chunksize=args.chunksize), args.input
+
+    return iter_frames(dedup_stream(reviews), chunk_size=args.chunksize, brand=args.brand), label
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Nettoyage + langue + aspects + sentiment en flux, vers CSV, Parquet ou base d'avis."
+    )
+    parser.add_argument("input", nargs="?", help="CSV d'entrée")
+    parser.add_argument("--trustpilot", default=None, metavar="DOMAINE", help="scraper ce domaine Trustpilot au lieu de lire un CSV")
+    parser.add_argument("--yelp", default=None, metavar="URL", help="scraper cet établissement Yelp au lieu de lire un CSV")
+    parser.add_argument("--lang", default="fr", help="langue des avis Trustpilot")
+    parser.add_argument("--max-pages", type=int, default=None, help="pages scrapées au plus (Yelp : 1 par défaut)")
+    parser.add_argument("-o", "--output", required=True, help="sortie .csv, .parquet (dossier) ou .sqlite (base d'avis)")
+    parser.add_argument("--text-col", default="Avis", help="colonne contenant l'avis")
+    parser.add_argument("--chunksize", type=int, default=1000, help="lignes lues par morceau")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="avis par passe du modèle")
+    parser.add_argument("--workers", type=int, default=None, help="processus pour nettoyage / langue (défaut : tous les cœurs)")
+    parser.add_argument("--fast-lang", action="store_true", help="heuristique rapide pour les avis courts")
+    parser.add_argument("--uncertain-threshold", type=float, default=None, help="confiance sous laquelle un avis est marqué uncertain")
+    parser.add_argument("--platform", default=None, help="plateforme (sortie .sqlite, si le CSV n'a pas de colonne platform)")
+    parser.add_argument("--brand", default=None, help="marque (sortie .sqlite, si le CSV n'a pas de colonne brand)")
+    parser.add_argument("--embeddings", default=None, metavar="DIR", help="index de recherche d'avis similaires à compléter")
+    args = parser.parse_args(argv)
+    if sum(bool(x) for x in (args.input, args.trustpilot, args.yelp)) != 1:
+        parser.error("une seule entrée : un CSV, --trustpilot ou --yelp")
+
+    timer = StageTimer()
+    t0 = time.perf_counter()
+
+    chunks, label = open_input(args)
+    index = EmbeddingIndex(args.embeddings, source=model_meta()) if args.embeddings else None
+    # détail par étape (tokenisation, forward du modèle...) affiché à la fin
+    output = open_output(args.output, args.platform, args.brand)
+    try:
+        with metrics.run(f"traitement de {label}"):
+            written = process_chunks(
+                chunks,
+                output,
+                text_col=args.text_col,
+                batch_size=args.batch_size,
+                timer=timer,
+                workers=args.workers,
+                fast_lang=args.fast_lang,
+                uncertain_threshold=args.uncertain_threshold,
+                index=index,
+                platform=args.platform,
+                brand=args.brand,
+            )
+    finally:
+        output.close()
+    if index is not None:
+        print(f"Index de recherche : {len(index)} avis -> {args.embeddings}")
+
+    total = time.perf_counter() - t0
+    print(f"Terminé : {written} lignes en {total:.2f}s -> {args.output}")
+    print(timer.report())
+
+
+if __name__ == "__main__":
+    main()
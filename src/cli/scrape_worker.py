@@ -0,0 +1,46 @@
+# src/cli/scrape_worker.py
+"""
+Worker de scraping autonome : exécute les jobs déposés par l'API
+(POST /scrape/jobs) dans la table AVIS_JOBS_DB, cf. src/scraper/jobs.py.
+
+Exemple :
+    python -m src.cli.scrape_worker              # tourne jusqu'à Ctrl+C
+    python -m src.cli.scrape_worker --threads 2
+    python -m src.cli.scrape_worker --once       # vide la file puis s'arrête
+
+Plusieurs workers (processus de la même machine) peuvent tourner en
+même temps : la réclamation des jobs est atomique et la
+limite par domaine vaut pour tous.
+"""
+
+import argparse
+import threading
+
+from src.scraper.jobs import JOBS_DB, JobStore, WorkerPool, work
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Exécute les jobs de scraping en attente.")
+    parser.add_argument("--db", default=JOBS_DB, help=f"table des jobs (défaut : {JOBS_DB})")
+    parser.add_argument("--threads", type=int, default=1, help="jobs exécutés en parallèle par ce processus")
+    parser.add_argument("--once", action="store_true", help="s'arrête quand la file est vide")
+    args = parser.parse_args(argv)
+
+    jobs = JobStore(args.db)
+    if args.once:
+        done = work(jobs, once=True)
+        print(f"Terminé : {done} job(s) traité(s)")
+        return
+
+    pool = WorkerPool(jobs, size=args.threads)
+    pool.start()
+    print(f"Worker démarré ({args.threads} thread(s)) sur {args.db}, Ctrl+C pour arrêter")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("Arrêt : les jobs en cours repartent en attente après leur page")
+        pool.stop(timeout=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# src/nlp/aspects.py
+"""
+Aspects abordés par un avis (livraison, service, taille, frais, prix...).
+
+Le lexique (aspect_lexicon.json) associe à chaque aspect une liste de
+mots-clés et d'expressions, toutes langues confondues :
+
+    {"aspects": {"livraison": ["livraison*", "colis", "delivery", ...], ...}}
+
+Un "*" final accepte toutes les terminaisons ("livraison*" -> livraisons).
+Casse et accents sont ignorés ("Qualité" = "qualite").
+
+Tous les mots-clés sont compilés en UNE regex, factorisée en arbre de
+préfixes : le texte n'est parcouru qu'une fois, quel que soit le nombre
+de mots-clés, comme avec un automate Aho-Corasick. Le mot reconnu donne
+son aspect par un dictionnaire (mot-clé exact, sinon plus long préfixe
+"*"). Sur un lot, les textes sont repliés puis concaténés et la regex
+passe une seule fois sur l'ensemble (extract_aspects_batch).
+
+Un avis reçoit la liste de ses aspects, du plus cité au moins cité
+(à égalité : ordre d'apparition). Le premier est l'aspect principal,
+mentionné dans la réponse (cf. generate_reply(..., aspects=...)).
+"""
+
+import json
+import os
+import re
+import unicodedata
+from typing import Iterable
+
+from src.utils import metrics
+from src.utils.cache import content_key
+
+LEXICON_PATH = os.getenv(
+    "AVIS_ASPECT_LEXICON",
+    os.path.join(os.path.dirname(__file__), "aspect_lexicon.json"),
+)
+
+COMBINING_RE = re.compile("[\u0300-\u036f]")  # accents isolés par NFKD
+PREFIX_MARK = "*"
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ("Qualité" -> "qualite") pour la recherche."""
+    return COMBINING_RE.sub("", unicodedata.normalize("NFKD", text.casefold()))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    # arbre de préfixes -> regex : ["colis", "commande"] -> co(?:lis|mmande)
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}  # fin de mot
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: dict) -> str:
+    alts = [
+        (r"\w*" if ch == PREFIX_MARK else re.escape(ch)) + _node_pattern(child)
+        for ch, child in sorted(node.items())
+        if ch
+    ]
+    if not alts:
+        return ""
+    if "" in node:
+        # un mot se termine ici mais d'autres continuent : on tente d'abord le plus long
+        return f"(?:{'|'.join(alts)})?"
+    return alts[0] if len(alts) == 1 else f"(?:{'|'.join(alts)})"
+
+
+class AspectExtractor:
+    """Lexique compilé : une regex pour trouver les mots-clés, des dictionnaires pour leur aspect."""
+
+    def __init__(self, lexicon: dict):
+        self._exact: dict[str, str] = {}     # mot-clé -> aspect
+        self._prefixes: dict[str, str] = {}  # préfixe ("livraison" pour "livraison*") -> aspect
+        for aspect, words in lexicon["aspects"].items():
+            for word in words:
+                word = fold(word.strip())
+                if PREFIX_MARK in word[:-1]:
+                    raise ValueError(f"'*' uniquement en fin de mot-clé : {word!r}")
+                if word.endswith(PREFIX_MARK):
+                    table, key = self._prefixes, word[:-1]
+                else:
+                    table, key = self._exact, word
+                if key in table:
+                    print(f"[WARN] mot-clé '{word}' déjà associé à '{table[key]}', ignoré pour '{aspect}'")
+                    continue
+                table[key] = aspect
+
+        self.aspects = tuple(lexicon["aspects"])
+        # empreinte du lexique : fait partie de la clé du cache de résultats
+        self.version = content_key(json.dumps(lexicon, sort_keys=True))[:16]
+        words = [*self._exact, *(p + PREFIX_MARK for p in self._prefixes)]
+        if not words:
+            raise ValueError("lexique d'aspects vide")
+        self._regex = re.compile(rf"\b{_trie_pattern(words)}\b")
+
+    def _aspect(self, word: str) -> str:
+        aspect = self._exact.get(word)
+        if aspect is None:
+            # "livraisons" -> préfixe "livraison" : le plus long préfixe déclaré l'emporte
+            for end in range(len(word), 0, -1):
+                aspect = self._prefixes.get(word[:end])
+                if aspect is not None:
+                    break
+        return aspect
+
+    @classmethod
+    def from_file(cls, path: str = LEXICON_PATH) -> "AspectExtractor":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def extract(self, text: str) -> list[str]:
+        return self.extract_many([text])[0]
+
+    def extract_many(self, texts: Iterable[str]) -> list[list[str]]:
+        """Aspects de chaque texte, en un seul passage de la regex sur tout le lot."""
+        folded = [fold(t) if isinstance(t, str) else "" for t in texts]
+        # "\n" ne fait partie d'aucun mot-clé : pas de correspondance à cheval sur deux avis
+        joined = "\n".join(folded)
+
+        counts: list[dict[str, int]] = [{} for _ in folded]
+        doc, end = 0, len(folded[0]) if folded else 0
+        for m in self._regex.finditer(joined):
+            while m.start() > end:
+                doc += 1
+                end += 1 + len(folded[doc])
+            found = counts[doc]
+            aspect = self._aspect(m.group())
+            found[aspect] = found.get(aspect, 0) + 1
+
+        # du plus cité au moins cité, ordre d'apparition à égalité (tri stable)
+        return [sorted(found, key=found.get, reverse=True) for found in counts]
+
+
+_extractor: AspectExtractor | None = None
+
+
+def get_extractor() -> AspectExtractor:
+    """Lexique compilé au premier appel puis partagé."""
+    global _extractor
+    if _extractor is None:
+        _extractor = AspectExtractor.from_file()
+    return _extractor
+
+
+def extract_aspects(text: str) -> list[str]:
+    """Aspects d'un avis, du plus cité au moins cité (ex. ["livraison", "service"])."""
+    with metrics.stage("aspects"):
+        return get_extractor().extract(text)
+
+
+def extract_aspects_batch(texts: list[str]) -> list[list[str]]:
+    """Version groupée de extract_aspects (un seul passage sur tout le lot)."""
+    texts = list(texts)
+    with metrics.stage("aspects", items=len(texts)):
+        return get_extractor().extract_many(texts)
@@ -0,0 +1,208 @@
+# src/nlp/backends.py
+
+import hashlib
+import os
+
+import numpy as np
+
+# Backends d'inférence disponibles pour le modèle de sentiment :
+#   - "torch"      : modèle PyTorch fp32 (référence)
+#   - "torch-int8" : quantification dynamique int8 des couches Linear (CPU)
+#   - "onnx"       : modèle exporté en ONNX et exécuté par onnxruntime
+BACKENDS = ("torch", "torch-int8", "onnx")
+SENTIMENT_BACKEND = os.getenv("AVIS_SENTIMENT_BACKEND", "torch")
+ONNX_DIR = os.getenv("AVIS_ONNX_DIR", "models/onnx")
+
+MAX_LENGTH = 256
+
+
+def weights_fingerprint(model) -> str:
+    """
+    Empreinte des poids du modèle : le commit du Hub quand transformers le
+    connaît (révision résolue), sinon un sha256 des tenseurs (dossier local).
+    """
+    commit = getattr(model.config, "_commit_hash", None)
+    if commit:
+        return commit[:12]
+    h = hashlib.sha256()
+    for name, tensor in model.state_dict().items():
+        h.update(name.encode())
+        h.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+    return h.hexdigest()[:12]
+
+
+class TorchBackend:
+    """Inférence PyTorch : renvoie les probabilités des 5 classes (1..5 étoiles)."""
+
+    name = "torch"
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+
+    def _tokenize(self, texts: list[str], return_tensors: str):
+        return self.tokenizer(
+            texts,
+            return_tensors=return_tensors,
+            truncation=True,
+            padding=True,
+            max_length=MAX_LENGTH,
+        )
+
+    @property
+    def max_tokens(self) -> int:
+        """Nombre max de tokens de texte par séquence (hors [CLS] / [SEP])."""
+        return MAX_LENGTH - self.tokenizer.num_special_tokens_to_add()
+
+    def encode(self, texts: list[str]) -> list[list[int]]:
+        """Tokenise sans tronquer ni ajouter les tokens spéciaux."""
+        return self.tokenizer(
+            texts, add_special_tokens=False, truncation=False, verbose=False
+        )["input_ids"]
+
+    def _pad(self, ids_list: list[list[int]]) -> dict[str, np.ndarray]:
+        # padding à la plus longue séquence du lot seulement
+        seqs = [self.tokenizer.build_inputs_with_special_tokens(ids) for ids in ids_list]
+        width = max(len(seq) for seq in seqs)
+
+        input_ids = np.full((len(seqs), width), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(seqs), width), dtype=np.int64)
+        for row, seq in enumerate(seqs):
+            input_ids[row, :len(seq)] = seq
+            attention_mask[row, :len(seq)] = 1
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.tokenizer.model_input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+        return inputs
+
+    def _logits(self, inputs: dict[str, np.ndarray]) -> np.ndarray:
+        return self._forward(inputs, pooled=False)[0]
+
+    def _forward(self, inputs: dict[str, np.ndarray], pooled: bool) -> tuple[np.ndarray, np.ndarray | None]:
+        """Logits et, avec `pooled`, moyenne des états cachés de la dernière couche."""
+        import torch
+
+        with torch.no_grad():
+            tensors = {name: torch.from_numpy(arr) for name, arr in inputs.items()}
+            out = self.model(**tensors, output_hidden_states=pooled)
+        if not pooled:
+            return out.logits.numpy(), None
+        # moyenne sur les vrais tokens (masque d'attention), pas sur le padding
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        hidden = out.hidden_states[-1].numpy()
+        return out.logits.numpy(), (hidden * mask).sum(axis=1) / mask.sum(axis=1)
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        # softmax numériquement stable
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict_proba_ids(self, ids_list: list[list[int]]) -> np.ndarray:
+        """
+        Probabilités des 5 classes pour des séquences déjà tokenisées
+        (sans tokens spéciaux, au plus `max_tokens` chacune).
+        """
+        return self._softmax(self._logits(self._pad(ids_list)))
+
+    def predict_proba_embed_ids(self, ids_list: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Comme predict_proba_ids, plus un vecteur par séquence (états cachés
+        moyennés) issu de la même passe du modèle.
+        """
+        logits, pooled = self._forward(self._pad(ids_list), pooled=True)
+        return self._softmax(logits), pooled
+
+    def predict_proba(self, texts: list[str]) -> np.ndarray:
+        """Probabilités des 5 classes, textes tronqués à `max_tokens`."""
+        return self.predict_proba_ids([ids[:self.max_tokens] for ids in self.encode(texts)])
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """Même modèle, couches Linear quantifiées en int8 (poids) à la volée."""
+
+    name = "torch-int8"
+
+    def __init__(self, tokenizer, model):
+        import torch
+
+        quantized = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        super().__init__(tokenizer, quantized)
+
+
+class OnnxBackend(TorchBackend):
+    """
+    Modèle exporté une fois en ONNX (dans ONNX_DIR) puis exécuté par
+    onnxruntime sur CPU. L'export est réutilisé aux lancements suivants
+    tant que les poids sont les mêmes (empreinte dans le nom du fichier :
+    une nouvelle révision du modèle donne un nouvel export).
+    """
+
+    name = "onnx"
+
+    def __init__(self, tokenizer, model, model_name: str):
+        try:
+            import onnxruntime as ort
+        except ImportError as exc:
+            raise ImportError("le backend 'onnx' nécessite le paquet onnxruntime") from exc
+
+        super().__init__(tokenizer, model)
+        path = os.path.join(
+            ONNX_DIR, f"{model_name.replace('/', '__')}-{weights_fingerprint(model)}.onnx"
+        )
+        if not os.path.exists(path):
+            self._export(path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _export(self, path: str) -> None:
+        import torch
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        sample = self._tokenize(["export onnx"], "pt")
+        # ordre des arguments positionnels de forward() pour les modèles BERT
+        names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+        axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        axes["logits"] = {0: "batch"}
+
+        print(f"[MODEL] export ONNX -> {path}")
+        torch.onnx.export(
+            self.model,
+            tuple(sample[name] for name in names),
+            path,
+            input_names=names,
+            output_names=["logits"],
+            dynamic_axes=axes,
+            opset_version=17,
+            dynamo=False,
+        )
+
+    def _logits(self, inputs: dict[str, np.ndarray]) -> np.ndarray:
+        feeds = {name: inputs[name] for name in self.input_names}
+        return self.session.run(["logits"], feeds)[0]
+
+    def _forward(self, inputs: dict[str, np.ndarray], pooled: bool) -> tuple[np.ndarray, np.ndarray | None]:
+        if not pooled:
+            return self._logits(inputs), None
+        # l'export ONNX ne sort que les logits : les vecteurs passent par torch
+        return super()._forward(inputs, pooled=True)
+
+
+def make_backend(name: str, tokenizer, model, model_name: str):
+    """Construit le backend `name` autour du couple (tokenizer, modèle fp32)."""
+    if name == "torch":
+        return TorchBackend(tokenizer, model)
+    if name == "torch-int8":
+        return QuantizedTorchBackend(tokenizer, model)
+    if name == "onnx":
+        return OnnxBackend(tokenizer, model, model_name)
+    raise ValueError(f"backend inconnu : {name} (attendu : {', '.join(BACKENDS)})")
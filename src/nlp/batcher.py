@@ -0,0 +1,147 @@
+# src/nlp/batcher.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from src.nlp.sentiment import analyze_sentiment_details, embed_texts
+
+# Réglages par défaut (surchargeables par variables d'environnement)
+BATCH_MAX_SIZE = int(os.getenv("AVIS_BATCH_MAX_SIZE", "16"))
+BATCH_MAX_WAIT_MS = float(os.getenv("AVIS_BATCH_MAX_WAIT_MS", "10"))
+# Nombre max d'avis en attente d'inférence (au-delà : refus immédiat)
+INFERENCE_QUEUE_MAX = int(os.getenv("AVIS_INFERENCE_QUEUE_MAX", "1024"))
+
+
+class QueueFullError(RuntimeError):
+    """La file d'inférence est pleine : l'appelant doit réessayer plus tard."""
+
+
+class MicroBatcher:
+    """
+    Regroupe les appels unitaires concurrents en un seul appel groupé.
+
+    Chaque appelant soumet un élément et reçoit un Future. Un thread de fond
+    attend le premier élément, puis collecte les suivants pendant au plus
+    `max_wait_ms` millisecondes (ou jusqu'à `max_batch_size` éléments),
+    appelle `batch_fn(items)` une seule fois et renvoie à chaque appelant
+    son propre résultat.
+
+    Ce thread est aussi l'unique exécuteur d'inférence du processus : la
+    file est bornée à `max_queue` éléments et submit() lève QueueFullError
+    au lieu de laisser les requêtes s'empiler.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[Any]], list[Any]],
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        max_queue: int = INFERENCE_QUEUE_MAX,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue = max_queue
+
+        self._queue: queue.Queue[tuple[Any, Future]] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # producteurs : submit et submit_many ne se croisent pas entre le
+        # contrôle de place et les put (le thread de fond ne fait que vider)
+        self._submit_lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        # Démarrage paresseux : pas de thread tant que personne n'appelle
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="micro-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """Ajoute un élément au prochain lot et renvoie son Future."""
+        self._ensure_started()
+        fut: Future = Future()
+        with self._submit_lock:
+            try:
+                self._queue.put_nowait((item, fut))
+            except queue.Full:
+                raise QueueFullError(f"file d'inférence pleine ({self.max_queue})") from None
+        return fut
+
+    def submit_many(self, items: list[Any]) -> list[Future]:
+        """
+        Soumet plusieurs éléments d'un coup : tout passe ou rien
+        (QueueFullError si la file n'a pas la place pour tous).
+        """
+        self._ensure_started()
+        with self._submit_lock:
+            if self.max_queue > 0 and self._queue.qsize() + len(items) > self.max_queue:
+                raise QueueFullError(f"file d'inférence pleine ({self.max_queue})")
+            futures = []
+            for item in items:
+                fut: Future = Future()
+                try:
+                    # jamais bloquant : appelé depuis la boucle asyncio
+                    self._queue.put_nowait((item, fut))
+                except queue.Full:
+                    raise QueueFullError(f"file d'inférence pleine ({self.max_queue})") from None
+                futures.append(fut)
+        return futures
+
+    def pending(self) -> int:
+        """Nombre d'éléments en attente d'inférence."""
+        return self._queue.qsize()
+
+    def __call__(self, item: Any) -> Any:
+        """Version bloquante de submit()."""
+        return self.submit(item).result()
+
+    def _collect(self) -> list[tuple[Any, Future]]:
+        # On bloque jusqu'au premier élément, puis on remplit le lot
+        # jusqu'à la taille max ou l'expiration de la fenêtre.
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+
+            try:
+                results = self.batch_fn(items)
+            except Exception as exc:
+                for _, fut in batch:
+                    fut.set_exception(exc)
+                continue
+
+            for (_, fut), res in zip(batch, results):
+                fut.set_result(res)
+
+
+# Instance partagée par les routes /analyze et /reply
+# (chaque Future renvoie le dict de analyze_sentiment_details)
+sentiment_batcher = MicroBatcher(analyze_sentiment_details)
+
+# Vecteurs des textes de /search/similar (chaque Future renvoie un vecteur) ;
+# même modèle que ci-dessus, dans son propre thread
+embedding_batcher = MicroBatcher(lambda texts: list(embed_texts(texts)))
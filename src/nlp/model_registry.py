@@ -0,0 +1,123 @@
+# src/nlp/model_registry.py
+
+import os
+import threading
+import time
+
+from src.nlp.backends import SENTIMENT_BACKEND, make_backend
+
+# Modèle multilingue open-source (fr + en), surchargeable pour les tests
+MODEL_NAME = os.getenv(
+    "AVIS_SENTIMENT_MODEL", "nlptown/bert-base-multilingual-uncased-sentiment"
+)
+# Révision (branche, tag ou commit) du dépôt Hugging Face
+MODEL_REVISION = os.getenv("AVIS_SENTIMENT_MODEL_REVISION", "main")
+# Threads intra-op de torch par worker (vide = choix de torch)
+TORCH_THREADS = os.getenv("AVIS_TORCH_THREADS", "")
+
+
+class ModelRegistry:
+    """
+    Charge les couples (tokenizer, modèle) à la demande et les partage.
+
+    - rien n'est chargé à l'import : torch / transformers ne sont importés
+      qu'au premier get() ou warmup() ;
+    - une seule instance par nom de modèle et par processus (verrou) ;
+    - les poids sont lus en safetensors quand le dépôt en fournit, ce qui
+      les mappe en mémoire au lieu de les copier ;
+    - si le modèle est chargé avant un fork (ex : `gunicorn --preload` avec
+      AVIS_PRELOAD_MODEL=1), les workers partagent les pages en copy-on-write.
+    """
+
+    def __init__(self):
+        self._models: dict[str, tuple] = {}
+        self._backends: dict[tuple[str, str], object] = {}
+        self._timings: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name: str) -> tuple:
+        t0 = time.perf_counter()
+
+        import torch  # import lourd, volontairement tardif
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        if TORCH_THREADS:
+            # évite que torch prenne tous les cœurs face aux autres workers
+            torch.set_num_threads(int(TORCH_THREADS))
+
+        tokenizer = AutoTokenizer.from_pretrained(name, revision=MODEL_REVISION)
+        model = AutoModelForSequenceClassification.from_pretrained(
+            name, revision=MODEL_REVISION
+        )
+        model.eval()
+
+        load_s = time.perf_counter() - t0
+        self._timings.setdefault(name, {})["cold_start_s"] = round(load_s, 4)
+        print(f"[MODEL] {name} chargé en {load_s:.2f}s")
+        return tokenizer, model
+
+    def get(self, name: str = MODEL_NAME) -> tuple:
+        """Renvoie (tokenizer, modèle), en le chargeant si besoin."""
+        loaded = self._models.get(name)
+        if loaded is not None:
+            return loaded
+
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def get_backend(self, backend: str = SENTIMENT_BACKEND, name: str = MODEL_NAME):
+        """
+        Renvoie le backend d'inférence `backend` (torch, torch-int8, onnx)
+        construit autour du modèle `name`, une seule fois par processus.
+        """
+        key = (name, backend)
+        loaded = self._backends.get(key)
+        if loaded is not None:
+            return loaded
+
+        tokenizer, model = self.get(name)
+        with self._lock:
+            if key not in self._backends:
+                t0 = time.perf_counter()
+                self._backends[key] = make_backend(backend, tokenizer, model, name)
+                if backend != "torch":
+                    build_s = time.perf_counter() - t0
+                    self._timings.setdefault(name, {})[f"{backend}_build_s"] = round(build_s, 4)
+                    print(f"[MODEL] backend {backend} prêt en {build_s:.2f}s")
+            return self._backends[key]
+
+    def warmup(self, name: str = MODEL_NAME, backend: str = SENTIMENT_BACKEND) -> dict[str, float]:
+        """
+        Charge le modèle et fait une première inférence à blanc
+        (allocations, caches des noyaux) pour que la première vraie
+        requête ne paie pas ce coût.
+        """
+        sentiment_backend = self.get_backend(backend, name)
+
+        t0 = time.perf_counter()
+        sentiment_backend.predict_proba(["warm-up"])
+        warmup_s = time.perf_counter() - t0
+
+        self._timings.setdefault(name, {})["warmup_s"] = round(warmup_s, 4)
+        print(f"[MODEL] {name} warm-up en {warmup_s:.2f}s")
+        return self._timings[name]
+
+    def is_loaded(self, name: str = MODEL_NAME) -> bool:
+        return name in self._models
+
+    def stats(self) -> dict:
+        """Etat des modèles et temps de chargement / warm-up (en secondes)."""
+        return {
+            name: {
+                "loaded": name in self._models,
+                "backends": sorted(b for n, b in self._backends if n == name),
+                **timings,
+            }
+            for name, timings in self._timings.items()
+        }
+
+
+# Registre partagé par tout le processus
+registry = ModelRegistry()
@@ -0,0 +1,144 @@
+# src/nlp/pipeline.py
+
+import asyncio
+import os
+import time
+
+from src.utils import metrics
+from src.utils.cache import ResultCache, content_key
+from src.utils.cleaning import clean_text, clean_texts, detect_language, detect_languages
+from src.nlp.aspects import extract_aspects, extract_aspects_batch, get_extractor
+from src.nlp.backends import SENTIMENT_BACKEND
+from src.nlp.model_registry import MODEL_NAME, MODEL_REVISION
+from src.nlp.sentiment import analyze_sentiment_details
+from src.nlp.batcher import sentiment_batcher
+
+# Cache partagé clean -> detect -> aspects -> sentiment
+# AVIS_CACHE_DB : chemin SQLite pour le niveau disque (désactivé si vide),
+# AVIS_CACHE_DB_ROWS : nombre maximal d'entrées sur disque
+result_cache = ResultCache(
+    max_size=int(os.getenv("AVIS_CACHE_SIZE", "10000")),
+    ttl_s=float(os.getenv("AVIS_CACHE_TTL_S", str(24 * 3600))),
+    db_path=os.getenv("AVIS_CACHE_DB") or None,
+    max_disk_rows=int(os.getenv("AVIS_CACHE_DB_ROWS", "100000")),
+)
+# Version du format des résultats : à incrémenter quand les champs changent
+# (les entrées disque de l'ancien format ne sont alors plus relues)
+RESULT_VERSION = "3"
+
+
+def _key(avis: str) -> str:
+    # le modèle, sa révision, le backend et le lexique d'aspects font partie
+    # de la clé : changer de modèle invalide naturellement les anciens résultats
+    return content_key(
+        avis, MODEL_NAME, MODEL_REVISION, SENTIMENT_BACKEND, get_extractor().version, RESULT_VERSION
+    )
+
+
+def analyze_text(avis: str) -> dict:
+    """
+    Nettoie, détecte la langue, repère les aspects et calcule le sentiment
+    d'un avis. Renvoie {"avis_clean", "langue", "aspects", "sentiment",
+    "stars_proba", "stars", "confidence"}, depuis le cache si possible.
+    """
+    key = _key(avis)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    t0 = time.perf_counter()
+    avis_clean, langue = _clean_and_detect(avis)
+    result = {
+        "avis_clean": avis_clean,
+        "langue": langue,
+        "aspects": extract_aspects(avis_clean),
+        # les appels concurrents sont regroupés en un seul passage du modèle
+        **sentiment_batcher(avis_clean),
+    }
+    result_cache.set(key, result, compute_s=time.perf_counter() - t0)
+    return result
+
+
+def analyze_texts(avis_list: list[str]) -> list[dict]:
+    """
+    Version groupée de analyze_text : seuls les avis absents du cache
+    passent par le nettoyage et le modèle (en un seul appel groupé).
+    """
+    keys = [_key(a) for a in avis_list]
+    results: list[dict | None] = result_cache.get_many(keys)
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if not missing:
+        return results
+
+    t0 = time.perf_counter()
+    # workers=1 : pas de pool de processus dans le chemin d'une requête API
+    cleaned = clean_texts([avis_list[i] for i in missing], workers=1)
+    langues = detect_languages(cleaned, workers=1)
+    aspects = extract_aspects_batch(cleaned)
+    sentiments = analyze_sentiment_details(cleaned)
+    per_item_s = (time.perf_counter() - t0) / len(missing)
+
+    for i, avis_clean, langue, found, sentiment in zip(missing, cleaned, langues, aspects, sentiments):
+        results[i] = {"avis_clean": avis_clean, "langue": langue, "aspects": found, **sentiment}
+    # une seule écriture (et un seul commit disque) pour tout le lot
+    result_cache.set_many([(keys[i], results[i]) for i in missing], compute_s=per_item_s)
+
+    return results
+
+
+def _clean_and_detect(avis: str) -> tuple[str, str]:
+    with metrics.stage("clean_text"):
+        avis_clean = clean_text(avis)
+    with metrics.stage("detect_language"):
+        return avis_clean, detect_language(avis_clean)
+
+
+async def analyze_text_async(avis: str) -> dict:
+    """
+    Version asynchrone de analyze_text pour les routes async :
+    le modèle tourne dans l'exécuteur d'inférence (sentiment_batcher),
+    jamais dans la boucle d'événements ni dans le threadpool de Starlette.
+    Le cache (niveau disque SQLite) est lu et écrit dans un thread.
+    Lève QueueFullError si la file d'inférence est pleine.
+    """
+    key = _key(avis)
+    cached = await asyncio.to_thread(result_cache.get, key)
+    if cached is not None:
+        return cached
+
+    t0 = time.perf_counter()
+    avis_clean, langue = await asyncio.to_thread(_clean_and_detect, avis)
+    sentiment = await asyncio.wrap_future(sentiment_batcher.submit(avis_clean))
+
+    result = {"avis_clean": avis_clean, "langue": langue, "aspects": extract_aspects(avis_clean), **sentiment}
+    await asyncio.to_thread(result_cache.set, key, result, time.perf_counter() - t0)
+    return result
+
+
+async def analyze_texts_async(avis_list: list[str]) -> list[dict]:
+    """
+    Version asynchrone de analyze_texts (tout le lot passe par l'exécuteur) ;
+    une lecture et une écriture du cache par lot, dans un thread.
+    """
+    keys = [_key(a) for a in avis_list]
+    results: list[dict | None] = await asyncio.to_thread(result_cache.get_many, keys)
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if not missing:
+        return results
+
+    t0 = time.perf_counter()
+    cleaned = await asyncio.to_thread(clean_texts, [avis_list[i] for i in missing], 1)
+    langues = await asyncio.to_thread(detect_languages, cleaned, 1)
+    aspects = await asyncio.to_thread(extract_aspects_batch, cleaned)
+    futures = sentiment_batcher.submit_many(cleaned)
+    sentiments = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+    per_item_s = (time.perf_counter() - t0) / len(missing)
+
+    for i, avis_clean, langue, found, sentiment in zip(missing, cleaned, langues, aspects, sentiments):
+        results[i] = {"avis_clean": avis_clean, "langue": langue, "aspects": found, **sentiment}
+    # une seule écriture (et un seul commit disque) pour tout le lot
+    await asyncio.to_thread(result_cache.set_many, [(keys[i], results[i]) for i in missing], per_item_s)
+
+    return results
@@ -1,20 +1,195 @@
 # src/nlp/response_generator.py
-
-from typing import Literal
+"""
+Réponses aux avis à partir d'une table de modèles (reply_templates.json).
+
+La table est chargée une seule fois, puis compilée en un dictionnaire
+(langue, sentiment, ton) -> modèle (ouverture + corps, fermeture).
+Générer une réponse revient à une recherche dans ce dictionnaire suivie
+d'un str.format(brand=..., platform=...).
+
+Si l'on fournit les aspects de l'avis (cf. src/nlp/aspects.py), une phrase
+sur l'aspect principal ("aspect_reply", avec son libellé "aspect_labels")
+est insérée avant la fermeture ; sans aspect, la réponse est inchangée.
+
+Format du fichier :
+    {
+      "fallback_lang": "fr", "fallback_sentiment": "neutral", "fallback_tone": "formel",
+      "languages": {
+        "fr": {
+          "default_brand": "notre enseigne",
+          "tones": {"formel": {"opening": "...", "closing": "..."}, ...},
+          "aspect_reply": {"negative": "... {aspect} ...", ...},
+          "aspect_labels": {"livraison": "la livraison", ...},
+          "replies": {"positive": {"formel": "... {brand} ... {platform}", ...}, ...}
+        },
+        ...
+      },
+      "overrides": [
+        {"brand": "Carhartt WIP", "lang": "fr", "tone": "amical",
+         "closing": "À très vite chez {brand} !\\nL'équipe Service Client"}
+      ]
+    }
+
+Une surcharge cible une marque et/ou une plateforme (et éventuellement une
+langue, un sentiment, un ton) et remplace tout ou partie de "opening",
+"core" et "closing". Ajouter une langue ou un ton = éditer le fichier.
+"""
+
+import functools
+import json
+import os
+from typing import Iterable, Literal, Mapping, Sequence
+
+from src.utils import metrics
 
 Tone = Literal["formel", "amical", "empathique"]
 
+TEMPLATES_PATH = os.getenv(
+    "AVIS_REPLY_TEMPLATES",
+    os.path.join(os.path.dirname(__file__), "reply_templates.json"),
+)
+# Réponses déjà rendues gardées en mémoire (la réponse ne dépend que de
+# sentiment / langue / plateforme / marque / ton / aspect, pas du texte de l'avis)
+RENDER_CACHE_SIZE = int(os.getenv("AVIS_REPLY_CACHE_SIZE", "4096"))
+
+
+def _norm_key(value: str | None) -> str | None:
+    # marque / plateforme comparées sans tenir compte de la casse ni des blancs
+    return value.strip().casefold() if value else None
+
+
+class ReplyTemplates:
+    """Table de modèles compilée, indexée par (langue, sentiment, ton)."""
+
+    def __init__(self, config: dict):
+        self.fallback_lang = config.get("fallback_lang", "fr")
+        self.fallback_sentiment = config.get("fallback_sentiment", "neutral")
+        self.fallback_tone = config.get("fallback_tone", "formel")
+
+        # pièces (opening, core, closing) par (langue, sentiment, ton)
+        pieces: dict[tuple[str, str, str], dict[str, str]] = {}
+        self.default_brands: dict[str, str] = {}
+        self.aspect_replies: dict[str, dict[str, str]] = {}
+        self.aspect_labels: dict[str, dict[str, str]] = {}
+        for lang, spec in config["languages"].items():
+            self.default_brands[lang] = spec.get("default_brand", "")
+            self.aspect_replies[lang] = spec.get("aspect_reply", {})
+            self.aspect_labels[lang] = spec.get("aspect_labels", {})
+            for sentiment, by_tone in spec["replies"].items():
+                for tone, core in by_tone.items():
+                    pieces[(lang, sentiment, tone)] = {"core": core, **spec["tones"][tone]}
+
+        self.languages = frozenset(self.default_brands)
+        self.sentiments = frozenset(s for _, s, _ in pieces)
+        self.tones = frozenset(t for _, _, t in pieces)
+
+        # table par défaut + une table par cible (marque, plateforme) surchargée
+        self._tables: dict[tuple[str | None, str | None], dict] = {
+            (None, None): self._compile(pieces)
+        }
+        targets: dict[tuple[str | None, str | None], list[dict]] = {}
+        for override in config.get("overrides", []):
+            target = (_norm_key(override.get("brand")), _norm_key(override.get("platform")))
+            targets.setdefault(target, []).append(override)
+
+        for target, overrides in targets.items():
+            patched = {key: dict(p) for key, p in pieces.items()}
+            for override in overrides:
+                for (lang, sentiment, tone), p in patched.items():
+                    if override.get("lang", lang) != lang:
+                        continue
+                    if override.get("sentiment", sentiment) != sentiment:
+                        continue
+                    if override.get("tone", tone) != tone:
+                        continue
+                    p.update({k: override[k] for k in ("opening", "core", "closing") if k in override})
+            self._tables[target] = self._compile(patched)
+
+        # render = _render mémoïsé (lru_cache en C : quelques dizaines de ns
+        # par appel, éviction comprise)
+        self.render = functools.lru_cache(maxsize=RENDER_CACHE_SIZE)(self._render)
+
+    @staticmethod
+    def _compile(pieces: dict) -> dict[tuple[str, str, str], tuple[str, str]]:
+        # (ouverture + corps, fermeture) : la phrase d'aspect se glisse entre les deux
+        return {
+            key: (f"{p['opening']}\n\n{p['core']}", p["closing"])
+            for key, p in pieces.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str = TEMPLATES_PATH) -> "ReplyTemplates":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def normalize_lang(self, lang: str | None) -> str:
+        """Simplifie le code langue (fr-FR -> fr, en-US -> en, etc.)."""
+        if not lang:
+            return self.fallback_lang
+        lang = lang.lower()
+        code = lang.replace("_", "-").split("-")[0]
+        if code not in self.languages:
+            code = lang[:2]  # "english" -> "en", "french" -> "fr"
+        return code if code in self.languages else self.fallback_lang
+
+    def _table(self, brand: str | None, platform: str | None) -> dict:
+        if len(self._tables) == 1:
+            return self._tables[(None, None)]
+        brand, platform = _norm_key(brand), _norm_key(platform)
+        for target in ((brand, platform), (brand, None), (None, platform)):
+            table = self._tables.get(target)
+            if table is not None:
+                return table
+        return self._tables[(None, None)]
+
+    def _render(
+        self,
+        sentiment: str,
+        langue: str | None,
+        platform: str | None,
+        brand: str | None,
+        tone: str = "formel",
+        aspect: str | None = None,
+    ) -> str:
+        """Réponse rendue ; appeler render() (même signature, mémoïsée)."""
+        lang = self.normalize_lang(langue)
+        sentiment = sentiment.lower()
+        if sentiment not in self.sentiments:
+            sentiment = self.fallback_sentiment
+        tone = tone.lower()
+        if tone not in self.tones:
+            tone = self.fallback_tone
+
+        head, closing = self._table(brand, platform)[(lang, sentiment, tone)]
+        # aspect sans libellé ou sans phrase dans cette langue : pas de mention
+        label = self.aspect_labels[lang].get(aspect) if aspect else None
+        sentence = self.aspect_replies[lang].get(sentiment) if label else None
+        template = f"{head}\n\n{sentence}\n\n{closing}" if sentence else f"{head}\n\n{closing}"
+        return template.format(
+            brand=brand or self.default_brands[lang],
+            platform=platform or "",
+            aspect=label,
+        )
+
+
+_templates: ReplyTemplates | None = None
+
+
+def get_templates() -> ReplyTemplates:
+    """Table chargée au premier appel puis partagée."""
+    global _templates
+    if _templates is None:
+        _templates = ReplyTemplates.from_file()
+    return _templates
+
 
 def _normalize_lang(lang: str) -> str:
     """Simplifie le code langue (fr-FR -> fr, en-US -> en, etc.)."""
-    if not lang:
-        return "fr"
-    lang = lang.lower()
-    if lang.startswith("fr"):
-        return "fr"
-    if lang.startswith("en"):
-        return "en"
-    return "fr"
+    return get_templates().normalize_lang(lang)
+
+
+def _main_aspect(aspects: Sequence[str] | None) -> str | None:
+    return aspects[0] if aspects else None
 
 
 def generate_reply(
@@ -24,161 +199,50 @@ def generate_reply(
     platform: str | None,
     brand: str | None,
     tone: Tone = "formel",
+    aspects: Sequence[str] | None = None,
 ) -> str:
     """
     Génère une réponse en fonction :
     - avis : texte de l'avis
     - sentiment : positive / negative / neutral
-    - langue : fr / en
+    - langue : fr / en / es / de / it (les autres langues retombent sur fr)
     - platform : Yelp, Trustpilot, ...
     - brand : Carhartt WIP, Le Petit Cler, ...
     - tone : formel / amical / empathique
+    - aspects : aspects de l'avis (extract_aspects) ; le premier est mentionné
+
+    Chemin unitaire sans métrique : une réponse coûte moins qu'une mesure
+    (generate_replies, elle, est mesurée lot par lot).
     """
+    templates = _templates or get_templates()
+    return templates.render(sentiment, langue, platform, brand, tone, aspects[0] if aspects else None)
+
 
-    langue = _normalize_lang(langue)
-    sentiment = sentiment.lower()
-    tone = tone.lower()
-
-    platform = platform or ""
-    brand = brand or "notre enseigne"
-
-    # ======================= FRANÇAIS =======================
-    if langue == "fr":
-        # Ouverture / fermeture selon le ton
-        if tone == "amical":
-            opening = "Bonjour 😊"
-            closing = "\n\nÀ bientôt,\nL'équipe Service Client"
-        elif tone == "empathique":
-            opening = "Bonjour 🙏"
-            closing = "\n\nCordialement,\nL'équipe Service Client"
-        else:  # formel
-            opening = "Bonjour,"
-            closing = "\n\nCordialement,\nL'équipe Service Client"
-
-        if sentiment == "positive":
-            if tone == "formel":
-                core = (
-                    f"Merci pour votre avis positif sur {brand} et pour votre confiance.\n"
-                    f"Nous sommes ravis de voir que votre expérience sur {platform} s'est bien passée."
-                )
-            elif tone == "amical":
-                core = (
-                    f"Un grand merci pour votre super retour sur {brand} 🥰\n"
-                    f"Ça nous fait vraiment plaisir de savoir que votre expérience s'est bien passée via {platform}."
-                )
-            else:  # empathique
-                core = (
-                    f"Merci du fond du cœur pour votre message sur {brand} ❤️\n"
-                    f"Nous sommes très heureux d'avoir pu vous offrir une belle expérience, "
-                    f"et votre retour sur {platform} compte beaucoup pour nous."
-                )
-
-        elif sentiment == "negative":
-            if tone == "formel":
-                core = (
-                    f"Nous sommes désolés d'apprendre que votre expérience avec {brand} via {platform} "
-                    "n’a pas été à la hauteur de vos attentes.\n"
-                    "Merci d'avoir pris le temps de nous faire part de ces éléments ; "
-                    "nous allons analyser la situation afin de nous améliorer."
-                )
-            elif tone == "amical":
-                core = (
-                    f"Merci d'avoir pris le temps de nous laisser un avis sur {brand}, même si l'expérience "
-                    "n'était pas au rendez-vous 😔\n"
-                    "On aimerait vraiment comprendre ce qui s'est passé pour pouvoir améliorer les choses."
-                )
-            else:  # empathique
-                core = (
-                    f"Nous sommes vraiment navrés de lire que votre expérience avec {brand} via {platform} "
-                    "ne s'est pas bien déroulée 😔\n"
-                    "Votre ressenti est important pour nous et nous vous remercions sincèrement de l'avoir partagé.\n"
-                    "Si vous le souhaitez, vous pouvez nous contacter directement afin que nous trouvions une solution "
-                    "ensemble."
-                )
-
-        else:  # neutral
-            if tone == "formel":
-                core = (
-                    f"Merci pour votre retour au sujet de {brand}.\n"
-                    "Vos remarques nous aident à mieux comprendre vos attentes et à faire évoluer notre service."
-                )
-            elif tone == "amical":
-                core = (
-                    f"Merci pour votre avis sur {brand} 😊\n"
-                    "On note vos retours et on va faire en sorte de continuer à s'améliorer."
-                )
-            else:  # empathique
-                core = (
-                    f"Merci d'avoir partagé votre expérience avec {brand}.\n"
-                    "Nous prenons vos remarques avec beaucoup d'attention afin d'améliorer nos services."
-                )
-
-        return f"{opening}\n\n{core}{closing}"
-
-    # ======================= ANGLAIS =======================
-    else:
-        if tone == "amical":
-            opening = "Hi there 😊"
-            closing = "\n\nBest regards,\nThe Customer Service Team"
-        elif tone == "empathique":
-            opening = "Hello 🙏"
-            closing = "\n\nBest regards,\nThe Customer Service Team"
-        else:
-            opening = "Hello,"
-            closing = "\n\nBest regards,\nThe Customer Service Team"
-
-        if sentiment == "positive":
-            if tone == "formel":
-                core = (
-                    f"Thank you for your positive feedback about {brand}.\n"
-                    f"We're glad to hear your experience on {platform} went well."
-                )
-            elif tone == "amical":
-                core = (
-                    f"Thank you so much for the great review about {brand} 🥰\n"
-                    f"We're really happy that you enjoyed your experience via {platform}."
-                )
-            else:
-                core = (
-                    f"Thank you from the bottom of our hearts for your kind words about {brand} ❤️\n"
-                    f"Knowing that your experience via {platform} went well truly means a lot to us."
-                )
-
-        elif sentiment == "negative":
-            if tone == "formel":
-                core = (
-                    f"We're sorry to hear that your experience with {brand} through {platform} "
-                    "did not meet your expectations.\n"
-                    "Thank you for taking the time to share this with us; we will review the situation carefully."
-                )
-            elif tone == "amical":
-                core = (
-                    f"Thanks for sharing your feedback about {brand}, even though things didn't go as expected 😔\n"
-                    "We’d really like to understand what happened so we can improve."
-                )
-            else:
-                core = (
-                    f"We're truly sorry to read that your experience with {brand} via {platform} "
-                    "was disappointing 😔\n"
-                    "Your feelings matter to us, and we really appreciate you taking the time to explain the situation.\n"
-                    "If you’d like, feel free to contact us directly so we can try to sort this out together."
-                )
-
-        else:  # neutral
-            if tone == "formel":
-                core = (
-                    f"Thank you for your feedback about {brand}.\n"
-                    "Your comments help us better understand your expectations and improve our service."
-                )
-            elif tone == "amical":
-                core = (
-                    f"Thanks for your review about {brand} 😊\n"
-                    "We appreciate your feedback and will use it to keep improving."
-                )
-            else:
-                core = (
-                    f"Thank you for taking the time to share your experience with {brand}.\n"
-                    "We carefully consider this type of feedback to improve our services."
-                )
-
-        return f"{opening}\n\n{core}{closing}"
+def generate_replies(items: Iterable[Mapping]) -> list[str]:
+    """
+    Version groupée de generate_reply pour des milliers d'avis.
+    Chaque élément est un dict avec les clés "sentiment", "langue" et,
+    optionnellement, "platform", "brand", "tone" et "aspects".
+    La réponse ne dépend pas du texte de l'avis : chaque combinaison
+    (sentiment, langue, plateforme, marque, ton, aspect principal) n'est
+    rendue qu'une fois.
+    """
+    items = list(items)
+    templates = get_templates()
+    rendered: dict[tuple, str] = {}
+    replies = []
+    with metrics.stage("reply_render", items=len(items)):
+        for item in items:
+            key = (
+                item["sentiment"],
+                item["langue"],
+                item.get("platform"),
+                item.get("brand"),
+                item.get("tone") or "formel",
+                _main_aspect(item.get("aspects")),
+            )
+            reply = rendered.get(key)
+            if reply is None:
+                reply = rendered[key] = templates.render(*key)
+            replies.append(reply)
+    return replies
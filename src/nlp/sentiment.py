@@ -1,36 +1,34 @@
 # src/nlp/sentiment.py
 
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import os
 
-# Modèle multilingue open-source (fr + en)
-MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+import numpy as np
 
-# Chargement du tokenizer et du modèle
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+from src.nlp.backends import SENTIMENT_BACKEND
+from src.nlp.model_registry import MODEL_NAME, registry
+from src.utils import metrics
 
-# Le modèle sort des étoiles 1 à 5
-# On remappe en : negative / neutral / positive
-def analyze_sentiment(text: str) -> str:
-    if not isinstance(text, str) or not text.strip():
-        return "neutral"
+# Taille de lot par défaut pour l'inférence groupée
+DEFAULT_BATCH_SIZE = 32
+# Avis longs : fenêtres glissantes de `max_tokens` tokens qui se recouvrent
+# de WINDOW_OVERLAP tokens, au plus MAX_WINDOWS fenêtres par avis
+WINDOW_OVERLAP = int(os.getenv("AVIS_WINDOW_OVERLAP", "64"))
+MAX_WINDOWS = int(os.getenv("AVIS_MAX_WINDOWS", "8"))
+# Confiance en dessous de laquelle un avis est signalé "uncertain"
+# (relecture humaine) ; 0 = désactivé
+UNCERTAIN_THRESHOLD = float(os.getenv("AVIS_UNCERTAIN_THRESHOLD", "0"))
 
-    inputs = tokenizer(
-        text,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=256,
-    )
+# Étoiles (0..4) regroupées par label, pour la confiance
+LABEL_STARS = {"negative": [0, 1], "neutral": [2], "positive": [3, 4]}
+# Distribution utilisée pour les textes vides (classés "neutral" d'office)
+NEUTRAL_PROBS = np.array([0.0, 0.0, 1.0, 0.0, 0.0])
 
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.softmax(outputs.logits, dim=-1)
-        label_id = int(torch.argmax(probs, dim=-1))  # 0..4
+# Le tokenizer et le modèle ne sont plus chargés à l'import :
+# le registre les charge au premier appel (ou au warm-up de l'API).
 
-    stars = label_id + 1  # 1 à 5
 
+def _stars_to_label(stars: int) -> str:
+    """Remappe une note 1..5 en negative / neutral / positive."""
     if stars <= 2:
         return "negative"
     elif stars == 3:
@@ -38,3 +36,183 @@ def analyze_sentiment(text: str) -> str:
     else:
         return "positive"
 
+
+def _windows(ids: list[int], size: int, overlap: int = WINDOW_OVERLAP) -> list[list[int]]:
+    """Découpe une séquence trop longue en fenêtres de `size` tokens qui se recouvrent."""
+    if len(ids) <= size:
+        return [ids]
+    step = max(1, size - overlap)
+    starts = list(range(0, len(ids) - overlap, step))[:MAX_WINDOWS]
+    return [ids[start:start + size] for start in starts]
+
+
+def _star_probabilities(
+    texts: list[str],
+    idx: list[int],
+    batch_size: int,
+    backend: str,
+    sort_by_length: bool = True,
+    embed: bool = False,
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Probabilités des 5 étoiles pour texts[i], i dans `idx` (une ligne par i)
+    et, avec `embed`, un vecteur par avis (états cachés moyennés, même passe).
+
+    - les avis longs sont découpés en fenêtres, dont les probabilités sont
+      moyennées (pondérées par le nombre de tokens) ;
+    - les fenêtres sont triées par longueur puis regroupées par lots : chaque
+      lot n'est complété qu'à la longueur de sa plus longue séquence, au lieu
+      d'aligner les avis courts sur le plus long du lot.
+    """
+    sentiment_backend = registry.get_backend(backend, MODEL_NAME)
+    with metrics.stage("tokenize", items=len(idx)):
+        encoded = sentiment_backend.encode([texts[i] for i in idx])
+
+    # (ligne du résultat, tokens de la fenêtre)
+    windows = [
+        (row, window)
+        for row, ids in enumerate(encoded)
+        for window in _windows(ids, sentiment_backend.max_tokens)
+    ]
+    order = list(range(len(windows)))
+    if sort_by_length:
+        order.sort(key=lambda w: len(windows[w][1]))
+
+    probs = np.zeros((len(idx), 5))
+    vectors = np.zeros((len(idx), _hidden_size(sentiment_backend))) if embed else None
+    weights = np.zeros(len(idx))
+    for start in range(0, len(order), batch_size):
+        bucket = [windows[w] for w in order[start:start + batch_size]]
+        with metrics.stage("model_forward", items=len(bucket)):
+            if embed:
+                bucket_probs, bucket_vectors = sentiment_backend.predict_proba_embed_ids([ids for _, ids in bucket])
+            else:
+                bucket_probs = sentiment_backend.predict_proba_ids([ids for _, ids in bucket])
+
+        for j, ((row, ids), p) in enumerate(zip(bucket, bucket_probs)):
+            weight = max(1, len(ids))
+            probs[row] += weight * p
+            if embed:
+                vectors[row] += weight * bucket_vectors[j]
+            weights[row] += weight
+
+    if embed:
+        vectors /= weights[:, None]
+    return probs / weights[:, None], vectors
+
+
+def _hidden_size(sentiment_backend) -> int:
+    return sentiment_backend.model.config.hidden_size
+
+
+def _details(probs: np.ndarray) -> dict:
+    """Label, distribution des étoiles, note attendue et confiance."""
+    sentiment = _stars_to_label(int(probs.argmax()) + 1)
+    return {
+        "sentiment": sentiment,
+        "stars_proba": [round(float(p), 4) for p in probs],
+        # espérance de la note (1..5)
+        "stars": round(float(np.dot(probs, np.arange(1, 6))), 3),
+        # masse de probabilité du label retenu
+        "confidence": round(float(probs[LABEL_STARS[sentiment]].sum()), 4),
+    }
+
+
+def is_uncertain(result: dict, threshold: float | None = None) -> bool:
+    """Vrai si la confiance du résultat est sous le seuil (0 = jamais)."""
+    if threshold is None:
+        threshold = UNCERTAIN_THRESHOLD
+    return threshold > 0 and result["confidence"] < threshold
+
+
+# Le modèle sort des étoiles 1 à 5
+# On remappe en : negative / neutral / positive
+def analyze_sentiment(text: str) -> str:
+    return analyze_sentiment_batch([text])[0]
+
+
+def analyze_sentiment_details(
+    texts: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    backend: str = SENTIMENT_BACKEND,
+    sort_by_length: bool = True,
+) -> list[dict]:
+    """
+    Comme analyze_sentiment_batch, mais renvoie pour chaque avis un dict
+    {"sentiment", "stars_proba", "stars", "confidence"} issu de la même
+    passe du modèle (aucune inférence supplémentaire).
+    Les textes vides (ou non str) sont "neutral", 3 étoiles, confiance 1.
+    """
+    results = [_details(NEUTRAL_PROBS) for _ in texts]
+
+    idx = [i for i, t in enumerate(texts) if isinstance(t, str) and t.strip()]
+    if not idx:
+        return results
+
+    probs, _ = _star_probabilities(texts, idx, batch_size, backend, sort_by_length)
+    for i, row in zip(idx, probs):
+        results[i] = _details(row)
+
+    return results
+
+
+def analyze_with_embeddings(
+    texts: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    backend: str = SENTIMENT_BACKEND,
+    sort_by_length: bool = True,
+) -> tuple[list[dict], np.ndarray]:
+    """
+    analyze_sentiment_details plus un vecteur par avis (matrice float32
+    n x hidden_size) : moyenne des états cachés de la dernière couche,
+    calculée pendant la même passe du modèle. Sert à la recherche d'avis
+    similaires (cf. src/utils/embedding_index.py). Les textes vides ont
+    un vecteur nul.
+    """
+    results = [_details(NEUTRAL_PROBS) for _ in texts]
+    vectors = np.zeros((len(texts), _hidden_size(registry.get_backend(backend, MODEL_NAME))), dtype=np.float32)
+
+    idx = [i for i, t in enumerate(texts) if isinstance(t, str) and t.strip()]
+    if not idx:
+        return results, vectors
+
+    probs, pooled = _star_probabilities(texts, idx, batch_size, backend, sort_by_length, embed=True)
+    for i, row in zip(idx, probs):
+        results[i] = _details(row)
+    vectors[idx] = pooled
+    return results, vectors
+
+
+def embed_texts(texts: list[str], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    """Vecteurs des avis seuls (cf. analyze_with_embeddings)."""
+    return analyze_with_embeddings(texts, batch_size)[1]
+
+
+def analyze_sentiment_batch(
+    texts: list[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    backend: str = SENTIMENT_BACKEND,
+    sort_by_length: bool = True,
+) -> list[str]:
+    """
+    Analyse plusieurs avis avec une passe du modèle par lot de `batch_size`
+    séquences, regroupées par longueur (`sort_by_length`) pour limiter le
+    padding. Les avis de plus de 256 tokens sont lus par fenêtres glissantes.
+    Les textes vides (ou non str) sont directement classés "neutral".
+    L'ordre des résultats correspond à l'ordre des textes.
+    `backend` : "torch" (fp32), "torch-int8" ou "onnx" (cf. backends.py).
+    """
+    results = ["neutral"] * len(texts)
+
+    # indices des textes qui passent réellement par le modèle
+    idx = [i for i, t in enumerate(texts) if isinstance(t, str) and t.strip()]
+    if not idx:
+        return results
+
+    probs, _ = _star_probabilities(texts, idx, batch_size, backend, sort_by_length)
+    label_ids = probs.argmax(axis=-1).tolist()  # 0..4
+
+    for i, label_id in zip(idx, label_ids):
+        results[i] = _stars_to_label(label_id + 1)  # 1 à 5
+
+    return results
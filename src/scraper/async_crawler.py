@@ -0,0 +1,191 @@
+# src/scraper/async_crawler.py
+
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils import metrics
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "fr-FR,fr;q=0.9,en;q=0.8",
+}
+
+# Codes pour lesquels on réessaie (trop de requêtes / erreurs serveur)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Attente maximale entre deux essais (Retry-After compris) : un serveur qui
+# demande d'attendre une heure ne bloque pas le crawl une heure
+MAX_BACKOFF_S = 60.0
+
+
+class TokenBucket:
+    """
+    Limiteur de débit "token bucket" : `rate` requêtes par seconde en régime
+    établi, avec des rafales d'au plus `capacity` requêtes.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError(f"rate doit être > 0 (reçu {rate})")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        if self.capacity < 1:
+            raise ValueError(f"capacity doit être >= 1 (reçu {self.capacity})")
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncCrawler:
+    """
+    Récupère des pages HTML en parallèle :
+      - une session requests avec pool de connexions (keep-alive) ;
+      - une concurrence bornée par hôte (sémaphore) ;
+      - un débit global borné (token bucket) ;
+      - des réessais avec backoff exponentiel sur 429 / 5xx / erreurs réseau
+        (en respectant Retry-After quand il est fourni), attente plafonnée
+        à `max_backoff_s`.
+
+    Les appels requests (bloquants) tournent dans des threads via
+    asyncio.to_thread, la coordination reste dans la boucle asyncio.
+    """
+
+    def __init__(
+        self,
+        concurrency_per_host: int = 4,
+        rate_per_s: float = 5.0,
+        timeout: float = 15.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        headers: dict[str, str] | None = None,
+        max_backoff_s: float = MAX_BACKOFF_S,
+    ):
+        if rate_per_s <= 0:
+            raise ValueError(f"rate_per_s doit être > 0 (reçu {rate_per_s})")
+        self.concurrency_per_host = concurrency_per_host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff_s = max_backoff_s
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=concurrency_per_host,
+            pool_maxsize=concurrency_per_host,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._rate = rate_per_s
+        self._bucket: TokenBucket | None = None
+        self._host_sems: dict[str, asyncio.Semaphore] = {}
+
+    def _sem(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_sems:
+            self._host_sems[host] = asyncio.Semaphore(self.concurrency_per_host)
+        return self._host_sems[host]
+
+    def _delay(self, attempt: int, response: requests.Response | None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff_s)
+        # backoff exponentiel + un peu d'aléa pour ne pas repartir tous ensemble
+        delay = self.backoff_base * (2 ** attempt) * (1 + random.random() * 0.25)
+        return min(delay, self.max_backoff_s)
+
+    async def fetch(self, url: str) -> str | None:
+        """Renvoie le HTML de la page, ou None si elle n'a pas pu être récupérée."""
+        if self._bucket is None:
+            self._bucket = TokenBucket(self._rate)
+
+        async with self._sem(url):
+            for attempt in range(self.max_retries + 1):
+                await self._bucket.acquire()
+
+                response = None
+                try:
+                    with metrics.stage("http_fetch"):
+                        response = await asyncio.to_thread(
+                            self.session.get, url, timeout=self.timeout
+                        )
+                except requests.RequestException as exc:
+                    metrics.count_fetch("error")
+                    print(f"  [WARN] {url} : {exc}")
+                else:
+                    metrics.count_fetch(response.status_code)
+                    if response.status_code == 200:
+                        return response.text
+                    if response.status_code not in RETRY_STATUSES:
+                        print(f"  [WARN] status {response.status_code}, page ignorée : {url}")
+                        return None
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self._delay(attempt, response))
+
+            print(f"  [WARN] abandon après {self.max_retries + 1} essais : {url}")
+            return None
+
+    async def fetch_all(self, urls: list[str]) -> list[str | None]:
+        """Récupère toutes les URLs en parallèle (résultats dans le même ordre)."""
+        return await asyncio.gather(*(self.fetch(u) for u in urls))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class CrawlSession:
+    """
+    Point d'entrée synchrone pour un crawl en plusieurs appels : un seul
+    AsyncCrawler (session, token bucket, sémaphores) et une seule boucle
+    asyncio pour toutes les vagues, afin que le débit et le keep-alive
+    valent pour le crawl entier et pas seulement pour une vague.
+    """
+
+    def __init__(self, **crawler_kwargs):
+        self._runner = asyncio.Runner()
+        self.crawler = AsyncCrawler(**crawler_kwargs)
+
+    def fetch_all(self, urls: list[str]) -> list[str | None]:
+        if not urls:
+            return []
+        return self._runner.run(self.crawler.fetch_all(urls))
+
+    def close(self) -> None:
+        self.crawler.close()
+        self._runner.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fetch_pages(urls: list[str], **crawler_kwargs) -> list[str | None]:
+    """Point d'entrée synchrone : récupère les pages avec un AsyncCrawler."""
+    with CrawlSession(**crawler_kwargs) as session:
+        return session.fetch_all(urls)
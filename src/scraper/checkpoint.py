@@ -0,0 +1,90 @@
+# src/scraper/checkpoint.py
+
+import json
+import os
+
+CHECKPOINT_DIR = os.getenv("AVIS_CHECKPOINT_DIR", "data/checkpoints")
+
+
+class CrawlCheckpoint:
+    """
+    Etat persistant d'un crawl, par plateforme / domaine / langue :
+      - newest_date / newest_hash : l'avis le plus récent déjà connu
+        (date + hash du texte normalisé), pour arrêter la pagination ;
+      - last_completed_page / in_progress : pour reprendre un crawl
+        interrompu à la page suivant la dernière page terminée ;
+      - les hashes de tous les avis bruts déjà vus (fichier `seen_path`,
+        un hash par ligne), y compris ceux que le post-traitement écarte
+        ensuite (avis tronqués, doublons) : sans eux, une page de tels
+        avis paraîtrait toujours nouvelle et la pagination ne s'arrêterait pas.
+
+    Sauvegardé en JSON dans CHECKPOINT_DIR (écriture atomique).
+    """
+
+    def __init__(self, platform: str, domain: str, lang: str, directory: str = CHECKPOINT_DIR):
+        self.platform = platform
+        self.domain = domain
+        self.lang = lang
+        self.directory = directory
+
+        self.newest_date: str | None = None
+        self.newest_hash: str | None = None
+        self.last_completed_page = 0
+        self.in_progress = False
+
+    @property
+    def path(self) -> str:
+        name = f"{self.platform}_{self.domain.replace('.', '_')}_{self.lang}.json"
+        return os.path.join(self.directory, name)
+
+    @property
+    def partial_path(self) -> str:
+        """CSV des avis déjà récupérés par un crawl en cours."""
+        return self.path[: -len(".json")] + ".partial.csv"
+
+    @property
+    def seen_path(self) -> str:
+        """Hashes des avis bruts déjà vus, un par ligne (ajouts seulement)."""
+        return self.path[: -len(".json")] + ".seen"
+
+    def load_seen(self) -> set[str]:
+        if not os.path.exists(self.seen_path):
+            return set()
+        with open(self.seen_path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def add_seen(self, hashes) -> None:
+        hashes = list(hashes)
+        if not hashes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.seen_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{h}\n" for h in hashes))
+
+    @classmethod
+    def load(cls, platform: str, domain: str, lang: str, directory: str = CHECKPOINT_DIR):
+        cp = cls(platform, domain, lang, directory)
+        if os.path.exists(cp.path):
+            with open(cp.path, encoding="utf-8") as f:
+                data = json.load(f)
+            cp.newest_date = data.get("newest_date")
+            cp.newest_hash = data.get("newest_hash")
+            cp.last_completed_page = data.get("last_completed_page", 0)
+            cp.in_progress = data.get("in_progress", False)
+        return cp
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        data = {
+            "platform": self.platform,
+            "domain": self.domain,
+            "lang": self.lang,
+            "newest_date": self.newest_date,
+            "newest_hash": self.newest_hash,
+            "last_completed_page": self.last_completed_page,
+            "in_progress": self.in_progress,
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,215 @@
+# src/scraper/driver_pool.py
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Ressources inutiles pour lire le texte des avis
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm",
+]
+
+ACQUIRE_POLL_S = 1.0  # attente d'un navigateur libre, par tranches
+
+_driver_path: str | None = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path() -> str:
+    """Télécharge / localise chromedriver une seule fois par processus."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def new_driver(headless: bool = True, block_assets: bool = True):
+    """Lance un Chrome avec des options raisonnables (et sans images / CSS / polices)."""
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"user-agent={USER_AGENT}")
+
+    if block_assets:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option(
+            "prefs",
+            {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.fonts": 2,
+            },
+        )
+        # le HTML arrive dès que le DOM est prêt, sans attendre le reste
+        options.page_load_strategy = "eager"
+
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
+
+    if block_assets:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    return driver
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+class DriverPool:
+    """
+    Pool de navigateurs Chrome headless gardés "chauds".
+
+    - au plus `size` navigateurs, créés à la demande ;
+    - chaque emprunt vérifie que le navigateur répond (health check) ;
+    - un navigateur est recyclé (quit + relance) après `max_uses` emprunts
+      ou `max_age_s` secondes, pour éviter les fuites mémoire des longs crawls.
+      Un emprunt peut charger plusieurs pages (scrape_yelp_many garde le même
+      navigateur pour toutes les pages d'une URL) : le recyclage n'a lieu
+      qu'entre deux emprunts, `max_age_s` borne alors la durée de vie.
+
+    Utilisation :
+        with DriverPool(size=3) as pool:
+            with pool.driver() as driver:
+                driver.get(url)
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        headless: bool = True,
+        block_assets: bool = True,
+        max_uses: int = 50,
+        max_age_s: float = 600.0,
+    ):
+        self.size = size
+        self.headless = headless
+        self.block_assets = block_assets
+        self.max_uses = max_uses
+        self.max_age_s = max_age_s
+
+        self._idle: queue.Queue[_PooledDriver] = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _spawn(self) -> _PooledDriver:
+        return _PooledDriver(new_driver(self.headless, self.block_assets))
+
+    def _healthy(self, item: _PooledDriver) -> bool:
+        if item.uses >= self.max_uses:
+            return False
+        if time.monotonic() - item.created > self.max_age_s:
+            return False
+        try:
+            item.driver.execute_script("return 1")
+        except WebDriverException:
+            return False
+        return True
+
+    @staticmethod
+    def _quit(item: _PooledDriver) -> None:
+        try:
+            item.driver.quit()
+        except WebDriverException:
+            pass
+
+    def _spawn_slot(self) -> _PooledDriver:
+        # le compteur `_created` est déjà réservé : on le rend si Chrome ne démarre pas
+        try:
+            return self._spawn()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _acquire(self) -> _PooledDriver:
+        while True:
+            if self._closed:
+                raise RuntimeError("DriverPool fermé")
+            try:
+                item = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_spawn = self._created < self.size
+                    if can_spawn:
+                        self._created += 1
+                if can_spawn:
+                    return self._spawn_slot()
+                try:
+                    # attente bornée : une place libérée par un échec de relance
+                    # (ou la fermeture du pool) est vue au tour suivant
+                    item = self._idle.get(timeout=ACQUIRE_POLL_S)
+                except queue.Empty:
+                    continue
+
+            if self._healthy(item):
+                return item
+            # recyclage : on remplace le navigateur sans changer la taille du pool
+            self._quit(item)
+            return self._spawn_slot()
+
+    def _release(self, item: _PooledDriver) -> None:
+        # sous le verrou : close() ne peut pas vider la file entre le test et le put
+        with self._lock:
+            if not self._closed:
+                self._idle.put(item)
+                return
+        # pool fermé pendant l'emprunt : le navigateur n'est pas rendu
+        self._quit(item)
+
+    @contextmanager
+    def driver(self):
+        """Emprunte un navigateur du pool (rendu automatiquement)."""
+        if self._closed:
+            raise RuntimeError("DriverPool fermé")
+
+        item = self._acquire()
+        try:
+            yield item.driver
+        except WebDriverException:
+            # navigateur dans un état douteux : il sera recyclé au prochain emprunt
+            item.uses = self.max_uses
+            raise
+        finally:
+            item.uses += 1
+            self._release(item)
+
+    def close(self) -> None:
+        """
+        Ferme les navigateurs libres ; ceux encore empruntés (page peut-être
+        en cours de chargement) le seront à leur retour, dans _release.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
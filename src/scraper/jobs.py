@@ -0,0 +1,368 @@
+# src/scraper/jobs.py
+"""
+File de jobs de scraping (Trustpilot / Yelp) exécutés en arrière-plan.
+
+Les jobs vivent dans une table SQLite (AVIS_JOBS_DB) : l'API y dépose les
+jobs, et des workers les réclament, que ce soient les threads lancés par
+l'API (WorkerPool) ou des processus séparés
+(python -m src.cli.scrape_worker), sur la même machine.
+
+- coalescence : un seul job en attente / en cours par (plateforme, cible,
+  langue) ; une 2e demande renvoie le job existant ;
+- limite par domaine : au plus AVIS_SCRAPE_PER_DOMAIN jobs en cours par
+  site crawlé (fr.trustpilot.com, www.yelp.fr...), tous workers confondus ;
+- progression : pages faites / total, avis trouvés, mise à jour à chaque
+  page (qui sert aussi de battement de cœur) ;
+- résultats : chaque page est enregistrée dans la base d'avis dès
+  qu'elle est parsée (src/utils/review_store.py) ;
+- un job interrompu (arrêt du worker) est remis en attente, de même
+  qu'un job "running" dont le worker ne donne plus signe de vie depuis
+  AVIS_SCRAPE_STALE_S secondes.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from src.utils.review_store import ReviewStore, get_store
+
+JOBS_DB = os.getenv("AVIS_JOBS_DB", os.path.join("data", "jobs.sqlite"))
+WORKERS = int(os.getenv("AVIS_SCRAPE_WORKERS", "1"))            # threads de l'API
+PER_DOMAIN = int(os.getenv("AVIS_SCRAPE_PER_DOMAIN", "1"))      # jobs simultanés par site
+STALE_S = float(os.getenv("AVIS_SCRAPE_STALE_S", "600"))        # job abandonné au-delà
+POLL_S = float(os.getenv("AVIS_SCRAPE_POLL_S", "1.0"))          # attente d'un worker inoccupé
+
+PLATFORMS = ("trustpilot", "yelp")
+
+
+class JobInterrupted(Exception):
+    """Arrêt demandé pendant un job : il sera repris par un autre worker."""
+
+
+COLUMNS = (
+    "id", "platform", "target", "lang", "host", "max_pages", "brand", "status",
+    "pages_done", "pages_total", "reviews_found", "error", "worker",
+    "created", "started", "heartbeat", "finished",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    target TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    host TEXT NOT NULL,
+    max_pages INTEGER,
+    brand TEXT,
+    status TEXT NOT NULL,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    pages_total INTEGER,
+    reviews_found INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    worker TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    heartbeat REAL,
+    finished REAL
+);
+-- coalescence : un seul job actif par (plateforme, cible, langue)
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_target
+    ON jobs (platform, target, lang) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+
+def _host(platform: str, target: str) -> str:
+    # site réellement crawlé (c'est lui que la limite protège)
+    if platform == "trustpilot":
+        from src.scraper.trustpilot_scraper import _page_url
+
+        return urlsplit(_page_url(target, "fr", 1)).netloc
+    return urlsplit(target).netloc or target
+
+
+def _normalize_target(platform: str, target: str) -> str:
+    target = target.strip()
+    if platform == "trustpilot":
+        return target.lower()
+    return target.rstrip("/")
+
+
+class JobStore:
+    """Table des jobs, partagée entre threads et processus (SQLite WAL)."""
+
+    def __init__(self, db_path: str = JOBS_DB):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # autocommit : les transactions sont explicites (BEGIN IMMEDIATE)
+        self._db = sqlite3.connect(
+            db_path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def _row(self, row) -> dict | None:
+        return dict(zip(COLUMNS, row)) if row is not None else None
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def list(self, status: str | None = None, limit: int = 100) -> list[dict]:
+        where, params = ("WHERE status = ?", [status]) if status else ("", [])
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs {where} ORDER BY created DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def submit(
+        self,
+        platform: str,
+        target: str,
+        lang: str = "fr",
+        max_pages: int | None = None,
+        brand: str | None = None,
+    ) -> tuple[dict, bool]:
+        """
+        Ajoute un job, ou renvoie le job déjà en attente / en cours pour la
+        même cible. Renvoie (job, coalescé ?).
+        """
+        if platform not in PLATFORMS:
+            raise ValueError(f"plateforme inconnue : {platform} ({', '.join(PLATFORMS)})")
+        target = _normalize_target(platform, target)
+        lang = lang if platform == "trustpilot" else ""
+
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, platform, target, lang, host, max_pages, brand, status, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+                    (job_id, platform, target, lang, _host(platform, target), max_pages, brand, time.time()),
+                )
+                coalesced = False
+            except sqlite3.IntegrityError:
+                job_id = self._db.execute(
+                    "SELECT id FROM jobs WHERE platform = ? AND target = ? AND lang = ?"
+                    " AND status IN ('queued', 'running')",
+                    (platform, target, lang),
+                ).fetchone()[0]
+                coalesced = True
+        return self.get(job_id), coalesced
+
+    def claim(self, worker: str, per_domain: int = PER_DOMAIN, stale_s: float = STALE_S) -> dict | None:
+        """
+        Réclame le plus ancien job en attente dont le site a encore de la
+        place (moins de `per_domain` jobs en cours). None si rien à faire.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")  # une seule réclamation à la fois
+            try:
+                # workers disparus : leurs jobs repartent en attente
+                self._db.execute(
+                    "UPDATE jobs SET status = 'queued', worker = NULL"
+                    " WHERE status = 'running' AND heartbeat < ?",
+                    (now - stale_s,),
+                )
+                row = self._db.execute(
+                    "SELECT id FROM jobs j WHERE status = 'queued' AND"
+                    " (SELECT COUNT(*) FROM jobs r WHERE r.status = 'running' AND r.host = j.host) < ?"
+                    " ORDER BY created LIMIT 1",
+                    (per_domain,),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, started = ?, heartbeat = ?,"
+                        " pages_done = 0, reviews_found = 0 WHERE id = ?",
+                        (worker, now, now, row[0]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row is not None else None
+
+    # Les mises à jour d'un job en cours portent sur (id, worker) : si le job
+    # a été jugé abandonné puis réclamé par un autre worker, l'ancien worker
+    # n'y touche plus (False renvoyé) et doit s'arrêter.
+
+    def progress(
+        self, job_id: str, worker: str, pages_done: int, pages_total: int | None, reviews_found: int
+    ) -> bool:
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET pages_done = ?, pages_total = ?, reviews_found = ?, heartbeat = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (pages_done, pages_total, reviews_found, time.time(), job_id, worker),
+            )
+        return cur.rowcount > 0
+
+    def requeue(self, job_id: str, worker: str) -> bool:
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                (job_id, worker),
+            )
+        return cur.rowcount > 0
+
+    def finish(self, job_id: str, worker: str, error: str | None = None) -> bool:
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ?"
+                " WHERE id = ? AND worker = ? AND status = 'running'",
+                ("failed" if error else "done", error, time.time(), job_id, worker),
+            )
+        return cur.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# =========================
+#   EXÉCUTION
+# =========================
+
+def run_job(
+    job: dict,
+    jobs: JobStore,
+    store: ReviewStore,
+    stop: threading.Event | None = None,
+) -> None:
+    """
+    Lance le scraping du job ; chaque page part dans la base d'avis.
+    Si `stop` est levé, ou si le job a été repris par un autre worker, le
+    job s'arrête à la page suivante (JobInterrupted).
+    """
+    progress = {"pages": 0, "reviews": 0}
+
+    def save_page(df: pd.DataFrame, pages_total: int | None, platform: str, lang: str | None) -> None:
+        if not df.empty:
+            store.upsert(df, platform=platform, brand=job["brand"] or job["target"], lang=lang)
+        progress["pages"] += 1
+        progress["reviews"] += len(df)
+        owned = jobs.progress(job["id"], job["worker"], progress["pages"], pages_total, progress["reviews"])
+        if not owned or (stop is not None and stop.is_set()):
+            raise JobInterrupted(job["id"])
+
+    if job["platform"] == "trustpilot":
+        from src.scraper.trustpilot_scraper import (
+            _postprocess_reviews,
+            scrape_trustpilot_to_df,
+        )
+
+        def on_page(n: int, nb_pages: int, rows: list[tuple[str, str, str]]) -> None:
+            df = pd.DataFrame(rows, columns=["Titre de l'avis", "Avis", "Date_str"])
+            save_page(_postprocess_reviews(df), nb_pages, "Trustpilot", job["lang"])
+
+        scrape_trustpilot_to_df(job["target"], lang=job["lang"], max_pages=job["max_pages"], on_page=on_page)
+
+    else:
+        from src.scraper.yelp_selenium_scraper import scrape_yelp_reviews_selenium
+
+        max_pages = job["max_pages"] or 1
+
+        def on_page(n: int, texts: list[str]) -> None:
+            save_page(pd.DataFrame({"Avis": texts}), max_pages, "Yelp", None)
+
+        scrape_yelp_reviews_selenium(job["target"], max_pages=max_pages, on_page=on_page)
+
+
+def work(
+    jobs: JobStore,
+    store: ReviewStore | None = None,
+    stop: threading.Event | None = None,
+    worker: str | None = None,
+    once: bool = False,
+) -> int:
+    """
+    Boucle d'un worker : réclame et exécute des jobs jusqu'à `stop` (ou
+    jusqu'à ce que la file soit vide si `once`). Renvoie le nombre de jobs
+    traités.
+    """
+    stop = stop or threading.Event()
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    done = 0
+
+    while not stop.is_set():
+        job = jobs.claim(worker)
+        if job is None:
+            if once:
+                break
+            stop.wait(POLL_S)
+            continue
+
+        print(f"[JOB] {job['id']} {job['platform']} {job['target']} ({worker})")
+        try:
+            run_job(job, jobs, store or get_store(), stop)
+        except JobInterrupted:
+            if jobs.requeue(job["id"], worker):
+                print(f"[JOB] {job['id']} interrompu, remis en attente")
+            else:
+                print(f"[WARN] job {job['id']} repris par un autre worker, abandonné ici")
+            continue
+        except Exception as exc:  # le worker survit à un job en échec
+            print(f"[WARN] job {job['id']} en échec : {exc!r}")
+            owned = jobs.finish(job["id"], worker, error=repr(exc))
+        else:
+            owned = jobs.finish(job["id"], worker)
+        if not owned:
+            print(f"[WARN] job {job['id']} repris par un autre worker, résultat ignoré")
+        done += 1
+    return done
+
+
+class WorkerPool:
+    """Threads workers d'un processus (ceux de l'API, par exemple)."""
+
+    def __init__(self, jobs: JobStore, size: int = WORKERS, store: ReviewStore | None = None):
+        self.jobs = jobs
+        self.size = size
+        self.store = store
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.size):
+            t = threading.Thread(
+                target=work,
+                args=(self.jobs, self.store, self._stop),
+                name=f"scrape-worker-{i}",
+                daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        # un job en cours s'arrête après sa page et repart en attente
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads.clear()
+
+
+_jobs: JobStore | None = None
+
+
+def get_jobs() -> JobStore:
+    """Table AVIS_JOBS_DB ouverte au premier appel puis partagée."""
+    global _jobs
+    if _jobs is None:
+        _jobs = JobStore()
+    return _jobs
@@ -0,0 +1,98 @@
+# src/scraper/records.py
+"""
+Avis produits au fil de l'eau par les scrapers (iter_trustpilot_reviews,
+iter_yelp_reviews) et consommateurs en flux.
+
+Un scraper "générateur" renvoie des Review page par page au lieu de
+listes parallèles pour tout le domaine ; les consommateurs ci-dessous
+travaillent par paquets bornés, la mémoire ne grandit donc pas avec le
+nombre de pages :
+
+    reviews = iter_trustpilot_reviews("carhartt-wip.com", max_pages=50)
+    for df in iter_frames(dedup_stream(reviews), chunk_size=500):
+        ...   # process_chunks (CLI), ReviewStore.upsert, to_csv(mode="a")...
+"""
+
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from src.utils.dates import extract_date_strings, parse_dates
+from src.utils.dedup import NearDuplicateIndex
+
+
+@dataclass(slots=True)
+class Review:
+    platform: str       # "Trustpilot", "Yelp"
+    source: str         # domaine Trustpilot ou URL de l'établissement Yelp
+    page: int           # numéro de page (à partir de 1)
+    text: str
+    title: str = ""
+    date_str: str = ""
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def reviews_to_frame(reviews: list[Review], brand: str | None = None) -> pd.DataFrame:
+    """
+    DataFrame au format des CSV historiques ("Titre de l'avis", "Avis",
+    "Date_str", "Date", "platform", "brand"), dates converties.
+    `brand` par défaut : la source (domaine / URL).
+    """
+    df = pd.DataFrame(
+        {
+            "Titre de l'avis": [r.title for r in reviews],
+            "Avis": [r.text for r in reviews],
+            "Date_str": [r.date_str for r in reviews],
+            "platform": [r.platform for r in reviews],
+            "brand": [brand or r.source for r in reviews],
+        }
+    )
+    df["Date_str"] = extract_date_strings(df["Date_str"])
+    df["Date"] = parse_dates(df["Date_str"])
+    return df
+
+
+def iter_frames(
+    reviews: Iterable[Review],
+    chunk_size: int = 1000,
+    brand: str | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Regroupe le flux d'avis en DataFrames d'au plus `chunk_size` lignes."""
+    for batch in _batches(reviews, chunk_size):
+        yield reviews_to_frame(batch, brand)
+
+
+def dedup_stream(
+    reviews: Iterable[Review],
+    index: NearDuplicateIndex | None = None,
+    batch_size: int = 64,
+) -> Iterator[Review]:
+    """
+    Ne laisse passer que le premier avis de chaque groupe de quasi-doublons
+    (cf. src/utils/dedup.py). Les pages étant triées par récence, c'est
+    le plus récent. Avec un `index` persistant, les avis déjà vus lors
+    d'un run précédent sont aussi écartés.
+    """
+    own_index = index is None
+    if own_index:
+        index = NearDuplicateIndex()
+    try:
+        for batch in _batches(reviews, batch_size):
+            # les groupes portent l'id de leur 1er avis : un groupe créé par
+            # ce paquet a un id supérieur au nombre d'avis déjà indexés
+            known = len(index)
+            emitted: set[int] = set()
+            for review, grp in zip(batch, index.assign_many([r.text for r in batch])):
+                if grp > known and grp not in emitted:
+                    emitted.add(grp)
+                    yield review
+    finally:
+        if own_index:
+            index.close()
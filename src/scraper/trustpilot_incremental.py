@@ -0,0 +1,192 @@
+# src/scraper/trustpilot_incremental.py
+
+import asyncio
+import os
+
+import pandas as pd
+
+from src.scraper.async_crawler import AsyncCrawler
+from src.scraper.checkpoint import CHECKPOINT_DIR, CrawlCheckpoint
+from src.scraper.trustpilot_parsing import extract_reviews, extract_total_pages
+from src.scraper.trustpilot_scraper import _page_url, _postprocess_reviews
+from src.utils import metrics
+from src.utils.cache import content_key
+from src.utils.review_store import ReviewStore
+
+COLUMNS = ["Titre de l'avis", "Avis", "Date_str"]
+
+
+def _dataset_path(domain: str, lang: str) -> str:
+    # même nommage que les scripts test_scraper_*.py
+    return f"trustpilot_{domain.replace('.', '_')}_{lang}.csv"
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, keep_default_na=False, dtype=str)
+
+
+async def _crawl_new_pages(
+    domain: str,
+    lang: str,
+    start_page: int,
+    max_pages: int | None,
+    known: set[str],
+    cp: CrawlCheckpoint,
+    concurrency: int,
+    engine: str | None,
+) -> tuple[int, bool]:
+    """
+    Parcourt les pages (triées par récence) par vagues de `concurrency` pages,
+    ajoute les nouveaux avis au CSV partiel et s'arrête dès qu'une page ne
+    contient que des avis connus (ou l'avis le plus récent du checkpoint).
+    Renvoie (nombre de nouveaux avis, crawl terminé ?).
+    """
+    crawler = AsyncCrawler(concurrency_per_host=concurrency)
+    nb_pages = None
+    nb_new = 0
+    page = start_page
+
+    try:
+        while True:
+            # 1re page seule (on ne connaît pas encore le nombre de pages),
+            # puis des vagues de `concurrency` pages
+            last = nb_pages if nb_pages is not None else page
+            if max_pages is not None:
+                last = min(last, max_pages)
+            wave = list(range(page, min(page + concurrency - 1, last) + 1))
+            if not wave:
+                return nb_new, True
+
+            htmls = await crawler.fetch_all([_page_url(domain, lang, n) for n in wave])
+
+            for n, html in zip(wave, htmls):
+                print(f"Scraping page {n} -> {_page_url(domain, lang, n)}")
+                if html is None:
+                    # page non terminée : le prochain lancement reprendra ici
+                    print("  [WARN] page non récupérée, crawl interrompu")
+                    return nb_new, False
+
+                if nb_pages is None:
+                    nb_pages = extract_total_pages(html, engine)
+
+                rows = extract_reviews(html, engine)
+                hashes = [content_key(text) for _, text, _ in rows]
+                fresh = [row for row, h in zip(rows, hashes) if h not in known]
+                new_hashes = [h for h in dict.fromkeys(hashes) if h not in known]
+                known.update(hashes)
+
+                if fresh:
+                    pd.DataFrame(fresh, columns=COLUMNS).to_csv(
+                        cp.partial_path,
+                        mode="a",
+                        header=not os.path.exists(cp.partial_path),
+                        index=False,
+                    )
+                    nb_new += len(fresh)
+                print(f"  Nouveaux avis : {len(fresh)}")
+
+                # hashes bruts (avant filtre "Voir plus" et dédoublonnage),
+                # enregistrés après le CSV partiel
+                cp.add_seen(new_hashes)
+                cp.last_completed_page = n
+                cp.save()
+
+                # tri par récence : tout ce qui suit est déjà connu
+                if not fresh or (cp.newest_hash is not None and cp.newest_hash in hashes):
+                    print("  Page déjà connue, arrêt de la pagination")
+                    return nb_new, True
+
+            page = wave[-1] + 1
+    finally:
+        crawler.close()
+
+
+@metrics.run("scraping Trustpilot incrémental")
+def scrape_trustpilot_incremental(
+    domain: str,
+    lang: str = "fr",
+    dataset_path: str | None = None,
+    max_pages: int | None = None,
+    concurrency: int = 2,
+    checkpoint_dir: str = CHECKPOINT_DIR,
+    engine: str | None = None,
+    store: ReviewStore | None = None,
+    brand: str | None = None,
+) -> pd.DataFrame:
+    """
+    Scraping incrémental :
+      - ne télécharge que les pages qui contiennent des avis inconnus
+        (comparés au dataset existant et au checkpoint) ;
+      - fusionne les nouveaux avis dans `dataset_path` (même traitement
+        que scrape_trustpilot_to_df : dates, dédoublonnage, tri) ;
+      - après une interruption, reprend à la page suivant la dernière
+        page terminée.
+    Renvoie le dataset fusionné (et le réécrit sur disque). Avec `store`,
+    les avis fusionnés sont aussi enregistrés dans la base d'avis
+    (marque `brand`, par défaut le domaine).
+    """
+    dataset_path = dataset_path or _dataset_path(domain, lang)
+
+    cp = CrawlCheckpoint.load("trustpilot", domain, lang, checkpoint_dir)
+
+    existing = _read_csv(dataset_path) if os.path.exists(dataset_path) else None
+    # avis bruts déjà vus par les crawls précédents (y compris ceux écartés
+    # par le post-traitement) + dataset existant
+    known = cp.load_seen()
+    if existing is not None:
+        known.update(content_key(a) for a in existing["Avis"])
+        print(f"Dataset existant : {len(existing)} avis ({dataset_path})")
+
+    start_page = 1
+    if cp.in_progress and os.path.exists(cp.partial_path):
+        start_page = cp.last_completed_page + 1
+        known.update(content_key(a) for a in _read_csv(cp.partial_path)["Avis"])
+        print(f"Reprise du crawl interrompu à la page {start_page}")
+    elif os.path.exists(cp.partial_path):
+        os.remove(cp.partial_path)
+
+    cp.in_progress = True
+    cp.save()
+
+    nb_new, completed = asyncio.run(
+        _crawl_new_pages(
+            domain, lang, start_page, max_pages, known, cp, concurrency, engine
+        )
+    )
+    print(f"Nouveaux avis récupérés : {nb_new}")
+
+    if not completed:
+        # le checkpoint reste "en cours" : le prochain appel reprendra
+        print("Crawl incomplet, relancer pour reprendre à la dernière page terminée")
+        return existing if existing is not None else pd.DataFrame(columns=COLUMNS)
+
+    # -------------------------------------------------
+    # Fusion avec le dataset existant
+    # -------------------------------------------------
+    new_df = (
+        _read_csv(cp.partial_path)
+        if os.path.exists(cp.partial_path)
+        else pd.DataFrame(columns=COLUMNS)
+    )
+
+    if len(new_df):
+        # les pages sont triées par récence : la 1re ligne est la plus récente
+        cp.newest_hash = content_key(new_df["Avis"].iloc[0])
+        cp.newest_date = new_df["Date_str"].iloc[0]
+
+    merged = new_df if existing is None else pd.concat([new_df, existing], ignore_index=True)
+    merged = _postprocess_reviews(merged)
+    merged.to_csv(dataset_path, index=False)
+    print(f"CSV sauvegardé : {dataset_path} ({len(merged)} avis)")
+    if store is not None:
+        store.upsert(merged, platform="Trustpilot", brand=brand or domain, lang=lang)
+        print(f"Base d'avis mise à jour : {store.db_path}")
+
+    # crawl terminé : on repart de la page 1 la prochaine fois
+    cp.in_progress = False
+    cp.last_completed_page = 0
+    cp.save()
+    if os.path.exists(cp.partial_path):
+        os.remove(cp.partial_path)
+
+    return merged
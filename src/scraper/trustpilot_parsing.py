@@ -0,0 +1,212 @@
+# src/scraper/trustpilot_parsing.py
+
+import json
+import os
+import re
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+try:  # lxml est optionnel : sans lui, on reste sur BeautifulSoup
+    from lxml import etree, html as lxml_html
+except ImportError:  # pragma: no cover
+    etree = lxml_html = None
+
+from src.scraper.trustpilot_scraper import (
+    _clean_title,
+    _parse_total_pages,
+    _reviews_from_soup,
+)
+from src.utils import metrics
+
+# Moteurs disponibles :
+#   - "bs4"      : chemin historique (BeautifulSoup + html.parser)
+#   - "lxml"     : arbre C de lxml + requêtes XPath précompilées
+#   - "nextdata" : lecture directe du JSON __NEXT_DATA__ embarqué par Trustpilot
+#   - "auto"     : lxml s'il est installé, sinon bs4
+ENGINES = ("bs4", "lxml", "nextdata")
+DEFAULT_ENGINE = os.getenv("AVIS_TP_PARSER", "auto")
+
+PAGINATION_SPAN_CLASS = (
+    "typography_heading-xxs__QKBS8 typography_appearance-inherit__D7XqR "
+    "typography_disableResponsiveSizing__OuNP7"
+)
+
+# Mois abrégés tels qu'affichés par Trustpilot ("6 nov. 2025")
+FRENCH_MONTHS_SHORT = [
+    "janv.", "févr.", "mars", "avr.", "mai", "juin",
+    "juil.", "août", "sept.", "oct.", "nov.", "déc.",
+]
+
+NEXT_DATA_RE = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+YEAR_RE = re.compile(r"\d{4}")
+
+
+def resolve_engine(engine: str | None = None) -> str:
+    engine = engine or DEFAULT_ENGINE
+    if engine == "auto":
+        return "lxml" if lxml_html is not None else "bs4"
+    if engine not in ENGINES:
+        raise ValueError(f"moteur inconnu : {engine} (attendu : {', '.join(ENGINES)})")
+    if engine == "lxml" and lxml_html is None:
+        raise ImportError("le moteur 'lxml' nécessite le paquet lxml")
+    return engine
+
+
+# =========================
+#   MOTEUR LXML
+# =========================
+
+if etree is not None:
+    _X_ARTICLES = etree.XPath("//article")
+    _X_TITLE = etree.XPath(".//*[@data-service-review-title-typography]")
+    _X_H2 = etree.XPath(".//h2")
+    _X_TEXT = etree.XPath(".//*[@data-service-review-text-typography]")
+    _X_P = etree.XPath(".//p")
+    _X_DATE = etree.XPath(".//*[@data-service-review-date-of-experience-typography]")
+    _X_TIME = etree.XPath(".//time")
+    _X_STRINGS = etree.XPath("descendant::text()")
+    _X_LAST_PAGE = etree.XPath(
+        '//a[@name="pagination-button-last"]//span[@class=$cls]'
+    )
+
+
+def _lxml_text(el) -> str:
+    # équivalent de BeautifulSoup.get_text(" ", strip=True)
+    return " ".join(s.strip() for s in _X_STRINGS(el) if s.strip())
+
+
+def _first(nodes):
+    return nodes[0] if nodes else None
+
+
+def _extract_from_article_lxml(article) -> tuple[str | None, str | None, str | None]:
+    """Même logique que _extract_from_article, sur un élément lxml."""
+    title_el = _first(_X_TITLE(article))
+    if title_el is None:
+        title_el = _first(_X_H2(article))
+    title = _lxml_text(title_el) if title_el is not None else ""
+
+    text_el = _first(_X_TEXT(article))
+    if text_el is None:
+        for p in _X_P(article):
+            if "date de l'expérience" not in _lxml_text(p).lower():
+                text_el = p
+                break
+
+    if text_el is None:
+        return None, None, None
+
+    review_text = _lxml_text(text_el)
+
+    date_str = ""
+    date_el = _first(_X_DATE(article))
+    if date_el is not None:
+        date_str = _lxml_text(date_el)
+    else:
+        for t in _X_TIME(article):
+            t_text = _lxml_text(t)
+            if YEAR_RE.search(t_text):
+                date_str = t_text
+    date_str = date_str.replace("Date de l'expérience:", "").strip()
+
+    return _clean_title(title), review_text, date_str
+
+
+def _reviews_lxml(page: str) -> list[tuple[str, str, str]]:
+    with metrics.stage("html_parse"):
+        root = lxml_html.fromstring(page)
+    rows = []
+    for art in _X_ARTICLES(root):
+        with metrics.stage("extract_article"):
+            title, review_text, date_str = _extract_from_article_lxml(art)
+        if not review_text:
+            continue
+        rows.append((title or "", review_text, date_str or ""))
+    return rows
+
+
+def _total_pages_lxml(page: str) -> int:
+    span = _first(_X_LAST_PAGE(lxml_html.fromstring(page), cls=PAGINATION_SPAN_CLASS))
+    if span is not None:
+        try:
+            return int(_lxml_text(span))
+        except ValueError:
+            pass
+    return 1
+
+
+# =========================
+#   MOTEUR __NEXT_DATA__
+# =========================
+
+def _next_data(page: str) -> dict:
+    m = NEXT_DATA_RE.search(page)
+    if not m:
+        raise ValueError("pas de bloc __NEXT_DATA__ dans la page")
+    return json.loads(m.group(1))
+
+
+def _format_experience_date(iso: str | None) -> str:
+    """'2025-11-06T00:00:00.000Z' -> '6 nov. 2025' (format affiché)."""
+    if not iso:
+        return ""
+    d = datetime.strptime(iso[:10], "%Y-%m-%d")
+    return f"{d.day} {FRENCH_MONTHS_SHORT[d.month - 1]} {d.year}"
+
+
+def _json_text(s: str | None) -> str:
+    # les retours à la ligne du JSON correspondent aux <br> du HTML
+    if not s:
+        return ""
+    return " ".join(line.strip() for line in s.split("\n") if line.strip())
+
+
+def _reviews_nextdata(page: str) -> list[tuple[str, str, str]]:
+    with metrics.stage("html_parse"):
+        data = _next_data(page)
+    reviews = data.get("props", {}).get("pageProps", {}).get("reviews", [])
+    rows = []
+    with metrics.stage("extract_article", items=len(reviews)):
+        for r in reviews:
+            review_text = _json_text(r.get("text"))
+            if not review_text:
+                continue
+            title = _clean_title(_json_text(r.get("title")))
+            date_str = _format_experience_date((r.get("dates") or {}).get("experiencedDate"))
+            rows.append((title or "", review_text, date_str))
+    return rows
+
+
+def _total_pages_nextdata(page: str) -> int:
+    page_props = _next_data(page).get("props", {}).get("pageProps", {})
+    pagination = page_props.get("filters", {}).get("pagination", {})
+    return int(pagination.get("totalPages") or 1)
+
+
+# =========================
+#   POINTS D'ENTRÉE
+# =========================
+
+def extract_reviews(page: str, engine: str | None = None) -> list[tuple[str, str, str]]:
+    """Renvoie les (titre, texte, date) exploitables d'une page HTML Trustpilot."""
+    engine = resolve_engine(engine)
+    if engine == "lxml":
+        return _reviews_lxml(page)
+    if engine == "nextdata":
+        return _reviews_nextdata(page)
+    with metrics.stage("html_parse"):
+        soup = BeautifulSoup(page, "html.parser")
+    return _reviews_from_soup(soup)
+
+
+def extract_total_pages(page: str, engine: str | None = None) -> int:
+    """Renvoie le nombre total de pages d'avis indiqué dans la page HTML."""
+    engine = resolve_engine(engine)
+    if engine == "lxml":
+        return _total_pages_lxml(page)
+    if engine == "nextdata":
+        return _total_pages_nextdata(page)
+    return _parse_total_pages(BeautifulSoup(page, "html.parser"))
@@ -5,24 +5,48 @@ import requests
 from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime
+from typing import Callable, Iterator
+
+from src.scraper.async_crawler import CrawlSession
+from src.scraper.records import Review
+from src.utils import metrics
+from src.utils.dates import extract_date_strings, parse_dates
+from src.utils.dedup import dedup_reviews
 
 DATE_IN_TEXT_RE = re.compile(r"(\d{1,2}\s+\w+\.?\s+\d{4})")
+# Avis coupés par Trustpilot (texte complet sur une autre page) : écartés
+TRUNCATED_MARK = "Voir plus"
 
 
 # =========================
 #   FONCTIONS UTILITAIRES
 # =========================
 
+def _page_url(domain: str, lang: str, page_number: int) -> str:
+    return (
+        f"https://fr.trustpilot.com/review/{domain}"
+        f"?page={page_number}&languages={lang}&sort=recency"
+    )
+
+
 def get_total_pages(url: str) -> int:
     """
     Récupère le nombre total de pages d'avis à partir de l'URL Trustpilot.
     """
-    r = requests.get(url)
+    with metrics.stage("http_fetch"):
+        r = requests.get(url, timeout=15)
+    metrics.count_fetch(r.status_code)
     if r.status_code != 200:
         print(f"[WARN] get_total_pages: status {r.status_code}, on retourne 1")
         return 1
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    with metrics.stage("html_parse"):
+        soup = BeautifulSoup(r.text, "html.parser")
+    return _parse_total_pages(soup)
+
+
+def _parse_total_pages(soup) -> int:
+    """Lit le numéro de la dernière page dans le HTML déjà parsé."""
     last_page_element = soup.find("a", attrs={"name": "pagination-button-last"})
     if last_page_element:
         span_element = last_page_element.find(
@@ -181,52 +205,215 @@ def _extract_from_article(article) -> tuple[str | None, str | None, str | None]:
     return title, review_text, date_str
 
 
-def scraping_avis_TP(domain: str, nb_pages: int, lang: str):
-    """
-    Scrape les avis Trustpilot pour un domaine donné.
-    On ne dépend plus des classes CSS, on se base sur les attributs data-*
-    et sur des fallbacks raisonnables.
-    """
-    titre_avis_list: list[str] = []
-    avis_list: list[str] = []
-    dates_list: list[str] = []
+def _reviews_from_soup(soup) -> list[tuple[str, str, str]]:
+    """Renvoie les (titre, texte, date) exploitables d'une page déjà parsée."""
+    rows = []
 
-    for page_number in range(1, nb_pages + 1):
-        page_url = (
-            f"https://fr.trustpilot.com/review/{domain}"
-            f"?page={page_number}&languages={lang}&sort=recency"
-        )
-        print(f"Scraping page {page_number} -> {page_url}")
+    for art in soup.find_all("article"):
+        with metrics.stage("extract_article"):
+            title, review_text, date_str = _extract_from_article(art)
 
-        r = requests.get(page_url)
-        if r.status_code != 200:
-            print(f"  [WARN] status {r.status_code}, page ignorée")
+        # On saute si ce n'est pas un avis exploitable
+        if not review_text:
             continue
 
-        soup = BeautifulSoup(r.text, "html.parser")
+        rows.append((title or "", review_text, date_str or ""))
 
-        articles = soup.find_all("article")
-        print(f"  Nombre d'articles trouvés : {len(articles)}")
+    return rows
 
-        for art in articles:
-            title, review_text, date_str = _extract_from_article(art)
 
-            # On saute si ce n'est pas un avis exploitable
-            if not review_text:
+def iter_trustpilot_pages(
+    domain: str,
+    nb_pages: int,
+    lang: str,
+    concurrency: int = 4,
+    rate_per_s: float = 5.0,
+    first_page_html: str | None = None,
+    engine: str | None = None,
+    wave_size: int | None = None,
+    session: CrawlSession | None = None,
+) -> Iterator[tuple[int, list[tuple[str, str, str]]]]:
+    """
+    Générateur : (numéro de page, [(titre, texte, date), ...]) dans l'ordre
+    des pages. Les pages sont téléchargées par vagues de `wave_size` pages
+    (toutes d'un coup par défaut) avec un AsyncCrawler : pool de
+    connexions, `concurrency` requêtes simultanées, `rate_per_s`
+    requêtes/s, réessais sur 429/5xx. Les pages non récupérées sont sautées.
+    Si `first_page_html` est fourni, la page 1 n'est pas retéléchargée.
+    Toutes les vagues passent par la même `session` (créée ici si absente) :
+    le débit `rate_per_s` vaut pour le crawl entier.
+    """
+    page_numbers = list(range(1, nb_pages + 1))
+    to_fetch = [n for n in page_numbers if not (n == 1 and first_page_html is not None)]
+
+    print(f"Téléchargement de {len(to_fetch)} page(s) ({concurrency} en parallèle)")
+    own_session = session is None
+    if own_session:
+        session = CrawlSession(concurrency_per_host=concurrency, rate_per_s=rate_per_s)
+    try:
+        yield from _iter_waves(
+            domain, page_numbers, lang, first_page_html, engine, wave_size, session
+        )
+    finally:
+        if own_session:
+            session.close()
+
+
+def _iter_waves(
+    domain: str,
+    page_numbers: list[int],
+    lang: str,
+    first_page_html: str | None,
+    engine: str | None,
+    wave_size: int | None,
+    session: CrawlSession,
+) -> Iterator[tuple[int, list[tuple[str, str, str]]]]:
+    from src.scraper.trustpilot_parsing import extract_reviews
+
+    wave_size = wave_size or max(len(page_numbers), 1)
+    for wave_start in range(0, len(page_numbers), wave_size):
+        wave = page_numbers[wave_start:wave_start + wave_size]
+        wave_fetch = [n for n in wave if n != 1 or first_page_html is None]
+        fetched = session.fetch_all([_page_url(domain, lang, n) for n in wave_fetch])
+        pages = dict(zip(wave_fetch, fetched))
+        if first_page_html is not None and 1 in wave:
+            pages[1] = first_page_html
+
+        for page_number in wave:
+            html = pages.pop(page_number, None)
+            print(f"Scraping page {page_number} -> {_page_url(domain, lang, page_number)}")
+            if html is None:
+                print("  [WARN] page non récupérée, page ignorée")
                 continue
 
-            titre_avis_list.append(title or "")
+            rows = extract_reviews(html, engine)
+            print(f"  Nombre d'avis trouvés : {len(rows)}")
+            yield page_number, rows
+
+
+def scraping_avis_TP(
+    domain: str,
+    nb_pages: int,
+    lang: str,
+    concurrency: int = 4,
+    rate_per_s: float = 5.0,
+    first_page_html: str | None = None,
+    engine: str | None = None,
+    on_page: Callable[[int, list[tuple[str, str, str]]], None] | None = None,
+    session: CrawlSession | None = None,
+):
+    """
+    Scrape les avis Trustpilot pour un domaine donné.
+    On ne dépend plus des classes CSS, on se base sur les attributs data-*
+    et sur des fallbacks raisonnables.
+
+    Les pages sont téléchargées en parallèle (cf. iter_trustpilot_pages),
+    puis parsées dans l'ordre : les lignes sont les mêmes qu'avec
+    l'ancienne boucle séquentielle.
+    `engine` choisit le moteur d'extraction (voir trustpilot_parsing).
+    `on_page(numéro, lignes)` est appelé après chaque page parsée ; les
+    pages sont alors téléchargées par vagues de `concurrency` pages pour
+    que les résultats arrivent au fil du crawl.
+    """
+    titre_avis_list: list[str] = []
+    avis_list: list[str] = []
+    dates_list: list[str] = []
+
+    pages = iter_trustpilot_pages(
+        domain,
+        nb_pages,
+        lang,
+        concurrency=concurrency,
+        rate_per_s=rate_per_s,
+        first_page_html=first_page_html,
+        engine=engine,
+        wave_size=concurrency if on_page is not None else None,
+        session=session,
+    )
+    for page_number, rows in pages:
+        for title, review_text, date_str in rows:
+            titre_avis_list.append(title)
             avis_list.append(review_text)
-            dates_list.append(date_str or "")
+            dates_list.append(date_str)
+        if on_page is not None:
+            on_page(page_number, rows)
 
     return titre_avis_list, avis_list, dates_list
 
 
+def iter_trustpilot_reviews(
+    domain: str,
+    lang: str = "fr",
+    max_pages: int | None = None,
+    engine: str | None = None,
+    concurrency: int = 4,
+    rate_per_s: float = 5.0,
+) -> Iterator[Review]:
+    """
+    Générateur d'avis Trustpilot (Review), page par page : seules
+    `concurrency` pages sont en mémoire à la fois, quelle que soit la
+    taille du domaine. Voir src/scraper/records.py pour les consommateurs
+    (DataFrames par paquets, dédoublonnage en flux).
+    La page 1 et toutes les vagues partagent le même crawler.
+    """
+    with CrawlSession(concurrency_per_host=concurrency, rate_per_s=rate_per_s) as session:
+        first_page_html, nb_pages = _first_page(domain, lang, max_pages, engine, session)
+        pages = iter_trustpilot_pages(
+            domain,
+            nb_pages,
+            lang,
+            concurrency=concurrency,
+            rate_per_s=rate_per_s,
+            first_page_html=first_page_html,
+            engine=engine,
+            wave_size=concurrency,
+            session=session,
+        )
+        for page_number, rows in pages:
+            for title, review_text, date_str in rows:
+                # même filtre que _postprocess_reviews : pas d'avis tronqués
+                if isinstance(review_text, str) and TRUNCATED_MARK in review_text:
+                    continue
+                yield Review("Trustpilot", domain, page_number, review_text, title, date_str)
+
+
 # =========================
 #   PIPELINE COMPLÈTE
 # =========================
 
-def scrape_trustpilot_to_df(domain: str, lang: str = "fr", max_pages: int | None = None):
+def _first_page(
+    domain: str,
+    lang: str,
+    max_pages: int | None,
+    engine: str | None,
+    session: CrawlSession,
+) -> tuple[str | None, int]:
+    """Page 1 (ou None) et nombre de pages à scraper."""
+    from src.scraper.trustpilot_parsing import extract_total_pages
+
+    # La page 1 sert à la fois au nombre de pages et aux premiers avis :
+    # on ne la télécharge qu'une fois.
+    first_page_html = session.fetch_all([_page_url(domain, lang, 1)])[0]
+    if first_page_html is None:
+        print("[WARN] get_total_pages: page 1 inaccessible, on retourne 1")
+        nb_pages = 1
+    else:
+        nb_pages = extract_total_pages(first_page_html, engine)
+    if max_pages is not None:
+        nb_pages = min(nb_pages, max_pages)
+
+    print(f"Nombre total de pages : {nb_pages}")
+    return first_page_html, nb_pages
+
+
+@metrics.run("scraping Trustpilot")
+def scrape_trustpilot_to_df(
+    domain: str,
+    lang: str = "fr",
+    max_pages: int | None = None,
+    engine: str | None = None,
+    on_page: Callable[[int, int, list[tuple[str, str, str]]], None] | None = None,
+):
     """
     Pipeline complet :
       - récupère le nombre de pages
@@ -234,15 +421,22 @@ def scrape_trustpilot_to_df(domain: str, lang: str = "fr", max_pages: int | None
       - nettoie le texte
       - convertit les dates
       - renvoie un DataFrame trié et dédoublonné
+    `on_page(numéro, nombre de pages, lignes)` est appelé à chaque page
+    parsée (suivi de progression, enregistrement au fil de l'eau).
+    Pour un domaine très volumineux, préférer iter_trustpilot_reviews.
     """
-    base_url = f"https://fr.trustpilot.com/review/{domain}?languages={lang}&sort=recency"
-    nb_pages = get_total_pages(base_url)
-    if max_pages is not None:
-        nb_pages = min(nb_pages, max_pages)
-
-    print(f"Nombre total de pages : {nb_pages}")
-
-    titres, avis, dates = scraping_avis_TP(domain, nb_pages, lang)
+    with CrawlSession() as session:
+        first_page_html, nb_pages = _first_page(domain, lang, max_pages, engine, session)
+
+        titres, avis, dates = scraping_avis_TP(
+            domain,
+            nb_pages,
+            lang,
+            first_page_html=first_page_html,
+            engine=engine,
+            on_page=None if on_page is None else lambda n, rows: on_page(n, nb_pages, rows),
+            session=session,
+        )
 
     print("Taille titres :", len(titres))
     print("Taille avis   :", len(avis))
@@ -252,54 +446,40 @@ def scrape_trustpilot_to_df(domain: str, lang: str = "fr", max_pages: int | None
         {"Titre de l'avis": titres, "Avis": avis, "Date_str": dates}
     )
 
+    return _postprocess_reviews(df)
+
+
+def _postprocess_reviews(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Etapes communes après le scraping (ou la fusion avec un dataset existant) :
+    filtre "Voir plus", dates, dédoublonnage, tri du plus récent au plus ancien.
+    Attend les colonnes "Titre de l'avis", "Avis" et "Date_str".
+    """
     # -------------------------------------------------
     # 1) On enlève les avis tronqués avec "Voir plus"
     # -------------------------------------------------
-    df = df[~df["Avis"].str.contains("Voir plus", na=False)].copy()
+    df = df[~df["Avis"].str.contains(TRUNCATED_MARK, na=False, regex=False)].copy()
 
     # -------------------------------------------------
     # 2) On nettoie Date_str : on garde uniquement "12 janv. 2025"
     #    même si la chaîne contient "Actualisé le ..."
     # -------------------------------------------------
-    def extract_date_str(s: str) -> str:
-        if not s:
-            return ""
-        m = DATE_IN_TEXT_RE.search(s)
-        return m.group(1) if m else s
-
-    df["Date_str"] = df["Date_str"].astype(str).apply(extract_date_str)
+    #    (vectorisé sur toute la colonne, cf. src/utils/dates.py)
+    df["Date_str"] = extract_date_strings(df["Date_str"])
 
     # -------------------------------------------------
-    # 3) Conversion en datetime
+    # 3) Conversion en datetime (gère aussi "il y a 3 jours", "hier"...)
     # -------------------------------------------------
-    df["Date"] = df["Date_str"].apply(parse_date)
+    df["Date"] = parse_dates(df["Date_str"])
 
     # -------------------------------------------------
     # 4) On dédoublonne :
-    #    - on garde, pour chaque texte d'avis,
-    #      la ligne qui a un titre non vide en priorité
+    #    - quasi-doublons (casse, ponctuation, emojis, blancs, troncature)
+    #      détectés par MinHash / LSH, cf. src/utils/dedup.py
+    #    - on garde, pour chaque avis, la ligne avec titre en priorité,
+    #      puis la plus récente
     # -------------------------------------------------
-        # 4) Dédoublonnage
-    #    - on normalise le texte (on enlève les \n, espaces multiples…)
-    #    - on garde, pour chaque avis normalisé, la ligne avec titre en priorité
-    df["Avis_norm"] = (
-        df["Avis"]
-        .astype(str)
-        .str.replace(r"\s+", " ", regex=True)  # remplace tous les espaces/blancs par un seul espace
-        .str.strip()
-    )
-
-    df["has_title"] = df["Titre de l'avis"].fillna("").str.strip().ne("")
-
-    df = (
-        df.sort_values(
-            by=["Avis_norm", "has_title", "Date"],
-            ascending=[True, False, False]
-        )
-        .drop_duplicates(subset=["Avis_norm"])
-        .drop(columns=["has_title", "Avis_norm"])
-        .reset_index(drop=True)
-    )
+    df = dedup_reviews(df).reset_index(drop=True)
 
 
     # -------------------------------------------------
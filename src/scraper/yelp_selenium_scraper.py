@@ -2,84 +2,205 @@
 
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator
+
 import pandas as pd
 from bs4 import BeautifulSoup
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from src.scraper.driver_pool import DriverPool, new_driver
+from src.scraper.records import Review
+from src.utils import metrics
+
+# Les avis textuels sont dans des spans raw__09f24__xxx
+REVIEW_SPAN_CSS = "span[class*='raw__09f24__']"
+REVIEW_SPAN_CLASS_RE = re.compile(r"raw__09f24__")
 
 
-def _init_driver(headless: bool = True):
+def _init_driver(headless: bool = True, block_assets: bool = True):
     """Initialise un driver Chrome avec des options raisonnables."""
-    options = webdriver.ChromeOptions()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/120.0.0.0 Safari/537.36"
-    )
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-    return driver
+    return new_driver(headless=headless, block_assets=block_assets)
 
 
-def scrape_yelp_reviews_selenium(
-    business_url: str,
-    max_pages: int = 1,
-    sleep_between: float = 2.0,
-    headless: bool = True,
-) -> pd.DataFrame:
+def _page_url(business_url: str, page: int) -> str:
+    start = page * 10
+    sep = "&" if "?" in business_url else "?"
+    return f"{business_url}{sep}start={start}"
+
+
+def _scrape_page(driver, url: str, wait_timeout: float = 10.0) -> list[str]:
     """
-    Scrape UNIQUEMENT les textes d'avis Yelp pour une page business donnée.
+    Charge une page d'avis et renvoie les textes d'avis.
+    On attend explicitement l'apparition des spans d'avis au lieu d'un
+    time.sleep fixe (au plus `wait_timeout` secondes).
     """
+    # chargement + rendu de la page par le navigateur
+    with metrics.stage("http_fetch"):
+        driver.get(url)
+        try:
+            WebDriverWait(driver, wait_timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, REVIEW_SPAN_CSS))
+            )
+        except TimeoutException:
+            print(f"  [WARN] pas d'avis après {wait_timeout}s : {url}")
 
-    driver = _init_driver(headless=headless)
-    all_texts: list[str] = []
+    with metrics.stage("html_parse"):
+        soup = BeautifulSoup(driver.page_source, "html.parser")
+    span_texts = soup.find_all("span", class_=REVIEW_SPAN_CLASS_RE)
+    print(f"  Nombre de spans trouvés : {len(span_texts)}")
 
-    try:
-        for page in range(max_pages):
-            start = page * 10
-            sep = "&" if "?" in business_url else "?"
-            url = f"{business_url}{sep}start={start}"
+    texts = []
+    for sp in span_texts:
+        txt = sp.get_text(" ", strip=True)
+        if not txt:
+            continue
 
-            print(f"Scraping page {page + 1} -> {url}")
+        # garder uniquement de vrais avis : longueur minimale 80 caractères
+        if len(txt) < 80:
+            continue
 
-            driver.get(url)
-            time.sleep(sleep_between)
+        texts.append(txt)
 
-            html = driver.page_source
-            soup = BeautifulSoup(html, "html.parser")
+    return texts
 
-            # Les avis textuels sont dans des spans raw__09f24__xxx
-            span_texts = soup.find_all("span", class_=re.compile(r"raw__09f24__"))
-            print(f"  Nombre de spans trouvés : {len(span_texts)}")
 
-            nb_added = 0
-            for sp in span_texts:
-                txt = sp.get_text(" ", strip=True)
-                if not txt:
-                    continue
+def iter_yelp_pages(
+    business_url: str,
+    max_pages: int = 1,
+    sleep_between: float = 0.0,
+    headless: bool = True,
+    wait_timeout: float = 10.0,
+    pool: DriverPool | None = None,
+) -> Iterator[tuple[int, list[str]]]:
+    """
+    Générateur : (numéro de page à partir de 1, textes) dans l'ordre des
+    pages, jusqu'à la 1re page vide (incluse) ou `max_pages`.
+
+    Sans `pool`, un navigateur est lancé pour le parcours et les pages sont
+    lues une par une. Avec un DriverPool, les navigateurs déjà chauds sont
+    réutilisés et les pages (offsets start=0,10,...) sont lues en parallèle
+    par vagues de `pool.size` pages.
+    `sleep_between` est une pause de politesse optionnelle entre deux pages.
+    """
+    if pool is None:
+        driver = _init_driver(headless=headless)
+        try:
+            for page in range(max_pages):
+                url = _page_url(business_url, page)
+                print(f"Scraping page {page + 1} -> {url}")
+
+                texts = _scrape_page(driver, url, wait_timeout)
+                print(f"  Avis ajoutés sur cette page : {len(texts)}")
+                yield page + 1, texts
+
+                if not texts:
+                    break
+                if sleep_between:
+                    time.sleep(sleep_between)
+        finally:
+            driver.quit()
+        return
+
+    def scrape_one(page: int) -> list[str]:
+        url = _page_url(business_url, page)
+        print(f"Scraping page {page + 1} -> {url}")
+        with pool.driver() as driver:
+            texts = _scrape_page(driver, url, wait_timeout)
+            if sleep_between:
+                time.sleep(sleep_between)
+        print(f"  Avis ajoutés sur la page {page + 1} : {len(texts)}")
+        return texts
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        for wave_start in range(0, max_pages, pool.size):
+            wave = range(wave_start, min(wave_start + pool.size, max_pages))
+            # map conserve l'ordre des pages
+            for page, texts in zip(wave, executor.map(scrape_one, wave)):
+                yield page + 1, texts
+                if not texts:
+                    return
+
+
+def iter_yelp_reviews(
+    business_url: str,
+    max_pages: int = 1,
+    sleep_between: float = 0.0,
+    headless: bool = True,
+    wait_timeout: float = 10.0,
+    pool: DriverPool | None = None,
+) -> Iterator[Review]:
+    """
+    Générateur d'avis Yelp (Review), page par page (cf. iter_yelp_pages et
+    src/scraper/records.py pour les consommateurs).
+    """
+    pages = iter_yelp_pages(business_url, max_pages, sleep_between, headless, wait_timeout, pool)
+    for page, texts in pages:
+        for text in texts:
+            yield Review("Yelp", business_url, page, text)
 
-                # garder uniquement de vrais avis : longueur minimale 80 caractères
-                if len(txt) < 80:
-                    continue
 
-                all_texts.append(txt)
-                nb_added += 1
+@metrics.run("scraping Yelp")
+def scrape_yelp_reviews_selenium(
+    business_url: str,
+    max_pages: int = 1,
+    sleep_between: float = 0.0,
+    headless: bool = True,
+    wait_timeout: float = 10.0,
+    pool: DriverPool | None = None,
+    on_page: Callable[[int, list[str]], None] | None = None,
+) -> pd.DataFrame:
+    """
+    Scrape UNIQUEMENT les textes d'avis Yelp pour une page business donnée
+    (parcours des pages : cf. iter_yelp_pages).
+    `on_page(numéro, textes)` est appelé pour chaque page lue (numéro à
+    partir de 1, dans l'ordre des pages).
+    """
+    all_texts: list[str] = []
 
-            print(f"  Avis ajoutés sur cette page : {nb_added}")
+    pages = iter_yelp_pages(business_url, max_pages, sleep_between, headless, wait_timeout, pool)
+    for page, texts in pages:
+        if on_page is not None:
+            on_page(page, texts)
+        all_texts.extend(texts)
 
-            if nb_added == 0:
-                break
+    return pd.DataFrame({"Avis": all_texts})
 
-    finally:
-        driver.quit()
 
-    df = pd.DataFrame({"Avis": all_texts})
-    return df
+@metrics.run("scraping Yelp (plusieurs établissements)")
+def scrape_yelp_many(
+    business_urls: list[str],
+    max_pages: int = 1,
+    pool_size: int = 2,
+    headless: bool = True,
+    wait_timeout: float = 10.0,
+) -> pd.DataFrame:
+    """
+    Scrape plusieurs établissements Yelp en parallèle avec un pool de
+    `pool_size` navigateurs (chaque établissement est paginé sur un navigateur).
+    Renvoie un DataFrame avec les colonnes "business_url" et "Avis".
+    """
+    with DriverPool(size=pool_size, headless=headless) as pool:
+
+        def scrape_business(url: str) -> pd.DataFrame:
+            texts: list[str] = []
+            with pool.driver() as driver:
+                for page in range(max_pages):
+                    page_url = _page_url(url, page)
+                    print(f"Scraping page {page + 1} -> {page_url}")
+                    page_texts = _scrape_page(driver, page_url, wait_timeout)
+                    if not page_texts:
+                        break
+                    texts.extend(page_texts)
+            return pd.DataFrame({"business_url": url, "Avis": texts})
+
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            frames = list(executor.map(scrape_business, business_urls))
+
+    if not frames:
+        return pd.DataFrame(columns=["business_url", "Avis"])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,228 @@
+# src/utils/cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any
+
+
+def content_key(text: str, *parts: str) -> str:
+    """
+    Clé de cache adressée par le contenu : sha256 du texte normalisé
+    (NFKC + espaces réduits) suivi des `parts` (nom du modèle, version...).
+    Deux avis qui ne diffèrent que par les blancs partagent la même clé.
+    """
+    if not isinstance(text, str):
+        text = ""
+    norm = " ".join(unicodedata.normalize("NFKC", text).split())
+
+    h = hashlib.sha256()
+    for chunk in (norm, *parts):
+        h.update(chunk.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+# Purge des entrées disque expirées : à l'ouverture puis au plus toutes les
+# PURGE_EVERY_S secondes (lors d'une écriture)
+PURGE_EVERY_S = 600.0
+
+
+class ResultCache:
+    """
+    Cache de résultats à deux niveaux :
+      - LRU en mémoire, borné en taille et avec expiration (TTL) ;
+      - niveau disque SQLite optionnel (`db_path`), qui survit aux redémarrages,
+        borné à `max_disk_rows` entrées (les plus anciennes sont supprimées)
+        et purgé des entrées expirées.
+
+    Les valeurs doivent être sérialisables en JSON (niveau disque).
+    Les compteurs permettent d'estimer le temps de calcul économisé.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_s: float | None = 24 * 3600,
+        db_path: str | None = None,
+        max_disk_rows: int = 100_000,
+    ):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.max_disk_rows = max_disk_rows
+
+        self._mem: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db: sqlite3.Connection | None = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+            self._db.commit()
+
+        self._disk_rows = 0
+        self._last_purge = 0.0
+        if self._db is not None:
+            with self._lock:
+                self._purge(time.time())
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.compute_s = 0.0  # temps passé à calculer les valeurs manquantes
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_s is not None and now - created > self.ttl_s
+
+    def get(self, key: str) -> Any | None:
+        """Renvoie la valeur en cache ou None (et compte hit / miss)."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._mem.move_to_end(key)
+                    self.hits_memory += 1
+                    return value
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and not self._expired(row[1], now):
+                    value = json.loads(row[0])
+                    self._put_mem(key, value, row[1])
+                    self.hits_disk += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: list[str], batch: int = 500) -> list[Any | None]:
+        """
+        Version groupée de get() : une requête disque par paquet de `batch`
+        clés absentes de la mémoire. Renvoie les valeurs (ou None) dans
+        l'ordre de `keys`.
+        """
+        now = time.time()
+        values: list[Any | None] = [None] * len(keys)
+
+        with self._lock:
+            missing: dict[str, list[int]] = {}
+            for i, key in enumerate(keys):
+                entry = self._mem.get(key)
+                if entry is not None:
+                    created, value = entry
+                    if not self._expired(created, now):
+                        self._mem.move_to_end(key)
+                        self.hits_memory += 1
+                        values[i] = value
+                        continue
+                    del self._mem[key]
+                missing.setdefault(key, []).append(i)
+
+            if self._db is not None and missing:
+                wanted = list(missing)
+                for start in range(0, len(wanted), batch):
+                    part = wanted[start:start + batch]
+                    rows = self._db.execute(
+                        f"SELECT key, value, created FROM cache WHERE key IN ({', '.join('?' * len(part))})",
+                        part,
+                    )
+                    for key, raw, created in rows:
+                        if self._expired(created, now):
+                            continue
+                        value = json.loads(raw)
+                        self._put_mem(key, value, created)
+                        for i in missing.pop(key):
+                            values[i] = value
+                            self.hits_disk += 1
+
+            self.misses += sum(len(idx) for idx in missing.values())
+        return values
+
+    def _put_mem(self, key: str, value: Any, created: float) -> None:
+        self._mem[key] = (created, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+
+    def set(self, key: str, value: Any, compute_s: float = 0.0) -> None:
+        """Ajoute une valeur ; `compute_s` = temps qu'il a fallu pour la calculer."""
+        self.set_many([(key, value)], compute_s=compute_s)
+
+    def set_many(self, items: list[tuple[str, Any]], compute_s: float = 0.0) -> None:
+        """
+        Ajoute des couples (clé, valeur) : une seule transaction sur le disque.
+        `compute_s` = temps de calcul de chaque valeur.
+        """
+        if not items:
+            return
+        now = time.time()
+        rows = [] if self._db is None else [
+            (key, json.dumps(value, ensure_ascii=False), now) for key, value in items
+        ]
+        with self._lock:
+            self.compute_s += compute_s * len(items)
+            for key, value in items:
+                self._put_mem(key, value, now)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, created) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+                # majorant : les remplacements sont comptés comme des ajouts
+                self._disk_rows += len(rows)
+                if self._disk_rows > self.max_disk_rows or now - self._last_purge > PURGE_EVERY_S:
+                    self._purge(now)
+
+    def _purge(self, now: float) -> None:
+        """Supprime les entrées disque expirées puis les plus anciennes au-delà de max_disk_rows."""
+        if self.ttl_s is not None:
+            self._db.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl_s,))
+        self._disk_rows = self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        excess = self._disk_rows - self.max_disk_rows
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM cache WHERE key IN"
+                " (SELECT key FROM cache ORDER BY created LIMIT ?)",
+                (excess,),
+            )
+            self._disk_rows -= excess
+        self._db.commit()
+        self._last_purge = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+                self._disk_rows = 0
+
+    def stats(self) -> dict:
+        """Compteurs hit / miss et estimation du temps de calcul économisé."""
+        hits = self.hits_memory + self.hits_disk
+        total = hits + self.misses
+        avg_compute_s = self.compute_s / self.misses if self.misses else 0.0
+        return {
+            "size": len(self._mem),
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "compute_s": round(self.compute_s, 4),
+            "saved_s_estimate": round(hits * avg_compute_s, 4),
+        }
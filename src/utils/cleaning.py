@@ -1,8 +1,46 @@
 # src/cleaning.py
 
+import os
 import re
 import unicodedata
-from langdetect import detect, LangDetectException
+from concurrent.futures import ProcessPoolExecutor
+
+from langdetect import DetectorFactory, detect, LangDetectException
+
+from src.utils import metrics
+
+# langdetect est aléatoire par défaut : on fixe la graine pour que
+# le même texte donne toujours la même langue (y compris entre processus)
+DetectorFactory.seed = 0
+
+# Regex compilées une seule fois (et non à chaque appel)
+EMOJI_RE = re.compile("["
+    u"\U0001F600-\U0001F64F"
+    u"\U0001F300-\U0001F5FF"
+    u"\U0001F680-\U0001F6FF"
+    u"\U0001F1E0-\U0001F1FF"
+    "]+", flags=re.UNICODE)
+URL_RE = re.compile(r"http\S+|www\.\S+")
+SPACES_RE = re.compile(r"\s+")
+# l'apostrophe reste collée au mot qui la précède : "j'ai" -> "j'", "ai"
+WORD_RE = re.compile(r"[a-zàâäçéèêëîïôöùûüÿœ]+'?")
+
+# En dessous de ce nombre d'avis, un pool de processus coûte plus qu'il ne
+# rapporte : démarrer un pool pour un seul appel est cher (PARALLEL_MIN_ITEMS),
+# un pool déjà ouvert et réutilisé (cf. process_pool) l'est beaucoup moins
+PARALLEL_MIN_ITEMS = 5_000
+POOL_MIN_ITEMS = 500
+# Textes "courts" pour lesquels on tente d'abord l'heuristique rapide
+SHORT_TEXT_MAX_LEN = 40
+
+FR_STOPWORDS = frozenset(
+    "le la les un une des du de et est pas très tres pour avec dans sur "
+    "je j' c' qu' n' nous vous il elle ce cette ça mais ou qui que bien trop merci".split()
+)
+EN_STOPWORDS = frozenset(
+    "the an and is are was not very for with in on i we you it this "
+    "but or who that good great bad thanks thank".split()
+)
 
 
 def clean_text(text: str) -> str:
@@ -14,13 +52,7 @@ def clean_text(text: str) -> str:
     text = unicodedata.normalize("NFKC", text)
 
     # Supprimer les emojis
-    emoji_pattern = re.compile("[" 
-        u"\U0001F600-\U0001F64F"
-        u"\U0001F300-\U0001F5FF"
-        u"\U0001F680-\U0001F6FF"
-        u"\U0001F1E0-\U0001F1FF"
-        "]+", flags=re.UNICODE)
-    text = emoji_pattern.sub(" ", text)
+    text = EMOJI_RE.sub(" ", text)
 
     # Enlever les guillemets au début / à la fin
     text = text.strip()
@@ -31,10 +63,10 @@ def clean_text(text: str) -> str:
     text = text.replace("\n", " ")
 
     # Supprimer les URLs
-    text = re.sub(r"http\S+|www\.\S+", "", text)
+    text = URL_RE.sub("", text)
 
     # Réduire les espaces multiples
-    text = re.sub(r"\s+", " ", text).strip()
+    text = SPACES_RE.sub(" ", text).strip()
 
     return text
 
@@ -45,3 +77,90 @@ def detect_language(text: str) -> str:
         return detect(text)
     except LangDetectException:
         return "unknown"
+
+
+def _guess_short_language(text: str) -> str | None:
+    """
+    Heuristique pour les textes courts (où langdetect est lent à démarrer
+    et peu fiable) : on compte les mots outils fr / en.
+    Renvoie None si ce n'est pas concluant.
+    """
+    words = WORD_RE.findall(text.lower())
+    fr = sum(w in FR_STOPWORDS for w in words)
+    en = sum(w in EN_STOPWORDS for w in words)
+    if fr > en:
+        return "fr"
+    if en > fr:
+        return "en"
+    return None
+
+
+def _detect_language_fast(text: str) -> str:
+    if isinstance(text, str) and len(text) <= SHORT_TEXT_MAX_LEN:
+        guess = _guess_short_language(text)
+        if guess is not None:
+            return guess
+    return detect_language(text)
+
+
+def process_pool(workers: int | None = None) -> ProcessPoolExecutor | None:
+    """
+    Pool de processus à réutiliser d'un appel à l'autre (clean_texts(...,
+    pool=...)), par exemple sur tous les morceaux d'un gros CSV. None si un
+    seul processus est demandé. À fermer par l'appelant (shutdown()).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _map(fn, texts: list[str], workers: int | None, pool: ProcessPoolExecutor | None = None) -> list:
+    if pool is not None:
+        if len(texts) < POOL_MIN_ITEMS:
+            return [fn(t) for t in texts]
+        chunksize = max(1, len(texts) // ((os.cpu_count() or 1) * 4))
+        return list(pool.map(fn, texts, chunksize=chunksize))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(texts) < PARALLEL_MIN_ITEMS:
+        return [fn(t) for t in texts]
+
+    # gros volumes : on répartit sur plusieurs cœurs (le GIL bloque les threads)
+    chunksize = max(1, len(texts) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, texts, chunksize=chunksize))
+
+
+def clean_texts(
+    texts: list[str],
+    workers: int | None = None,
+    pool: ProcessPoolExecutor | None = None,
+) -> list[str]:
+    """
+    clean_text sur une liste d'avis. Au-delà de PARALLEL_MIN_ITEMS avis,
+    le travail est réparti sur `workers` processus (tous les cœurs par défaut) ;
+    avec `pool` (cf. process_pool), dès POOL_MIN_ITEMS avis, sur ce pool.
+    """
+    texts = list(texts)
+    with metrics.stage("clean_text", items=len(texts)):
+        return _map(clean_text, texts, workers, pool)
+
+
+def detect_languages(
+    texts: list[str],
+    workers: int | None = None,
+    fast_short: bool = False,
+    pool: ProcessPoolExecutor | None = None,
+) -> list[str]:
+    """
+    detect_language sur une liste d'avis (déterministe, cf. DetectorFactory.seed).
+    Avec `fast_short`, les textes courts passent d'abord par une heuristique
+    sur les mots outils fr / en avant de recourir à langdetect.
+    """
+    fn = _detect_language_fast if fast_short else detect_language
+    texts = list(texts)
+    with metrics.stage("detect_language", items=len(texts)):
+        return _map(fn, texts, workers, pool)
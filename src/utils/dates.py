@@ -0,0 +1,113 @@
+# src/utils/dates.py
+
+import re
+from datetime import datetime
+
+import pandas as pd
+
+# "12 janv. 2025", y compris dans "Actualisé le 12 janv. 2025"
+DATE_IN_TEXT_RE = re.compile(r"(\d{1,2}\s+\w+\.?\s+\d{4})")
+DATE_PARTS_RE = re.compile(r"(\d{1,2})\s+(\w+\.?)\s+(\d{4})")
+
+# "il y a 3 jours", "il y a une semaine", "3 days ago", "hier"...
+RELATIVE_RE = re.compile(
+    r"(?:il y a\s+)?(\d+|un|une|a|an|one)\s+"
+    r"(minute|heure|hour|jour|day|semaine|week|mois|month|an|année|year)s?"
+    r"(?:\s+ago)?",
+)
+
+# Mois (FR + EN, complets et abrégés) -> numéro
+MONTH_NUMBERS = {
+    "janvier": 1, "janv.": 1, "january": 1,
+    "février": 2, "fevrier": 2, "févr.": 2, "fevr.": 2, "february": 2,
+    "mars": 3, "march": 3,
+    "avril": 4, "avr.": 4, "april": 4,
+    "mai": 5, "may": 5,
+    "juin": 6, "june": 6,
+    "juillet": 7, "juil.": 7, "july": 7,
+    "août": 8, "aout": 8, "august": 8,
+    "septembre": 9, "sept.": 9, "september": 9,
+    "octobre": 10, "oct.": 10, "october": 10,
+    "novembre": 11, "nov.": 11, "november": 11,
+    "décembre": 12, "decembre": 12, "déc.": 12, "dec.": 12, "december": 12,
+}
+
+RELATIVE_UNITS = {
+    "minute": pd.Timedelta(minutes=1),
+    "heure": pd.Timedelta(hours=1),
+    "hour": pd.Timedelta(hours=1),
+    "jour": pd.Timedelta(days=1),
+    "day": pd.Timedelta(days=1),
+    "semaine": pd.Timedelta(weeks=1),
+    "week": pd.Timedelta(weeks=1),
+    "mois": pd.Timedelta(days=30),
+    "month": pd.Timedelta(days=30),
+    "an": pd.Timedelta(days=365),
+    "année": pd.Timedelta(days=365),
+    "year": pd.Timedelta(days=365),
+}
+
+RELATIVE_DAYS = {"aujourd'hui": 0, "aujourd’hui": 0, "today": 0, "hier": 1, "yesterday": 1}
+
+
+def extract_date_strings(s: pd.Series) -> pd.Series:
+    """
+    Garde uniquement la date ("12 janv. 2025") quand la chaîne contient
+    autre chose (ex : "Actualisé le 12 janv. 2025"), sur toute la colonne.
+    Les chaînes sans date sont conservées telles quelles.
+    """
+    s = s.fillna("").astype(str)
+    codes, uniques = pd.factorize(s)
+    uniques = pd.Series(uniques, dtype=object)
+    extracted = uniques.str.extract(DATE_IN_TEXT_RE, expand=False).fillna(uniques)
+    return pd.Series(extracted.to_numpy()[codes], index=s.index, dtype=s.dtype)
+
+
+def _relative_dates(s: pd.Series, now: pd.Timestamp) -> pd.Series:
+    """Dates relatives ("il y a 3 jours", "hier"...) -> Timestamp (NaT sinon)."""
+    parts = s.str.extract(RELATIVE_RE)
+    count = parts[0].replace({"un": "1", "une": "1", "a": "1", "an": "1", "one": "1"})
+    unit = parts[1].map(RELATIVE_UNITS)
+    delta = pd.to_numeric(count, errors="coerce") * unit
+
+    days = s.str.strip().map(RELATIVE_DAYS)
+    delta = delta.fillna(pd.to_timedelta(days, unit="D"))
+
+    return (now - delta).dt.normalize()
+
+
+def parse_dates(s: pd.Series, now: datetime | None = None) -> pd.Series:
+    """
+    Version vectorisée de parse_date sur toute une colonne :
+      - ne traite qu'une fois chaque valeur distincte (les dates se
+        répètent énormément d'un avis à l'autre) ;
+      - extrait jour / mois / année avec une seule regex compilée ;
+      - traduit le mois via une table de correspondance (FR + EN) ;
+      - parse avec pd.to_datetime et un format explicite ;
+      - gère aussi "Actualisé le ..." et les dates relatives
+        ("il y a 3 jours", "hier"), calculées par rapport à `now`.
+    Les valeurs non reconnues donnent NaT.
+    """
+    codes, uniques = pd.factorize(s.fillna("").astype(str))
+    parsed = _parse_unique(pd.Series(uniques).str.lower(), now)
+    return pd.Series(parsed.to_numpy()[codes], index=s.index)
+
+
+def _parse_unique(s: pd.Series, now: datetime | None) -> pd.Series:
+    parts = s.str.extract(DATE_PARTS_RE)
+    month = parts[1].map(MONTH_NUMBERS)
+    iso = (
+        parts[2]
+        + "-"
+        + month.astype("Int64").astype(str).str.zfill(2)
+        + "-"
+        + parts[0].str.zfill(2)
+    )
+    dates = pd.to_datetime(iso, format="%Y-%m-%d", errors="coerce")
+
+    missing = dates.isna() & s.ne("")
+    if missing.any():
+        now_ts = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+        dates = dates.fillna(_relative_dates(s[missing], now_ts))
+
+    return dates
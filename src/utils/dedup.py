@@ -0,0 +1,279 @@
+# src/utils/dedup.py
+"""
+Détection de quasi-doublons d'avis (MinHash + LSH), toutes plateformes
+et marques confondues.
+
+Deux avis sont considérés comme le même avis si, après normalisation
+(casse, ponctuation, emojis, blancs, "Voir plus" / "Lire la suite" final) :
+  - leurs textes sont identiques ;
+  - ou leurs signatures MinHash (shingles de caractères) estiment une
+    similarité de Jaccard >= `threshold` ;
+  - ou ils partagent les PREFIX_CHARS premiers caractères (avis tronqué).
+
+L'index vit dans SQLite (fichier temporaire par défaut, ou `db_path` pour
+le conserver d'un run à l'autre) : la mémoire reste bornée quel que soit
+le nombre d'avis, et l'index se met à jour au fil des nouveaux avis.
+"""
+
+import os
+import re
+import sqlite3
+import tempfile
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from src.utils.cache import content_key
+
+# Index persistant partagé par les runs (vide = index temporaire par appel)
+DEDUP_DB = os.getenv("AVIS_DEDUP_DB", "")
+
+NUM_PERM = 64           # taille de la signature MinHash
+BANDS = 16              # LSH : 16 bandes de 4 valeurs
+SHINGLE_SIZE = 8        # shingles de 8 caractères, un par début de mot
+THRESHOLD = 0.7         # Jaccard estimé au-delà duquel on fusionne
+PREFIX_CHARS = 120      # préfixe commun = même avis tronqué
+MAX_CANDIDATES = 200    # candidats examinés au plus par avis
+
+PREFIX_BAND = -1        # "bande" réservée au préfixe dans la table SQLite
+
+TRUNCATION_RE = re.compile(
+    r"(\.\.\.|…)?\s*(voir plus|lire la suite|read more|see more)\s*$", re.IGNORECASE
+)
+NON_WORD_RE = re.compile(r"[^\w\s]+")
+SPACES_RE = re.compile(r"\s+")
+
+_rng = np.random.default_rng(20240601)  # graine fixe : signatures stables entre runs
+_PERM_A = _rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+_BASE = 1_000_003
+_POWERS = np.array(
+    [pow(_BASE, SHINGLE_SIZE - 1 - j, 1 << 64) for j in range(SHINGLE_SIZE)], dtype=np.uint64
+)
+
+
+def normalize_for_dedup(text) -> str:
+    """Texte comparable : NFKC, minuscules, sans ponctuation / emojis / troncature."""
+    if not isinstance(text, str):
+        return ""
+    text = unicodedata.normalize("NFKC", text).casefold().strip()
+    # la mention de troncature est toujours en fin de texte
+    m = TRUNCATION_RE.search(text, max(0, len(text) - 30))
+    if m:
+        text = text[:m.start()]
+    text = NON_WORD_RE.sub(" ", text)
+    return SPACES_RE.sub(" ", text).strip()
+
+
+def minhash_many(norms: list[str]) -> np.ndarray:
+    """
+    Signatures MinHash (NUM_PERM entiers 32 bits par avis), calculées pour
+    tout le lot en quelques opérations numpy.
+
+    Shingles : les SHINGLE_SIZE caractères qui suivent chaque début de mot
+    (fin du mot + début du suivant), soit ~5x moins de shingles que toutes
+    les fenêtres de caractères pour une similarité comparable.
+    """
+    # bourrage : le dernier mot a lui aussi sa fenêtre complète
+    pad = "\0" * (SHINGLE_SIZE - 1)
+    norms = [n + pad if n else pad + "\0" for n in norms]
+    lengths = np.fromiter((len(n) for n in norms), dtype=np.int64, count=len(norms))
+    codes = np.frombuffer("".join(norms).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    # hash polynomial de chaque fenêtre de SHINGLE_SIZE caractères
+    n = len(codes) - SHINGLE_SIZE + 1
+    shingles = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE_SIZE):
+        shingles += codes[j:j + n] * _POWERS[j]
+
+    # fenêtres entièrement dans un même avis et qui commencent un mot
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    counts = lengths - SHINGLE_SIZE + 1
+    doc = np.repeat(np.arange(len(norms)), counts)
+    pos = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+    pos += np.arange(counts.sum())
+    word_start = (pos == starts[doc]) | (codes[pos - 1] == ord(" "))
+    shingles, doc = shingles[pos[word_start]], doc[word_start]
+    offsets = np.searchsorted(doc, np.arange(len(norms)))
+
+    # permutations universelles (a * x + b), 32 bits de poids fort, min par avis
+    hashed = (shingles[:, None] * _PERM_A + _PERM_B) >> np.uint64(32)
+    return np.minimum.reduceat(hashed, offsets, axis=0).astype(np.uint32)
+
+
+def minhash(norm: str) -> np.ndarray:
+    """Signature MinHash d'un seul texte normalisé."""
+    return minhash_many([norm])[0]
+
+
+def _band_hashes(sig: np.ndarray) -> list[int]:
+    rows = sig.reshape(BANDS, -1).astype(np.uint64)
+    h = np.zeros(BANDS, dtype=np.uint64)
+    for col in range(rows.shape[1]):
+        h = h * np.uint64(_BASE) + rows[:, col]
+    # entiers signés 64 bits pour SQLite
+    return h.view(np.int64).tolist()
+
+
+def _prefix_hash(norm: str) -> int | None:
+    if len(norm) < PREFIX_CHARS:
+        return None
+    return int(content_key(norm[:PREFIX_CHARS])[:15], 16)
+
+
+class NearDuplicateIndex:
+    """
+    Index incrémental de quasi-doublons. assign(texte) renvoie l'identifiant
+    du groupe de l'avis (celui du premier avis du groupe rencontré).
+    """
+
+    def __init__(self, db_path: str | None = None, threshold: float = THRESHOLD):
+        self.threshold = threshold
+        self._tmp_path = None
+        if not db_path:
+            fd, db_path = tempfile.mkstemp(prefix="avis_dedup_", suffix=".sqlite")
+            os.close(fd)
+            self._tmp_path = db_path
+
+        self._db = sqlite3.connect(db_path)
+        if self._tmp_path:
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+        else:
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL, grp INTEGER NOT NULL, sig BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, hash INTEGER NOT NULL, doc INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS bands_lookup ON bands (hash, band);"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def _match(self, sig: np.ndarray, bands: list[tuple[int, int]]) -> int | None:
+        # même début de texte : avis tronqué, sans autre comparaison
+        if bands[0][0] == PREFIX_BAND:
+            row = self._db.execute(
+                "SELECT d.grp FROM bands b JOIN docs d ON d.id = b.doc"
+                " WHERE b.hash = ? AND b.band = ? LIMIT 1",
+                (bands[0][1], PREFIX_BAND),
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            bands = bands[1:]
+
+        # toutes les bandes MinHash en une requête, chacune par l'index
+        # bands_lookup (hash, band) ; la limite ne porte que sur les vrais candidats
+        probes = " UNION ALL ".join(["SELECT doc FROM bands WHERE hash = ? AND band = ?"] * len(bands))
+        rows = self._db.execute(
+            f"SELECT id, grp, sig FROM docs WHERE id IN ({probes}) ORDER BY id LIMIT ?",
+            (*(v for band, h in bands for v in (h, band)), MAX_CANDIDATES),
+        ).fetchall()
+
+        best_grp, best_score = None, self.threshold
+        for _, grp, blob in rows:
+            score = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == sig))
+            if score >= best_score:
+                best_grp, best_score = grp, score
+        return best_grp
+
+    def assign(self, text) -> int:
+        """Ajoute l'avis à l'index (s'il est nouveau) et renvoie son groupe."""
+        norm = normalize_for_dedup(text)
+        return self._assign(norm, minhash(norm))
+
+    def _assign(self, norm: str, sig: np.ndarray) -> int:
+        key = content_key(norm)
+        row = self._db.execute("SELECT grp FROM docs WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return row[0]
+
+        bands = list(enumerate(_band_hashes(sig)))
+        prefix = _prefix_hash(norm)
+        if prefix is not None:
+            bands.insert(0, (PREFIX_BAND, prefix))
+
+        grp = self._match(sig, bands)
+        cur = self._db.execute(
+            "INSERT INTO docs (key, grp, sig) VALUES (?, ?, ?)", (key, grp or 0, sig.tobytes())
+        )
+        doc = cur.lastrowid
+        if grp is None:
+            grp = doc
+            self._db.execute("UPDATE docs SET grp = ? WHERE id = ?", (grp, doc))
+        self._db.executemany(
+            "INSERT INTO bands (band, hash, doc) VALUES (?, ?, ?)",
+            [(band, h, doc) for band, h in bands],
+        )
+        return grp
+
+    def assign_many(self, texts, chunk_size: int = 64) -> np.ndarray:
+        """
+        assign() sur une liste d'avis, en une seule transaction ; les
+        signatures sont calculées par paquets de `chunk_size` avis.
+        """
+        texts = list(texts)
+        groups = np.empty(len(texts), dtype=np.int64)
+        for start in range(0, len(texts), chunk_size):
+            norms = [normalize_for_dedup(t) for t in texts[start:start + chunk_size]]
+            for i, (norm, sig) in enumerate(zip(norms, minhash_many(norms)), start):
+                groups[i] = self._assign(norm, sig)
+        self._db.commit()
+        return groups
+
+    def close(self) -> None:
+        self._db.close()
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def dedup_reviews(
+    df: pd.DataFrame,
+    text_col: str = "Avis",
+    title_col: str = "Titre de l'avis",
+    date_col: str = "Date",
+    index: NearDuplicateIndex | None = None,
+) -> pd.DataFrame:
+    """
+    Garde un avis par groupe de quasi-doublons : celui qui a un titre en
+    priorité, puis le plus récent. Sans `index`, on utilise AVIS_DEDUP_DB
+    s'il est défini, sinon un index temporaire.
+    Le résultat garde l'ordre d'origine des lignes conservées.
+    """
+    if df.empty:
+        return df
+
+    own_index = index is None
+    if own_index:
+        index = NearDuplicateIndex(DEDUP_DB or None)
+    try:
+        groups = index.assign_many(df[text_col].tolist())
+    finally:
+        if own_index:
+            index.close()
+
+    has_title = df[title_col].fillna("").astype(str).str.strip().ne("").to_numpy()
+    if date_col in df:
+        dates = pd.to_datetime(df[date_col]).to_numpy().astype("datetime64[ns]")
+    else:
+        dates = np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+    # NaT devient le plus petit entier : toute date l'emporte sur NaT
+    when = dates.astype(np.int64)
+
+    order = pd.DataFrame({"grp": groups, "title": has_title, "when": when})
+    # par groupe (hash, O(n)) : meilleur titre, puis date la plus récente
+    best = order.groupby("grp", sort=False)["title"].transform("max")
+    order = order[order["title"] == best]
+    latest = order.groupby("grp", sort=False)["when"].transform("max")
+    keep = order[order["when"] == latest].drop_duplicates("grp").index
+
+    return df.iloc[np.sort(keep)]
@@ -0,0 +1,445 @@
+# src/utils/embedding_index.py
+"""
+Index de vecteurs d'avis pour la recherche d'avis similaires.
+
+Les vecteurs (cf. analyze_with_embeddings dans src/nlp/sentiment.py) sont
+normalisés puis stockés dans un dossier (AVIS_EMBEDDING_DIR) :
+  - vectors.f16 : matrice float16 (une ligne par avis), lue en mémoire
+    mappée (np.memmap) : rien n'est chargé à l'ouverture, le cache disque
+    de l'OS fait le reste ;
+  - index.sqlite : la clé de chaque ligne (avis_hash, platform, brand,
+    comme dans la base d'avis), sa liste IVF et les centroïdes.
+
+add() ajoute des lignes en fin de matrice (les clés déjà indexées sont
+sautées) : l'index grandit au fil des scrapings sans être reconstruit.
+
+search() renvoie les k avis les plus proches (similarité cosinus = produit
+scalaire des vecteurs normalisés) :
+  - sans entraînement, toute la matrice est parcourue par blocs
+    (exhaustif, exact) ;
+  - après train() (IVF), les vecteurs sont répartis en listes autour de
+    centroïdes (k-means) ; une requête ne parcourt que les `nprobe`
+    listes les plus proches (~1 % des vecteurs pour un million d'avis),
+    au prix d'un rappel légèrement inférieur à 1 (cf. bench_embeddings.py).
+
+Les lignes ajoutées après l'entraînement sont rangées dans la liste de
+leur centroïde le plus proche ; relancer train() quand l'index a beaucoup
+grandi (cf. src/cli/build_embeddings.py).
+"""
+
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.utils.review_store import canonical_brand
+
+# Dossier par défaut (partagé par la CLI et l'API)
+EMBEDDING_DIR = os.getenv("AVIS_EMBEDDING_DIR", os.path.join("data", "embeddings"))
+# Listes IVF parcourues par requête
+NPROBE = int(os.getenv("AVIS_EMBEDDING_NPROBE", "8"))
+
+BLOCK_ROWS = 65_536        # lignes converties en float32 à la fois
+TRAIN_SAMPLE = 64          # vecteurs d'entraînement par liste IVF
+TRAIN_ITERATIONS = 10      # itérations de k-means
+MIN_LISTS, MAX_LISTS = 16, 1024
+TAIL_REBUILD = 10_000      # lignes non triées au-delà desquelles on retrie les listes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS rows (
+    row INTEGER PRIMARY KEY,
+    avis_hash TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    grp INTEGER NOT NULL,
+    list INTEGER NOT NULL DEFAULT -1,
+    UNIQUE (avis_hash, platform, brand)
+);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    UNIQUE (platform, brand)
+);
+"""
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)  # vecteur nul : reste nul
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    # positions des k meilleurs scores, du meilleur au moins bon
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class EmbeddingIndex:
+    """
+    Matrice float16 mappée en mémoire + clés SQLite. Un seul écrivain à la
+    fois (CLI ou worker) ; les lecteurs voient les ajouts à la requête suivante.
+    """
+
+    def __init__(self, path: str = EMBEDDING_DIR, source: dict[str, str] | None = None):
+        """
+        `source` : ce qui produit les vecteurs (cf. model_meta() : modèle,
+        révision, backend). Enregistré à la création, vérifié ensuite : un
+        index n'accepte pas de vecteurs d'un autre modèle ou backend.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._vectors_path = os.path.join(path, "vectors.f16")
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+        meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        source = source or {}
+        mismatch = [f"{k} {meta[k]} (pas {v})" for k, v in source.items() if meta.get(k) not in (None, v)]
+        if mismatch:
+            raise ValueError(f"index {path} construit avec : {', '.join(mismatch)}")
+        missing = [(k, v) for k, v in source.items() if k not in meta]
+        if missing:
+            with self._db:
+                self._db.executemany("INSERT INTO meta VALUES (?, ?)", missing)
+        self.dim: int | None = meta.get("dim")
+
+        # état en mémoire, complété par _refresh() quand des lignes arrivent
+        self._n = 0
+        self._matrix: np.ndarray | None = None
+        self._groups = np.zeros(0, dtype=np.int32)
+        self._lists = np.zeros(0, dtype=np.int32)
+        self._centroids: np.ndarray | None = None
+        self._trained_version = None
+        self._order: np.ndarray | None = None     # lignes triées par liste IVF
+        self._bounds: np.ndarray | None = None    # début de chaque liste dans _order
+        self._sorted_n = 0                        # lignes couvertes par _order
+        self._refresh()
+
+    # =========================
+    #   ÉTAT
+    # =========================
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._n
+
+    def _refresh(self) -> None:
+        """Relit les lignes ajoutées (par ce processus ou un autre) depuis le dernier appel."""
+        with self._lock:
+            n = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+            version = self._db.execute("SELECT value FROM meta WHERE key = 'trained'").fetchone()
+            if version != self._trained_version:
+                # (ré)entraînement : centroïdes et listes de toutes les lignes changent
+                self._trained_version = version
+                blob = self._db.execute("SELECT value FROM meta WHERE key = 'centroids'").fetchone()
+                self._centroids = (
+                    np.frombuffer(blob[0], dtype=np.float32).reshape(-1, self.dim) if blob else None
+                )
+                self._n, self._order, self._sorted_n = 0, None, 0
+                self._groups = np.zeros(0, dtype=np.int32)
+                self._lists = np.zeros(0, dtype=np.int32)
+            if n == self._n:
+                return
+
+            new = np.array(
+                self._db.execute("SELECT grp, list FROM rows WHERE row >= ? ORDER BY row", (self._n,)).fetchall(),
+                dtype=np.int32,
+            ).reshape(-1, 2)
+            self._groups = np.concatenate([self._groups, new[:, 0]])
+            self._lists = np.concatenate([self._lists, new[:, 1]])
+            self._n = n
+            if self.dim is None:
+                self.dim = self._db.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()[0]
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float16, mode="r", shape=(n, self.dim))
+
+    def _group_ids(self, platform: str | None, brand: str | None) -> np.ndarray | None:
+        if platform is None and brand is None:
+            return None
+        clauses, params = [], []
+        brand = canonical_brand(brand) if brand is not None else None
+        for col, value in (("platform", platform), ("brand", brand)):
+            if value is not None:
+                clauses.append(f"{col} = ?")
+                params.append(value)
+        rows = self._db.execute(f"SELECT id FROM groups WHERE {' AND '.join(clauses)}", params).fetchall()
+        return np.array([r[0] for r in rows], dtype=np.int32)
+
+    # =========================
+    #   ÉCRITURE
+    # =========================
+
+    def add(self, keys: list[tuple[str, str, str]], vectors: np.ndarray) -> int:
+        """
+        Ajoute les vecteurs des avis `keys` ((avis_hash, platform, brand),
+        même ordre que `vectors`) absents de l'index. Renvoie le nombre de
+        lignes ajoutées.
+        """
+        vectors = np.asarray(vectors)
+        # même clé de marque que la base d'avis
+        keys = [(h, platform, canonical_brand(brand)) for h, platform, brand in keys]
+        if len(keys) != len(vectors):
+            raise ValueError("autant de clés que de vecteurs")
+        if not len(keys):
+            return 0
+
+        with self._lock:
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with self._db:
+                    self._db.execute("INSERT OR REPLACE INTO meta VALUES ('dim', ?)", (self.dim,))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"vecteurs de dimension {vectors.shape[1]}, index en {self.dim}")
+
+            # clés déjà indexées, ou en double dans le lot
+            seen = set()
+            keep = []
+            for i, key in enumerate(keys):
+                if key in seen:
+                    continue
+                seen.add(key)
+                known = self._db.execute(
+                    "SELECT 1 FROM rows WHERE avis_hash = ? AND platform = ? AND brand = ?", key
+                ).fetchone()
+                if known is None:
+                    keep.append(i)
+            if not keep:
+                return 0
+
+            new = _normalize(vectors[keep])
+            lists = (
+                (new @ self._centroids.T).argmax(axis=1)
+                if self._centroids is not None
+                else np.full(len(new), -1)
+            )
+            groups = {}
+            for platform, brand in {keys[i][1:] for i in keep}:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO groups (platform, brand) VALUES (?, ?)", (platform, brand)
+                )
+                groups[(platform, brand)] = self._db.execute(
+                    "SELECT id FROM groups WHERE platform = ? AND brand = ?", (platform, brand)
+                ).fetchone()[0]
+
+            # vecteurs d'abord, clés ensuite : une ligne n'existe qu'une fois ses
+            # clés validées ; un reste d'ajout interrompu est écrasé ici
+            row_bytes = self.dim * 2
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(self._n * row_bytes)
+                f.write(new.astype(np.float16).tobytes())
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO rows (row, avis_hash, platform, brand, grp, list) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (self._n + j, *keys[i], groups[keys[i][1:]], int(lst))
+                        for j, (i, lst) in enumerate(zip(keep, lists))
+                    ],
+                )
+            self._refresh()
+            return len(keep)
+
+    def train(self, n_lists: int | None = None, seed: int = 0) -> int:
+        """
+        Entraîne l'IVF : k-means sphérique sur un échantillon, puis range
+        chaque ligne dans la liste de son centroïde le plus proche.
+        Par défaut ~sqrt(n) listes. Renvoie le nombre de listes.
+        """
+        with self._lock:
+            self._refresh()
+            n = self._n
+            if n_lists is None:
+                n_lists = int(np.clip(np.sqrt(n), MIN_LISTS, MAX_LISTS))
+            n_lists = min(n_lists, n)
+            if n_lists < 1:
+                raise ValueError("index vide : rien à entraîner")
+
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(n, size=min(n, n_lists * TRAIN_SAMPLE), replace=False))
+            sample = self._matrix[sample_rows].astype(np.float32)
+
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+            for _ in range(TRAIN_ITERATIONS):
+                assign = (sample @ centroids.T).argmax(axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, sample)
+                empty = ~np.bincount(assign, minlength=n_lists).astype(bool)
+                # liste vide : on repart d'un vecteur tiré au hasard
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+                centroids = _normalize(sums)
+
+            lists = np.concatenate([
+                (self._matrix[start:start + BLOCK_ROWS].astype(np.float32) @ centroids.T).argmax(axis=1)
+                for start in range(0, n, BLOCK_ROWS)
+            ])
+            with self._db:
+                self._db.executemany(
+                    "UPDATE rows SET list = ? WHERE row = ?",
+                    zip(lists.tolist(), range(n)),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('centroids', ?)", (centroids.astype(np.float32).tobytes(),)
+                )
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('trained_rows', ?)", (n,))
+                self._db.execute(
+                    "INSERT INTO meta VALUES ('trained', 1) ON CONFLICT (key) DO UPDATE SET value = value + 1"
+                )
+            self._refresh()
+            return n_lists
+
+    def trained_rows(self) -> int:
+        """Lignes présentes au dernier train() (0 : jamais entraîné)."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'trained_rows'").fetchone()
+        return row[0] if row else 0
+
+    # =========================
+    #   RECHERCHE
+    # =========================
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray | None:
+        """Lignes à examiner : celles des `nprobe` listes IVF les plus proches (None = toutes)."""
+        if self._centroids is None or nprobe >= len(self._centroids):
+            return None
+
+        if self._order is None or self._n - self._sorted_n > TAIL_REBUILD:
+            self._order = np.argsort(self._lists, kind="stable").astype(np.int32)
+            self._bounds = np.searchsorted(self._lists[self._order], np.arange(len(self._centroids) + 1))
+            self._sorted_n = self._n
+
+        probe = _top_k(self._centroids @ query, nprobe)
+        rows = [self._order[self._bounds[lst]:self._bounds[lst + 1]] for lst in probe]
+        # lignes ajoutées depuis le dernier tri
+        tail = np.arange(self._sorted_n, self._n, dtype=np.int32)
+        rows.append(tail[np.isin(self._lists[tail], probe)])
+        return np.sort(np.concatenate(rows))  # lecture du memmap dans l'ordre du fichier
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        platform: str | None = None,
+        brand: str | None = None,
+        nprobe: int = NPROBE,
+        exclude: tuple[str, str, str] | None = None,
+    ) -> list[dict]:
+        """
+        Les `k` avis les plus proches de `query` (un vecteur), filtrés par
+        plateforme / marque : [{"avis_hash", "platform", "brand", "score"}, ...]
+        du plus proche au moins proche. `exclude` : clé à écarter (l'avis
+        de départ d'un "avis similaires").
+        """
+        with self._lock:
+            self._refresh()
+            if not self._n:
+                return []
+            query = _normalize(query).reshape(-1)
+            rows = self._candidates(query, nprobe)
+
+            allowed = self._group_ids(platform, brand)
+            excluded = self.row_of(exclude) if exclude is not None else None
+            if allowed is not None or excluded is not None:
+                rows = np.arange(self._n, dtype=np.int32) if rows is None else rows
+                mask = np.ones(len(rows), dtype=bool)
+                if allowed is not None:
+                    mask &= np.isin(self._groups[rows], allowed)
+                if excluded is not None:
+                    mask &= rows != excluded
+                rows = rows[mask]
+
+            if rows is None:
+                # exhaustif : blocs contigus convertis en float32 un par un
+                scores = np.concatenate([
+                    self._matrix[start:start + BLOCK_ROWS].astype(np.float32) @ query
+                    for start in range(0, self._n, BLOCK_ROWS)
+                ])
+                rows = np.arange(self._n)
+            else:
+                scores = np.concatenate([
+                    self._matrix[rows[start:start + BLOCK_ROWS]].astype(np.float32) @ query
+                    for start in range(0, len(rows), BLOCK_ROWS)
+                ] or [np.zeros(0, dtype=np.float32)])
+
+            top = _top_k(scores, k)
+            best, best_scores = rows[top], scores[top]
+            keys = dict(
+                (r, key) for r, *key in self._db.execute(
+                    f"SELECT row, avis_hash, platform, brand FROM rows WHERE row IN ({', '.join('?' * len(best))})",
+                    [int(r) for r in best],
+                )
+            )
+        return [
+            {
+                "avis_hash": keys[int(r)][0],
+                "platform": keys[int(r)][1],
+                "brand": keys[int(r)][2],
+                "score": round(float(s), 4),
+            }
+            for r, s in zip(best, best_scores)
+        ]
+
+    def row_of(self, key: tuple[str, str, str]) -> int | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT row FROM rows WHERE avis_hash = ? AND platform = ? AND brand = ?", key
+            ).fetchone()
+        return row[0] if row else None
+
+    def find(self, avis_hash: str, platform: str | None = None, brand: str | None = None) -> tuple[tuple[str, str, str], np.ndarray] | None:
+        """Clé complète et vecteur d'un avis indexé (le premier trouvé si plateforme / marque omises)."""
+        with self._lock:
+            self._refresh()
+            where, params = "avis_hash = ?", [avis_hash]
+            brand = canonical_brand(brand) if brand is not None else None
+            for col, value in (("platform", platform), ("brand", brand)):
+                if value is not None:
+                    where += f" AND {col} = ?"
+                    params.append(value)
+            row = self._db.execute(
+                f"SELECT row, avis_hash, platform, brand FROM rows WHERE {where} ORDER BY row LIMIT 1", params
+            ).fetchone()
+            if row is None:
+                return None
+            return tuple(row[1:]), self._matrix[row[0]].astype(np.float32)
+
+    def close(self) -> None:
+        with self._lock:
+            self._matrix = None
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_index: EmbeddingIndex | None = None
+
+
+def model_meta() -> dict[str, str]:
+    """Modèle, révision et backend courants (AVIS_SENTIMENT_*), qui produisent les vecteurs."""
+    from src.nlp.model_registry import MODEL_NAME, MODEL_REVISION, SENTIMENT_BACKEND
+
+    return {"model": MODEL_NAME, "revision": MODEL_REVISION, "backend": SENTIMENT_BACKEND}
+
+
+def get_index() -> EmbeddingIndex:
+    """Index AVIS_EMBEDDING_DIR ouvert au premier appel puis partagé."""
+    global _index
+    if _index is None:
+        _index = EmbeddingIndex(source=model_meta())
+    return _index
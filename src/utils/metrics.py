@@ -0,0 +1,273 @@
+# src/utils/metrics.py
+"""
+Métriques au format texte Prometheus, sans dépendance externe.
+
+- compteurs et histogrammes étiquetés, rendus par render() (route /metrics) ;
+- stage("nom") chronomètre une étape (fetch HTTP, parsing, nettoyage,
+  tokenisation, forward du modèle, rendu des réponses...) ;
+- run("titre") affiche à la fin d'un batch ou d'un scraping le résumé des
+  étapes exécutées pendant le run.
+
+AVIS_METRICS=0 désactive tout : stage() renvoie alors un contexte vide
+partagé (pas d'horloge, pas de verrou) et run() n'affiche rien.
+Les valeurs sont propres à chaque processus (un worker = ses métriques).
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+ENABLED = os.getenv("AVIS_METRICS", "1") == "1"
+
+# Bornes des histogrammes de durée (secondes)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, value: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + value
+
+    def get(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value:g}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # par jeu d'étiquettes : [comptes par bucket (+Inf en dernier), somme, nombre]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def totals(self) -> dict[tuple, tuple[float, int]]:
+        """{étiquettes: (somme, nombre)}"""
+        with self._lock:
+            return {k: (s[1], s[2]) for k, s in self._series.items()}
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labelvalues, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{self.name}_bucket{_labels(names, labelvalues + (le,))} {cumulative}")
+                suffix = _labels(self.labelnames, labelvalues)
+                lines.append(f"{self.name}_sum{suffix} {total:g}")
+                lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Ensemble des métriques du processus, rendues ensemble par render()."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float]) -> None:
+        """Jauge calculée à la lecture (taille de file, taux de hit...)."""
+        self._gauges[name] = (help, fn)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines += metric.render()
+        for name, (help, fn) in list(self._gauges.items()):
+            try:
+                value = float(fn())
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "avis_stage_seconds", "Durée de chaque étape du pipeline", ("stage",)
+)
+STAGE_ITEMS = registry.counter(
+    "avis_stage_items_total", "Éléments traités par étape (pages, avis, articles...)", ("stage",)
+)
+HTTP_FETCHES = registry.counter(
+    "avis_http_fetch_total", "Requêtes HTTP des scrapers par statut", ("status",)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "avis_http_request_seconds", "Durée des requêtes de l'API", ("method", "route", "status")
+)
+
+
+# =========================
+#   ÉTAPES CHRONOMÉTRÉES
+# =========================
+
+class _Stage:
+    __slots__ = ("name", "items", "t0")
+
+    def __init__(self, name: str, items: int):
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.t0, self.name)
+        STAGE_ITEMS.inc(self.name, value=self.items)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str, items: int = 1):
+    """
+    Contexte qui chronomètre l'étape `name` (`items` éléments traités) :
+
+        with metrics.stage("clean_text", items=len(texts)):
+            ...
+    """
+    if not ENABLED:
+        return _NULL_STAGE
+    return _Stage(name, items)
+
+
+def count_fetch(status: int | str) -> None:
+    """Compte une requête HTTP de scraper (code de statut ou "error")."""
+    if ENABLED:
+        HTTP_FETCHES.inc(str(status))
+
+
+def _stage_totals() -> dict[str, tuple[float, int, float]]:
+    # {étape: (secondes, appels, éléments)}
+    return {
+        labels[0]: (total, count, STAGE_ITEMS.get(*labels))
+        for labels, (total, count) in STAGE_SECONDS.totals().items()
+    }
+
+
+def summary(since: dict | None = None) -> str:
+    """Tableau des étapes (depuis l'instantané `since` s'il est donné)."""
+    since = since or {}
+    lines = []
+    for name, (secs, calls, items) in sorted(_stage_totals().items()):
+        s0, c0, i0 = since.get(name, (0.0, 0, 0.0))
+        secs, calls, items = secs - s0, calls - c0, items - i0
+        if not calls:
+            continue
+        rate = items / secs if secs else 0.0
+        lines.append(
+            f"  {name:<16}: {calls:>7} appels, {items:>9.0f} éléments en "
+            f"{secs:8.2f}s ({rate:10.1f} éléments/s)"
+        )
+    return "\n".join(lines) if lines else "  (aucune étape mesurée)"
+
+
+@contextmanager
+def run(title: str):
+    """Affiche à la sortie le résumé des étapes exécutées dans le bloc."""
+    if not ENABLED:
+        yield
+        return
+    before = _stage_totals()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        print(f"[METRICS] {title} : {time.perf_counter() - t0:.2f}s")
+        print(summary(since=before))
@@ -0,0 +1,604 @@
+# src/utils/review_store.py
+"""
+Stockage des avis dans une base SQLite (mode WAL), à la place des CSV
+nommés à la main (trustpilot_{domain}_{lang}.csv, data/*.csv).
+
+Une ligne par avis, identifiée par (avis_hash, platform, brand) :
+  - upsert() insère les nouveaux avis et complète les avis connus (un
+    re-scraping n'efface pas le sentiment déjà calculé) ;
+  - read() ne lit que les colonnes demandées, filtrées par marque,
+    plateforme, langue, période et sentiment via les index (iter_read()
+    par morceaux, lookup() par clés) ;
+  - les noms de colonnes côté DataFrame sont ceux des CSV historiques
+    ("Avis", "Titre de l'avis", "Date", "Langue"...), les notebooks
+    n'ont donc rien à changer ;
+  - sentiment_stats() sert les statistiques (volume, sentiments, note
+    moyenne) depuis des agrégats journaliers tenus à jour par triggers.
+
+Import des CSV existants : python -m src.cli.import_reviews
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import Iterator
+
+import pandas as pd
+
+from src.utils.cache import content_key
+
+# Base par défaut (partagée par les scrapers, la CLI et l'API)
+REVIEW_DB = os.getenv("AVIS_REVIEW_DB", os.path.join("data", "reviews.sqlite"))
+
+# colonne DataFrame -> colonne SQL
+FIELDS = {
+    "avis_hash": "avis_hash",
+    "platform": "platform",
+    "brand": "brand",
+    "Langue": "lang",
+    "Date": "date",
+    "Date_str": "date_str",
+    "Titre de l'avis": "title",
+    "Avis": "avis",
+    "Avis_clean": "avis_clean",
+    "sentiment": "sentiment",
+    "stars": "stars",
+    "confidence": "confidence",
+}
+KEY_FIELDS = ("avis_hash", "platform", "brand")
+
+# Une marque = une seule clé, quelle que soit la source : domaine Trustpilot,
+# URL Yelp ou nom saisi à la main (comparés sans casse ni "/" final).
+# Fichier JSON {"Marque": ["alias", ...]} ; AVIS_BRAND_ALIASES pour un autre fichier.
+BRAND_ALIASES_PATH = os.getenv(
+    "AVIS_BRAND_ALIASES",
+    os.path.join(os.path.dirname(__file__), "brand_aliases.json"),
+)
+NUMERIC_FIELDS = ("stars", "confidence")
+LOOKUP_BATCH = 500  # clés par requête de lookup()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    avis_hash TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    lang TEXT,
+    date TEXT,
+    date_str TEXT,
+    title TEXT,
+    avis TEXT NOT NULL,
+    avis_clean TEXT,
+    sentiment TEXT,
+    stars REAL,
+    confidence REAL,
+    updated REAL NOT NULL,
+    UNIQUE (avis_hash, platform, brand)
+);
+CREATE INDEX IF NOT EXISTS reviews_brand_date ON reviews (brand, date);
+CREATE INDEX IF NOT EXISTS reviews_platform_brand_lang_date ON reviews (platform, brand, lang, date);
+CREATE INDEX IF NOT EXISTS reviews_sentiment_date ON reviews (sentiment, date);
+CREATE INDEX IF NOT EXISTS reviews_date ON reviews (date);
+"""
+
+# Agrégats par (plateforme, marque, langue, jour, sentiment), tenus à jour
+# par des triggers à chaque écriture d'un avis noté : les statistiques ne
+# relisent jamais les avis eux-mêmes. version change à chaque modification
+# (ETag des réponses de l'API).
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    platform TEXT NOT NULL,
+    brand TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    day TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    stars_n INTEGER NOT NULL,
+    stars_sum REAL NOT NULL,
+    PRIMARY KEY (platform, brand, lang, day, sentiment)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollup_day ON rollup_daily (day);
+CREATE TABLE IF NOT EXISTS rollup_meta (version INTEGER NOT NULL);
+INSERT INTO rollup_meta (version) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM rollup_meta);
+
+CREATE TRIGGER IF NOT EXISTS rollup_insert AFTER INSERT ON reviews
+WHEN new.sentiment IS NOT NULL
+BEGIN
+    {add_new}
+    UPDATE rollup_meta SET version = version + 1;
+END;
+
+-- recréé à chaque ouverture : les bases existantes suivent aussi les
+-- changements de marque / plateforme (normalize_brands)
+DROP TRIGGER IF EXISTS rollup_update;
+CREATE TRIGGER rollup_update AFTER UPDATE ON reviews
+WHEN old.sentiment IS NOT new.sentiment OR old.stars IS NOT new.stars
+  OR old.date IS NOT new.date OR old.lang IS NOT new.lang
+  OR old.brand IS NOT new.brand OR old.platform IS NOT new.platform
+BEGIN
+    {remove_old}
+    {add_new}
+    UPDATE rollup_meta SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollup_delete AFTER DELETE ON reviews
+WHEN old.sentiment IS NOT NULL
+BEGIN
+    {remove_old}
+    UPDATE rollup_meta SET version = version + 1;
+END;
+""".format(
+    add_new="""
+    INSERT INTO rollup_daily (platform, brand, lang, day, sentiment, n, stars_n, stars_sum)
+    SELECT new.platform, new.brand, COALESCE(new.lang, ''), COALESCE(new.date, ''), new.sentiment,
+           1, new.stars IS NOT NULL, COALESCE(new.stars, 0)
+    WHERE new.sentiment IS NOT NULL
+    ON CONFLICT (platform, brand, lang, day, sentiment) DO UPDATE SET
+        n = n + 1, stars_n = stars_n + excluded.stars_n, stars_sum = stars_sum + excluded.stars_sum;""",
+    remove_old="""
+    UPDATE rollup_daily SET
+        n = n - 1,
+        stars_n = stars_n - (old.stars IS NOT NULL),
+        stars_sum = stars_sum - COALESCE(old.stars, 0)
+    WHERE old.sentiment IS NOT NULL
+      AND platform = old.platform AND brand = old.brand AND lang = COALESCE(old.lang, '')
+      AND day = COALESCE(old.date, '') AND sentiment = old.sentiment;
+    DELETE FROM rollup_daily
+    WHERE platform = old.platform AND brand = old.brand AND lang = COALESCE(old.lang, '')
+      AND day = COALESCE(old.date, '') AND sentiment = old.sentiment AND n <= 0;""",
+)
+
+# Regroupement temporel des agrégats (day = "AAAA-MM-JJ")
+PERIODS = {
+    "day": "day",
+    "week": "strftime('%Y-W%W', day)",
+    "month": "substr(day, 1, 7)",
+    "year": "substr(day, 1, 4)",
+    "all": "'all'",
+}
+GROUP_FIELDS = ("platform", "brand", "lang")
+SENTIMENTS = ("negative", "neutral", "positive")
+
+
+def _iso_dates(values: pd.Series) -> list[str | None]:
+    # "2025-11-06" : l'ordre lexicographique est l'ordre chronologique
+    dates = pd.to_datetime(values, errors="coerce")
+    return [None if pd.isna(d) else d.strftime("%Y-%m-%d") for d in dates]
+
+
+def _clean(values: pd.Series) -> list:
+    # NaN / chaînes vides -> NULL (COALESCE garde alors la valeur existante)
+    return [None if pd.isna(v) or v == "" else v for v in values.astype(object)]
+
+
+def _alias_key(name: str) -> str:
+    return name.strip().casefold().rstrip("/")
+
+
+def load_brand_aliases(path: str = BRAND_ALIASES_PATH) -> dict[str, str]:
+    """Alias (sans casse ni "/" final) -> marque canonique, depuis le fichier JSON."""
+    if not os.path.exists(path):
+        print(f"[WARN] alias de marques introuvables : {path}")
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    aliases = {}
+    for brand, names in data.items():
+        for name in (brand, *names):
+            aliases[_alias_key(name)] = brand
+    return aliases
+
+
+BRAND_ALIASES = load_brand_aliases()
+
+
+def canonical_brand(brand: str | None) -> str:
+    """Clé de marque de la base ("carhartt-wip.com" -> "Carhartt WIP")."""
+    if not brand:
+        return ""
+    brand = brand.strip()
+    return BRAND_ALIASES.get(_alias_key(brand), brand)
+
+
+def _day(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+class ReviewStore:
+    """
+    Base d'avis SQLite, utilisable depuis plusieurs threads (verrou) et
+    plusieurs processus (WAL : lectures pendant les écritures).
+    """
+
+    def __init__(self, db_path: str = REVIEW_DB):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        has_rollups = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'rollup_daily'"
+        ).fetchone()
+        self._db.executescript(ROLLUP_SCHEMA)
+        self._db.commit()
+        if not has_rollups:
+            # base créée avant les agrégats : calcul initial
+            self.rebuild_rollups()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+    # =========================
+    #   ÉCRITURE
+    # =========================
+
+    def upsert(
+        self,
+        df: pd.DataFrame,
+        platform: str | None = None,
+        brand: str | None = None,
+        lang: str | None = None,
+        text_col: str = "Avis",
+    ) -> int:
+        """
+        Insère ou met à jour les avis de `df` (une seule transaction).
+        `platform`, `brand` et `lang` remplacent les colonnes absentes
+        (sortie brute d'un scraper). Les marques passent par
+        canonical_brand(). Pour un avis déjà connu, seules les
+        valeurs non vides de `df` remplacent celles de la base.
+        Renvoie le nombre de lignes écrites.
+        """
+        if df.empty:
+            return 0
+
+        df = df.rename(columns={text_col: "Avis"}) if text_col != "Avis" else df
+        df = df[df["Avis"].notna()]
+        texts = df["Avis"].astype(str)
+
+        columns: dict[str, list] = {
+            "avis_hash": (
+                df["avis_hash"].astype(str).tolist()
+                if "avis_hash" in df
+                else [content_key(t) for t in texts]
+            ),
+            "platform": [platform or ""] * len(df),
+            "brand": [canonical_brand(brand)] * len(df),
+            "avis": texts.tolist(),
+        }
+        if "platform" in df and platform is None:
+            columns["platform"] = df["platform"].fillna("").astype(str).tolist()
+        if "brand" in df and brand is None:
+            columns["brand"] = [canonical_brand(b) for b in df["brand"].fillna("").astype(str)]
+        if lang is not None and "Langue" not in df:
+            columns["lang"] = [lang] * len(df)
+
+        for field, col in FIELDS.items():
+            if col in columns or field not in df:
+                continue
+            if field == "Date":
+                columns[col] = _iso_dates(df[field])
+            elif field in NUMERIC_FIELDS:
+                columns[col] = [None if pd.isna(v) else float(v) for v in pd.to_numeric(df[field], errors="coerce")]
+            else:
+                columns[col] = _clean(df[field])
+
+        names = list(columns)
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, reviews.{c})" for c in names if c not in KEY_FIELDS
+        )
+        sql = (
+            f"INSERT INTO reviews ({', '.join(names)}, updated)"
+            f" VALUES ({', '.join('?' * len(names))}, ?)"
+            f" ON CONFLICT (avis_hash, platform, brand) DO UPDATE SET {updates},"
+            " updated = excluded.updated"
+        )
+        now = time.time()
+        rows = [(*values, now) for values in zip(*columns.values())]
+
+        with self._lock:
+            with self._db:  # transaction : tout ou rien
+                self._db.executemany(sql, rows)
+        return len(rows)
+
+    # =========================
+    #   LECTURE
+    # =========================
+
+    @staticmethod
+    def _where(
+        platform: str | None = None,
+        brand: str | None = None,
+        lang: str | None = None,
+        sentiment: str | None = None,
+        start=None,
+        end=None,
+    ) -> tuple[str, list]:
+        clauses, params = [], []
+        brand = canonical_brand(brand) if brand is not None else None
+        for col, value in (("platform", platform), ("brand", brand), ("lang", lang), ("sentiment", sentiment)):
+            if value is not None:
+                clauses.append(f"{col} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(_day(start))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(_day(end))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        platform: str | None = None,
+        brand: str | None = None,
+        lang: str | None = None,
+        sentiment: str | None = None,
+        start=None,
+        end=None,
+        limit: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Avis filtrés (bornes `start` / `end` incluses, "AAAA-MM-JJ" ou date),
+        du plus récent au plus ancien. Seules les `columns` demandées (noms
+        des CSV : "Avis", "Date", "sentiment"...) sont lues.
+        """
+        columns = self._columns(columns)
+        where, params = self._where(platform, brand, lang, sentiment, start, end)
+        sql = (
+            f"SELECT {', '.join(FIELDS[c] for c in columns)} FROM reviews{where}"
+            " ORDER BY date IS NULL, date DESC, id"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return self._frame(rows, columns)
+
+    @staticmethod
+    def _columns(columns: list[str] | None) -> list[str]:
+        columns = list(columns or FIELDS)
+        unknown = [c for c in columns if c not in FIELDS]
+        if unknown:
+            raise KeyError(f"colonnes inconnues : {', '.join(unknown)}")
+        return columns
+
+    @staticmethod
+    def _frame(rows: list[tuple], columns: list[str]) -> pd.DataFrame:
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        if "Date" in df:
+            df["Date"] = pd.to_datetime(df["Date"])
+        return df
+
+    def iter_read(
+        self,
+        columns: list[str] | None = None,
+        chunksize: int = 10_000,
+        **filters,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Comme read() (mêmes filtres), par morceaux d'au plus `chunksize`
+        avis dans l'ordre d'insertion : la mémoire reste bornée.
+        """
+        columns = self._columns(columns)
+        where, params = self._where(**filters)
+        where = f"{where} AND id > ?" if where else " WHERE id > ?"
+        sql = f"SELECT id, {', '.join(FIELDS[c] for c in columns)} FROM reviews{where} ORDER BY id LIMIT ?"
+
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(sql, [*params, last, chunksize]).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield self._frame([r[1:] for r in rows], columns)
+
+    def lookup(self, keys: list[tuple[str, str, str]], columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Avis désignés par leurs clés (avis_hash, platform, brand), dans
+        l'ordre de `keys` ; les clés inconnues sont ignorées.
+        """
+        columns = self._columns(columns)
+        if not keys:
+            return self._frame([], columns)
+        # avis_hash IN (...) passe par l'index UNIQUE (avis_hash, platform, brand) ;
+        # le couple plateforme / marque est vérifié ensuite, sur la clé complète
+        hashes = list(dict.fromkeys(h for h, _, _ in keys))
+        select = f"SELECT avis_hash, platform, brand, {', '.join(FIELDS[c] for c in columns)} FROM reviews"
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), LOOKUP_BATCH):
+                part = hashes[start:start + LOOKUP_BATCH]
+                rows = self._db.execute(f"{select} WHERE avis_hash IN ({', '.join('?' * len(part))})", part)
+                found.update((tuple(r[:3]), r[3:]) for r in rows)
+        return self._frame([found[key] for key in keys if key in found], columns)
+
+    def analyzed_keys(self, keys: list[tuple[str, str, str]]) -> set[tuple[str, str, str]]:
+        """
+        Parmi `keys` (avis_hash, platform, brand), celles d'avis présents en
+        base avec un sentiment calculé. Les marques passent par
+        canonical_brand(), comme dans upsert().
+        """
+        keys = {(h, p, canonical_brand(b)) for h, p, b in keys}
+        hashes = list(dict.fromkeys(h for h, _, _ in keys))
+        found = set()
+        with self._lock:
+            for start in range(0, len(hashes), LOOKUP_BATCH):
+                part = hashes[start:start + LOOKUP_BATCH]
+                # même requête indexée que lookup() ; clé complète vérifiée ensuite
+                found.update(tuple(r) for r in self._db.execute(
+                    "SELECT avis_hash, platform, brand FROM reviews"
+                    f" WHERE avis_hash IN ({', '.join('?' * len(part))})"
+                    " AND sentiment IS NOT NULL",
+                    part,
+                ))
+        return found & keys
+
+    def count(self, **filters) -> int:
+        """Nombre d'avis correspondant aux mêmes filtres que read()."""
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM reviews{where}", params).fetchone()[0]
+
+    def brands(self) -> list[tuple[str, str]]:
+        """Couples (plateforme, marque) présents dans la base."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT DISTINCT platform, brand FROM reviews ORDER BY platform, brand"
+            ).fetchall()
+
+    def normalize_brands(self) -> int:
+        """
+        Ramène les marques déjà en base à leur clé canonique (bases remplies
+        avant l'ajout de leurs alias). Un avis présent sous les deux clés n'est gardé
+        qu'une fois. Renvoie le nombre de lignes renommées ou supprimées.
+        """
+        changed = 0
+        with self._lock:
+            with self._db:
+                brands = [b for (b,) in self._db.execute("SELECT DISTINCT brand FROM reviews")]
+                for brand in brands:
+                    canonical = canonical_brand(brand)
+                    if canonical == brand:
+                        continue
+                    changed += self._db.execute(
+                        "UPDATE OR IGNORE reviews SET brand = ? WHERE brand = ?", (canonical, brand)
+                    ).rowcount
+                    # restent les doublons d'avis déjà connus sous la clé canonique
+                    changed += self._db.execute("DELETE FROM reviews WHERE brand = ?", (brand,)).rowcount
+        # agrégats tenus à jour par les triggers (renommage et suppression)
+        return changed
+
+    # =========================
+    #   AGRÉGATS
+    # =========================
+
+    def rebuild_rollups(self) -> None:
+        """Recalcule les agrégats depuis les avis (normalement inutile)."""
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM rollup_daily")
+                self._db.execute(
+                    "INSERT INTO rollup_daily (platform, brand, lang, day, sentiment, n, stars_n, stars_sum)"
+                    " SELECT platform, brand, COALESCE(lang, ''), COALESCE(date, ''), sentiment,"
+                    "  COUNT(*), COUNT(stars), COALESCE(SUM(stars), 0)"
+                    " FROM reviews WHERE sentiment IS NOT NULL"
+                    " GROUP BY platform, brand, COALESCE(lang, ''), COALESCE(date, ''), sentiment"
+                )
+                self._db.execute("UPDATE rollup_meta SET version = version + 1")
+
+    def rollup_version(self) -> int:
+        """Change à chaque modification des agrégats (sert d'ETag)."""
+        with self._lock:
+            return self._db.execute("SELECT version FROM rollup_meta").fetchone()[0]
+
+    def sentiment_stats(
+        self,
+        platform: str | None = None,
+        brand: str | None = None,
+        lang: str | None = None,
+        start=None,
+        end=None,
+        period: str = "month",
+        group_by: tuple[str, ...] = (),
+    ) -> list[dict]:
+        """
+        Volume, répartition des sentiments et note moyenne par période
+        (day / week / month / year / all) et, au besoin, par plateforme,
+        marque et/ou langue (`group_by`). Lu uniquement dans les agrégats.
+        Les avis sans date ne comptent que pour period="all" sans borne.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"période inconnue : {period} ({', '.join(PERIODS)})")
+        unknown = set(group_by) - set(GROUP_FIELDS)
+        if unknown:
+            raise ValueError(f"regroupement inconnu : {', '.join(sorted(unknown))}")
+        group_by = tuple(f for f in GROUP_FIELDS if f in group_by)
+
+        clauses, params = [], []
+        brand = canonical_brand(brand) if brand is not None else None
+        for col, value in (("platform", platform), ("brand", brand), ("lang", lang)):
+            if value is not None:
+                clauses.append(f"{col} = ?")
+                params.append(value)
+        if period != "all" or start is not None or end is not None:
+            clauses.append("day != ''")
+        if start is not None:
+            clauses.append("day >= ?")
+            params.append(_day(start))
+        if end is not None:
+            clauses.append("day <= ?")
+            params.append(_day(end))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        keys = [f"{PERIODS[period]} AS period", *group_by]
+        group = ", ".join(["period", *group_by])
+        sql = (
+            f"SELECT {', '.join(keys)}, sentiment, SUM(n), SUM(stars_n), SUM(stars_sum)"
+            f" FROM rollup_daily{where} GROUP BY {group}, sentiment ORDER BY {group}"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        stats: dict[tuple, dict] = {}
+        for row in rows:
+            key = row[: 1 + len(group_by)]
+            sentiment, n, stars_n, stars_sum = row[1 + len(group_by):]
+            entry = stats.get(key)
+            if entry is None:
+                entry = stats[key] = {
+                    "period": key[0],
+                    **dict(zip(group_by, key[1:])),
+                    "volume": 0,
+                    "counts": dict.fromkeys(SENTIMENTS, 0),
+                    "_stars": [0, 0.0],
+                }
+            entry["volume"] += n
+            entry["counts"][sentiment] = entry["counts"].get(sentiment, 0) + n
+            entry["_stars"][0] += stars_n
+            entry["_stars"][1] += stars_sum
+
+        result = []
+        for entry in stats.values():
+            stars_n, stars_sum = entry.pop("_stars")
+            entry["shares"] = {s: round(c / entry["volume"], 4) for s, c in entry["counts"].items()}
+            entry["avg_stars"] = round(stars_sum / stars_n, 3) if stars_n else None
+            result.append(entry)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_store: ReviewStore | None = None
+
+
+def get_store() -> ReviewStore:
+    """Base AVIS_REVIEW_DB ouverte au premier appel puis partagée."""
+    global _store
+    if _store is None:
+        _store = ReviewStore()
+    return _store
@@ -1,6 +1,7 @@
 # test_scraper_trustpilot.py
 
 from src.scraper.trustpilot_scraper import scrape_trustpilot_to_df
+from src.utils.review_store import get_store
 
 def main():
     # Tu peux changer le domaine ici
@@ -13,9 +14,14 @@ def main():
     print("Scraping terminé")
     print(df.head())
 
+    # jeu de données lu par le scraping incrémental (trustpilot_incremental)
     output_file = f"trustpilot_{domain.replace('.', '_')}_{lang}.csv"
     df.to_csv(output_file, index=False)
     print(f"CSV sauvegardé : {output_file}")
 
+    store = get_store()
+    n = store.upsert(df, platform="Trustpilot", brand=domain, lang=lang)
+    print(f"{n} avis enregistrés dans {store.db_path}")
+
 if __name__ == "__main__":
     main()
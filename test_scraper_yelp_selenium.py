@@ -1,6 +1,7 @@
 # test_scraper_yelp_selenium.py
 
 from src.scraper.yelp_selenium_scraper import scrape_yelp_reviews_selenium
+from src.utils.review_store import get_store
 
 
 def main():
@@ -25,6 +26,10 @@ def main():
     df.to_csv(output_file, index=False)
     print(f"CSV sauvegardé : {output_file}")
 
+    store = get_store()
+    n = store.upsert(df, platform="Yelp", brand="Le Petit Cler")
+    print(f"{n} avis enregistrés dans {store.db_path}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+# tests/test_async_crawler.py
+"""
+AsyncCrawler / TokenBucket (src/scraper/async_crawler.py) : paramètres
+invalides refusés dès la construction, attente entre essais plafonnée
+(Retry-After compris).
+"""
+
+import pytest
+import requests
+
+from src.scraper.async_crawler import MAX_BACKOFF_S, AsyncCrawler, TokenBucket
+
+
+def _response(retry_after: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Retry-After"] = retry_after
+    return response
+
+
+@pytest.mark.parametrize("rate", [0, -1.0])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        TokenBucket(rate)
+    with pytest.raises(ValueError):
+        AsyncCrawler(rate_per_s=rate)
+
+
+def test_capacity_below_one_is_refused():
+    with pytest.raises(ValueError):
+        TokenBucket(5.0, capacity=0.5)
+
+
+def test_retry_after_is_clamped():
+    crawler = AsyncCrawler(max_backoff_s=10.0)
+    try:
+        assert crawler._delay(0, _response("3")) == 3.0
+        assert crawler._delay(0, _response("3600")) == 10.0
+        # backoff exponentiel plafonné lui aussi
+        assert crawler._delay(20, None) == 10.0
+    finally:
+        crawler.close()
+
+
+def test_default_max_backoff():
+    crawler = AsyncCrawler()
+    try:
+        assert crawler._delay(0, _response("86400")) == MAX_BACKOFF_S
+    finally:
+        crawler.close()
@@ -0,0 +1,87 @@
+# tests/test_dates.py
+"""
+parse_dates / extract_date_strings (vectorisés, src/utils/dates.py) :
+mêmes dates que le chemin historique ligne par ligne (parse_date de
+trustpilot_scraper) sur les Date_str des CSV du dépôt, et dates relatives
+calculées par rapport à `now`.
+"""
+
+import glob
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.scraper.trustpilot_scraper import DATE_IN_TEXT_RE, parse_date
+from src.utils.dates import extract_date_strings, parse_dates
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+NOW = datetime(2025, 3, 15, 18, 30)
+
+EDGE_CASES = [
+    "Actualisé le 3 mars 2025",
+    "12 Mars 2024",
+    "31 févr. 2024",
+    "12 March 2024",
+    "1 janv. 2025",
+    "",
+    "pas une date",
+]
+
+
+def _old_extract(s: str) -> str:
+    if not s:
+        return ""
+    m = DATE_IN_TEXT_RE.search(s)
+    return m.group(1) if m else s
+
+
+def old_path(s: pd.Series) -> pd.Series:
+    # chemin historique : apply ligne par ligne
+    return pd.to_datetime(s.astype(str).apply(_old_extract).apply(parse_date))
+
+
+def fixture_dates() -> pd.Series:
+    values = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "data", "*.csv")) + glob.glob(os.path.join(ROOT, "*.csv"))):
+        df = pd.read_csv(path)
+        if "Date_str" in df:
+            values += df["Date_str"].fillna("").astype(str).tolist()
+    return pd.Series(values + EDGE_CASES)
+
+
+def test_same_dates_as_row_by_row_path():
+    s = fixture_dates()
+    assert len(s) > len(EDGE_CASES)
+    expected = old_path(s)
+    result = parse_dates(extract_date_strings(s), now=NOW)
+    pd.testing.assert_series_equal(result, expected, check_names=False, check_dtype=False)
+
+
+def test_extract_keeps_only_the_date():
+    s = pd.Series(["Actualisé le 12 janv. 2025", "12 janv. 2025", "hier", None])
+    assert extract_date_strings(s).tolist() == ["12 janv. 2025", "12 janv. 2025", "hier", ""]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("il y a 3 jours", "2025-03-12"),
+        ("il y a une semaine", "2025-03-08"),
+        ("il y a 2 heures", "2025-03-15"),
+        ("3 days ago", "2025-03-12"),
+        ("a week ago", "2025-03-08"),
+        ("hier", "2025-03-14"),
+        ("aujourd'hui", "2025-03-15"),
+        ("yesterday", "2025-03-14"),
+    ],
+)
+def test_relative_dates(text, expected):
+    result = parse_dates(pd.Series([text]), now=NOW)
+    assert result.iloc[0] == pd.Timestamp(expected)
+
+
+def test_unknown_values_are_nat():
+    result = parse_dates(pd.Series(["31 févr. 2024", "pas une date", ""]), now=NOW)
+    assert result.isna().all()
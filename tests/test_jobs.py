@@ -0,0 +1,86 @@
+# tests/test_jobs.py
+"""
+File de jobs de scraping (src/scraper/jobs.py) sur une base SQLite
+temporaire : coalescence des demandes, limite par domaine, reprise d'un
+job abandonné et mises à jour refusées à l'ancien worker.
+"""
+
+import pytest
+
+from src.scraper.jobs import JobStore
+
+YELP_A = "https://www.yelp.fr/biz/le-petit-cler-paris"
+YELP_B = "https://www.yelp.fr/biz/autre-restaurant-paris"
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    yield store
+    store.close()
+
+
+def test_second_submit_is_coalesced(jobs):
+    job, coalesced = jobs.submit("trustpilot", "carhartt-wip.com", "fr")
+    assert not coalesced
+
+    # même cible (casse et blancs normalisés) : même job
+    again, coalesced = jobs.submit("trustpilot", " Carhartt-WIP.com ", "fr")
+    assert coalesced
+    assert again["id"] == job["id"]
+
+    # autre langue : autre job
+    other, coalesced = jobs.submit("trustpilot", "carhartt-wip.com", "en")
+    assert not coalesced
+    assert other["id"] != job["id"]
+
+
+def test_finished_job_is_not_coalesced(jobs):
+    job, _ = jobs.submit("yelp", YELP_A)
+    assert jobs.claim("A")["id"] == job["id"]
+    assert jobs.finish(job["id"], "A")
+
+    again, coalesced = jobs.submit("yelp", YELP_A)
+    assert not coalesced
+    assert again["id"] != job["id"]
+
+
+def test_claim_respects_per_domain_limit(jobs):
+    first, _ = jobs.submit("yelp", YELP_A)
+    second, _ = jobs.submit("yelp", YELP_B)
+    other_host, _ = jobs.submit("trustpilot", "carhartt-wip.com")
+
+    assert jobs.claim("A", per_domain=1)["id"] == first["id"]
+    # www.yelp.fr est occupé : le job Trustpilot passe devant
+    assert jobs.claim("B", per_domain=1)["id"] == other_host["id"]
+    assert jobs.claim("C", per_domain=1) is None
+
+    # avec deux jobs par site, le 2e job Yelp peut partir
+    assert jobs.claim("C", per_domain=2)["id"] == second["id"]
+
+
+def test_stale_job_is_reclaimed(jobs):
+    job, _ = jobs.submit("yelp", YELP_A)
+    assert jobs.claim("A")["worker"] == "A"
+    assert jobs.progress(job["id"], "A", 1, 3, 10)
+
+    # battement de cœur trop ancien : B récupère le job, repris de zéro
+    reclaimed = jobs.claim("B", stale_s=-1)
+    assert reclaimed["id"] == job["id"]
+    assert reclaimed["worker"] == "B"
+    assert reclaimed["status"] == "running"
+    assert reclaimed["pages_done"] == 0
+
+    # l'ancien worker ne peut plus toucher au job
+    assert not jobs.progress(job["id"], "A", 2, 3, 20)
+    assert not jobs.finish(job["id"], "A", error="trop tard")
+    assert not jobs.requeue(job["id"], "A")
+    current = jobs.get(job["id"])
+    assert current["status"] == "running"
+    assert current["worker"] == "B"
+    assert current["error"] is None
+    assert current["pages_done"] == 0
+
+    assert jobs.progress(job["id"], "B", 1, 3, 5)
+    assert jobs.finish(job["id"], "B")
+    assert jobs.get(job["id"])["status"] == "done"
@@ -0,0 +1,117 @@
+# tests/test_review_store.py
+"""
+Base d'avis (src/utils/review_store.py) sur un fichier SQLite temporaire :
+upsert, mise à jour partielle (COALESCE garde les valeurs connues),
+marques ramenées à leur clé canonique, et agrégats rollup_daily tenus à
+jour par les triggers (égaux à un GROUP BY sur reviews à chaque étape).
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.utils import review_store
+from src.utils.review_store import ReviewStore, load_brand_aliases
+
+GROUP_BY = """
+SELECT platform, brand, COALESCE(lang, ''), COALESCE(date, ''), sentiment,
+       COUNT(*), COUNT(stars), COALESCE(SUM(stars), 0)
+FROM reviews WHERE sentiment IS NOT NULL
+GROUP BY platform, brand, COALESCE(lang, ''), COALESCE(date, ''), sentiment
+ORDER BY 1, 2, 3, 4, 5
+"""
+ROLLUP = """
+SELECT platform, brand, lang, day, sentiment, n, stars_n, stars_sum
+FROM rollup_daily ORDER BY 1, 2, 3, 4, 5
+"""
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "reviews.sqlite")
+
+
+@pytest.fixture
+def store(db_path):
+    s = ReviewStore(db_path)
+    yield s
+    s.close()
+
+
+def assert_rollups_match(db_path):
+    with sqlite3.connect(db_path) as db:
+        assert db.execute(ROLLUP).fetchall() == db.execute(GROUP_BY).fetchall()
+
+
+def _reviews(texts, **columns) -> pd.DataFrame:
+    return pd.DataFrame({"Avis": texts, **columns})
+
+
+def test_aliases_file():
+    aliases = load_brand_aliases()
+    assert aliases["carhartt-wip.com"] == "Carhartt WIP"
+    assert aliases["carhartt wip"] == "Carhartt WIP"
+    assert review_store.canonical_brand(" Carhartt-WIP.com ") == "Carhartt WIP"
+    assert review_store.canonical_brand("Marque inconnue") == "Marque inconnue"
+
+
+def test_upsert_update_and_rebrand_keep_rollups(store, db_path, monkeypatch):
+    store.upsert(
+        _reviews(
+            ["Super veste", "Livraison lente", "Taille trop petite"],
+            Date=["2025-01-02", "2025-01-02", "2025-01-03"],
+            Langue=["fr", "fr", "fr"],
+            sentiment=["positive", "negative", "neutral"],
+            stars=[5.0, 1.0, None],
+        ),
+        platform="Trustpilot",
+        brand="carhartt-wip.com",
+    )
+    assert store.brands() == [("Trustpilot", "Carhartt WIP")]
+    assert_rollups_match(db_path)
+
+    # re-scraping sans sentiment ni note : rien n'est effacé, le nouvel avis s'ajoute
+    store.upsert(
+        _reviews(["Super veste", "Livraison lente", "Nouvel avis"], Date=["2025-01-02"] * 3),
+        platform="Trustpilot",
+        brand="Carhartt WIP",
+    )
+    # puis le sentiment recalculé d'un avis change
+    store.upsert(
+        _reviews(["Livraison lente", "Nouvel avis"], sentiment=["neutral", "positive"], stars=[None, 4.0]),
+        platform="Trustpilot",
+        brand="carhartt wip",
+    )
+    df = store.read(["Avis", "Date", "sentiment", "stars"]).set_index("Avis")
+    assert len(df) == 4
+    assert df.loc["Super veste", "sentiment"] == "positive"
+    assert df.loc["Super veste", "stars"] == 5.0
+    assert df.loc["Livraison lente", "sentiment"] == "neutral"
+    assert df.loc["Livraison lente", "stars"] == 1.0
+    assert df.loc["Nouvel avis", "Date"] == pd.Timestamp("2025-01-02")
+    assert_rollups_match(db_path)
+
+    # marque saisie autrement avant que l'alias n'existe, dont un avis déjà connu
+    store.upsert(
+        _reviews(
+            ["Super veste", "Service au top"],
+            Date=["2025-01-02", "2025-01-04"],
+            sentiment=["positive", "positive"],
+            stars=[5.0, 4.0],
+        ),
+        platform="Trustpilot",
+        brand="Carhartt",
+    )
+    assert_rollups_match(db_path)
+
+    monkeypatch.setitem(review_store.BRAND_ALIASES, "carhartt", "Carhartt WIP")
+    assert store.normalize_brands() == 2  # un avis renommé, un doublon supprimé
+    assert store.brands() == [("Trustpilot", "Carhartt WIP")]
+    assert store.count() == 5
+    assert_rollups_match(db_path)
+
+    # changement de plateforme directement en SQL : les triggers suivent aussi
+    with sqlite3.connect(db_path) as db:
+        db.execute("UPDATE reviews SET platform = 'Yelp' WHERE avis = 'Service au top'")
+    assert_rollups_match(db_path)
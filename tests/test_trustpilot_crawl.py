@@ -0,0 +1,62 @@
+# tests/test_trustpilot_crawl.py
+"""
+iter_trustpilot_pages contre un serveur HTTP local : toutes les vagues
+passent par le même crawler, donc le débit `rate_per_s` vaut pour le crawl
+entier (et pas une rafale complète par vague).
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.scraper import trustpilot_scraper
+
+
+class _Handler(BaseHTTPRequestHandler):
+    hits: list[float] = []
+
+    def do_GET(self):
+        self.hits.append(time.monotonic())
+        body = b"<html><body></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    _Handler.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+    monkeypatch.setattr(
+        trustpilot_scraper,
+        "_page_url",
+        lambda domain, lang, n: f"http://127.0.0.1:{port}/review/{domain}?page={n}",
+    )
+    yield _Handler.hits
+    server.shutdown()
+    server.server_close()
+
+
+def test_rate_holds_across_waves(stub_server):
+    rate, nb_pages = 20.0, 30
+    pages = list(
+        trustpilot_scraper.iter_trustpilot_pages(
+            "example.com", nb_pages, "fr", concurrency=4, rate_per_s=rate, wave_size=4
+        )
+    )
+
+    assert [n for n, _ in pages] == list(range(1, nb_pages + 1))
+    assert len(stub_server) == nb_pages
+    # rafale initiale de `rate` jetons, puis `rate` requêtes/s au plus
+    elapsed = stub_server[-1] - stub_server[0]
+    assert elapsed >= 0.9 * (nb_pages - rate) / rate
@@ -0,0 +1,43 @@
+# tests/test_trustpilot_parsing.py
+"""
+Moteurs d'extraction Trustpilot (src/scraper/trustpilot_parsing.py) :
+chaque moteur donne exactement la sortie de bs4 (référence) sur les pages
+enregistrées dans data/fixtures.
+"""
+
+import glob
+import os
+
+import pytest
+
+from src.scraper.trustpilot_parsing import ENGINES, extract_reviews, extract_total_pages
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "data", "fixtures", "trustpilot_*.html")
+
+
+def _pages() -> list[str]:
+    pages = []
+    for path in sorted(glob.glob(FIXTURES)):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    return pages
+
+
+PAGES = _pages()
+
+
+def test_fixtures_present():
+    assert PAGES
+    assert all(extract_reviews(page, "bs4") for page in PAGES)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_reviews_match_bs4(engine):
+    for page in PAGES:
+        assert extract_reviews(page, engine) == extract_reviews(page, "bs4")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_total_pages_match_bs4(engine):
+    for page in PAGES:
+        assert extract_total_pages(page, engine) == extract_total_pages(page, "bs4")